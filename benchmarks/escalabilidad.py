@@ -0,0 +1,165 @@
+'''
+    PAC-MD - BENCHMARK DE ESCALABILIDAD DEL MOTOR DE MÉTRICAS POR BLOQUES
+
+    Mide pac_md.metricas_por_bloques (el núcleo del modo streaming) sobre una grilla de pasos de tiempo (horario, 10 y 5 minutos, hasta
+    105.120 pasos por año) x sensores (hasta 50.000), con bloques de iluminancias sintéticas generados en memoria: no se escriben archivos,
+    por lo que se mide el motor y no la lectura del disco. El schedule se define por reglas (ver pac_md.expandir_schedule) con el mismo paso
+    de tiempo que los bloques.
+
+    Para cada caso se registra el tiempo, el tiempo por celda (pasos x sensores) y el pico de memoria (tracemalloc, en la misma ejecución).
+    Se verifica que:
+        - el tiempo crece de forma lineal: el tiempo por celda de cada caso no supera al del caso más chico en más de la tolerancia
+        - la memoria está acotada: para cualquier cantidad de pasos, el pico no supera el presupuesto de memoria de los bloques más los
+          contadores por sensor (el pico varía con la fracción de pasos ocupados de cada bloque, que se copian al compactarlo, pero no con
+          la longitud del año)
+    Con --verificar el programa finaliza con código 1 si alguna de las dos condiciones no se cumple.
+
+    Uso:
+        python3 benchmarks/escalabilidad.py                                  # grilla por defecto, menos de un minuto
+        python3 benchmarks/escalabilidad.py --sensores 50000 --pasos 5      # 105.120 pasos x 50.000 sensores, algunos minutos
+        python3 benchmarks/escalabilidad.py --presupuesto 128 --verificar   # otro presupuesto de memoria por bloque [MB]
+'''
+###### LIBRARIES ######
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+from sys import exit
+
+import numpy as np
+
+carpetaRepositorio = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, carpetaRepositorio)
+import pac_md
+
+######  CONFIG PARAMETERS   ######
+sensoresPorDefecto = [1000, 5000] # sensors of the default grid
+pasosPorDefecto = [60, 10, 5] # time steps of the default grid [min]: 8760, 52560 and 105120 steps per year
+presupuestoMemoriaMB = 256 # memory per block [MB], see pac_md.filas_por_bloque
+
+toleranciaTiempo = 0.35 # allowed increase of the time per cell over the smallest case of each sensor count (fraction)
+margenMemoriaMB = 8 # [MB] allowance for the interpreter and the small per block arrays
+semilla = 20220920 # random seed of the synthetic data
+
+######  FUNCTIONS DECLARATION   ######
+def bloques_sinteticos(pasosTotales, pasoMinutos, atenuacion, filas):
+    '''
+    - SECUENCIA DE BLOQUES DE ILUMINANCIAS SINTÉTICAS [lx] -
+
+    Curva solar diaria (6 a 18 h) con variación estacional y atenuación por sensor, como en benchmarks/rendimiento.py pero sin ruido:
+    cada bloque es un producto exterior que se escribe sobre el mismo arreglo, para que la generación no domine el tiempo medido ni la
+    memoria
+
+    Parámetros input
+        pasosTotales - Elemento tipo entero, cantidad de pasos del año
+        pasoMinutos - Elemento tipo entero, paso de tiempo [min]
+        atenuacion - Elemento tipo numpy array (Sensores)
+        filas - Elemento tipo entero, pasos por bloque, ver pac_md.filas_por_bloque
+
+    Parámetros output
+        bloques - Elemento tipo generador de numpy array (Pasos del bloque x Sensores)
+    '''
+    pasosPorHora = 60 / pasoMinutos
+    buffer = np.empty((filas, len(atenuacion)))
+    for inicio in range(0, pasosTotales, filas):
+        paso = np.arange(inicio, min(inicio + filas, pasosTotales))
+        hora = (paso % (24 * pasosPorHora)) / pasosPorHora
+        dia = paso // (24 * pasosPorHora)
+        exterior = 60000 * np.clip(np.sin(np.pi * (hora - 6) / 12), 0, None) * (1 + 0.3 * np.cos(2 * np.pi * (dia - 172) / 365))
+        bloque = buffer[:len(paso)]
+        np.multiply(exterior[:, np.newaxis], atenuacion[np.newaxis, :], out=bloque)
+        yield bloque
+
+def medir_caso(sensores, pasoMinutos, presupuesto):
+    '''
+    - TIEMPO Y PICO DE MEMORIA DEL MOTOR POR BLOQUES PARA UN CASO DE LA GRILLA -
+
+    Parámetros output
+        medicion - Elemento tipo diccionario {"sensores", "pasoMinutos", "pasos", "filasPorBloque", "tiempo": [s], "nsPorCelda",
+        "memoriaPicoMB", "contadoresMB", "dmcRows"}
+    '''
+    generador = np.random.default_rng(semilla)
+    atenuacion = generador.uniform(0.002, 0.05, size=sensores)
+    entradaSchedule = pac_md.registrar_schedule({"pasoMinutos": pasoMinutos, "ocupacion": [{"desde": 8, "hasta": 21}]})
+    pasosTotales = entradaSchedule["nHoras"]
+    parametros = pac_md.parametros_metricas()
+    filas = pac_md.filas_por_bloque(presupuesto, sensores, 1)
+
+    # CONTADORES POR SENSOR (DA, sDA, UDI, sUDI Y UNO POR CADA ESCALÓN DEL CDI), EN float64
+    contadoresMB = (4 + len(parametros["cdiEscala"])) * sensores * 8 / 2**20
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        listaMetricasPerfiles, nPasos = pac_md.metricas_por_bloques(bloques_sinteticos(pasosTotales, pasoMinutos, atenuacion, filas), [entradaSchedule], [parametros], sensores)
+        tiempo = time.perf_counter() - inicio
+        memoriaPico = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return {
+            "sensores": sensores,
+            "pasoMinutos": pasoMinutos,
+            "pasos": nPasos,
+            "filasPorBloque": filas,
+            "tiempo": tiempo,
+            "nsPorCelda": tiempo / (nPasos * sensores) * 1e9,
+            "memoriaPicoMB": memoriaPico,
+            "contadoresMB": contadoresMB,
+            "dmcRows": int(listaMetricasPerfiles[0][0]["dmcRows"])
+        }
+
+def verificar(mediciones, presupuesto):
+    '''
+    - VERIFICACIÓN DE LA ESCALABILIDAD LINEAL Y DE LA ENVOLVENTE DE MEMORIA -
+
+    Parámetros output
+        errores - Elemento tipo lista de strings, vacía si se cumplen ambas condiciones
+    '''
+    errores = []
+    for sensores in sorted(set(medicion["sensores"] for medicion in mediciones)):
+        casos = sorted((medicion for medicion in mediciones if medicion["sensores"] == sensores), key=lambda medicion: medicion["pasos"])
+        referencia = casos[0]
+        for medicion in casos:
+            envolvente = presupuesto + medicion["contadoresMB"] + margenMemoriaMB
+            if medicion["memoriaPicoMB"] > envolvente:
+                errores.append(f"{sensores} sensores, {medicion['pasos']} pasos: pico de memoria {medicion['memoriaPicoMB']:.1f} MB, envolvente {envolvente:.1f} MB")
+            if medicion["dmcRows"] != medicion["pasos"]:
+                errores.append(f"{sensores} sensores, {medicion['pasos']} pasos: se recorrieron {medicion['dmcRows']} pasos")
+            if medicion is referencia:
+                continue
+            if medicion["nsPorCelda"] > referencia["nsPorCelda"] * (1 + toleranciaTiempo):
+                errores.append(f"{sensores} sensores, {medicion['pasos']} pasos: {medicion['nsPorCelda']:.2f} ns por celda, {referencia['nsPorCelda']:.2f} con {referencia['pasos']} pasos")
+    return errores
+
+def main():
+    '''
+    - EJECUCIÓN DEL BENCHMARK -
+    '''
+    parser = argparse.ArgumentParser(description="PAC-MD - benchmark de escalabilidad del motor de métricas por bloques")
+    parser.add_argument("--sensores", nargs="+", type=int, default=sensoresPorDefecto, help="cantidades de sensores de la grilla")
+    parser.add_argument("--pasos", nargs="+", type=int, default=pasosPorDefecto, help="pasos de tiempo de la grilla [min], divisores de 1440")
+    parser.add_argument("--presupuesto", type=float, default=presupuestoMemoriaMB, help="memoria por bloque [MB], ver pac_md.presupuestoMemoriaMB")
+    parser.add_argument("--verificar", action="store_true", help="finaliza con código 1 si el tiempo no crece de forma lineal o la memoria supera la envolvente")
+    argumentos = parser.parse_args()
+
+    print(f"Presupuesto de memoria por bloque: {argumentos.presupuesto} MB\n")
+    print(f"{'Sensores':>10}{'Paso [min]':>12}{'Pasos':>10}{'Filas/bloque':>14}{'Tiempo [s]':>12}{'ns/celda':>10}{'Pico [MB]':>11}")
+    mediciones = []
+    for sensores in argumentos.sensores:
+        for pasoMinutos in sorted(argumentos.pasos, reverse=True):
+            medicion = medir_caso(sensores, pasoMinutos, argumentos.presupuesto)
+            mediciones.append(medicion)
+            print(f"{sensores:>10}{pasoMinutos:>12}{medicion['pasos']:>10}{medicion['filasPorBloque']:>14}{medicion['tiempo']:>12.3f}{medicion['nsPorCelda']:>10.2f}{medicion['memoriaPicoMB']:>11.1f}")
+
+    errores = verificar(mediciones, argumentos.presupuesto)
+    for error in errores:
+        print(f"ERROR: {error}")
+    if not errores:
+        print(f"\nTiempo lineal en pasos x sensores (tolerancia {toleranciaTiempo*100:.0f} %) y memoria acotada por el presupuesto de los bloques")
+    return 1 if errores and argumentos.verificar else 0
+
+if __name__ == "__main__":
+    exit(main())
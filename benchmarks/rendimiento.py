@@ -0,0 +1,352 @@
+'''
+    PAC-MD - BENCHMARK DEL MOTOR DE MÉTRICAS Y DEL PROCESAMIENTO COMPLETO
+
+    Genera conjuntos sintéticos de archivos results, schedule y .pts (desde los 60 sensores de example/ hasta 100.000 sensores, con pasos
+    horarios o de 5 minutos) y mide por separado cada etapa: búsqueda de archivos, lectura de los csv, cada función de cálculo de métricas,
+    escritura de las salidas, gráficos y el procesamiento completo con run_batch. Para cada etapa se registra el tiempo (mínimo de las
+    repeticiones) y el pico de memoria (tracemalloc, en una ejecución aparte).
+
+    Los resultados se agregan al historial historial_rendimiento.jsonl, una línea JSON por caso y ejecución. Con --verificar se compara cada
+    etapa contra la mediana de las últimas ejecuciones del mismo caso en el mismo equipo, y el programa finaliza con código 1 si alguna
+    supera la tolerancia.
+
+    Uso:
+        python3 benchmarks/rendimiento.py                          # casos por defecto (ejemplo, mediano, subhorario)
+        python3 benchmarks/rendimiento.py --casos grande maximo    # casos grandes, pueden tardar varios minutos
+        python3 benchmarks/rendimiento.py --verificar              # finaliza con error si alguna etapa es más lenta que el historial
+'''
+###### LIBRARIES ######
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from sys import exit
+
+import numpy as np
+
+carpetaRepositorio = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, carpetaRepositorio)
+import pac_md
+
+######  CONFIG PARAMETERS   ######
+archivoHistorial = os.path.join(os.path.dirname(os.path.abspath(__file__)), "historial_rendimiento.jsonl")
+
+# SYNTHETIC CASES: sensors per results file, time steps per hour, results files (orientations) and schedules of a single parentID
+casos = {
+    "ejemplo": {"sensores": 60, "pasosPorHora": 1, "results": 2, "schedules": 1},
+    "mediano": {"sensores": 2000, "pasosPorHora": 1, "results": 4, "schedules": 3},
+    "subhorario": {"sensores": 500, "pasosPorHora": 12, "results": 2, "schedules": 2},
+    "grande": {"sensores": 20000, "pasosPorHora": 1, "results": 2, "schedules": 2},
+    "maximo": {"sensores": 100000, "pasosPorHora": 1, "results": 1, "schedules": 1}
+}
+casosPorDefecto = ["ejemplo", "mediano", "subhorario"]
+
+repeticiones = 3 # repetitions per stage, the minimum time is reported
+tolerancia = 0.25 # allowed regression over the history median (fraction)
+ejecucionesReferencia = 5 # last runs of the same case and computer used as reference
+tiempoMinimoVerificacion = 0.05 # [s] stages faster than this are not checked (timer noise)
+semilla = 20220920 # random seed of the synthetic data
+filasPorEscritura = 2000 # rows generated and written at once
+
+######  FUNCTIONS DECLARATION   ######
+def iluminancias_sinteticas(generador, inicio, filas, pasosPorHora, atenuacion, cieloDiario):
+    '''
+    - BLOQUE DE ILUMINANCIAS SINTÉTICAS [lx] -
+
+    Curva solar diaria (6 a 18 h) con variación estacional, un factor de cielo por día (despejado / nublado) y atenuación por sensor según
+    su distancia a la ventana, más un ruido del 5 %
+
+    Parámetros output
+        bloque - Elemento tipo numpy array (Filas x Sensores)
+    '''
+    paso = np.arange(inicio, inicio + filas)
+    hora = (paso % (24 * pasosPorHora)) / pasosPorHora
+    dia = paso // (24 * pasosPorHora)
+    curvaSolar = np.clip(np.sin(np.pi * (hora - 6) / 12), 0, None)
+    estacion = 1 + 0.3 * np.cos(2 * np.pi * (dia - 172) / 365)
+    exterior = 60000 * curvaSolar * estacion * cieloDiario[dia % len(cieloDiario)]
+    bloque = exterior[:, np.newaxis] * atenuacion[np.newaxis, :]
+    bloque *= generador.normal(1, 0.05, size=bloque.shape).clip(0, None)
+    return np.rint(bloque)
+
+def generar_datos(carpeta, nombreCaso, caso):
+    '''
+    - GENERACIÓN DE UN CONJUNTO SINTÉTICO DE ARCHIVOS results, schedule Y .pts -
+
+    Se utilizan los mismos nombres y formatos que en example/: results_<parentID>_<orientación>.csv (Horas x Sensores, separados por
+    comas), schedule_<parentID>_<id>.csv (mes, día, hora, ocupación, período de análisis) y results_<parentID>_<orientación>.pts
+    (x, y, z, nx, ny, nz separados por tabulaciones)
+
+    Parámetros output
+        paths - Elemento tipo diccionario con las carpetas {"datos", "coordenadas", "procesados", "imagenes"}, ver pac_md.run_batch
+    '''
+    paths = {
+        "datos": os.path.join(carpeta, "Results", ""),
+        "coordenadas": os.path.join(carpeta, "Workplanes", ""),
+        "procesados": os.path.join(carpeta, "Results", "pac_md", ""),
+        "imagenes": os.path.join(carpeta, "Results", "pac_md", "")
+    }
+    os.makedirs(paths["datos"], exist_ok=True)
+    os.makedirs(paths["coordenadas"], exist_ok=True)
+
+    generador = np.random.default_rng(semilla)
+    nSensores, pasosPorHora = caso["sensores"], caso["pasosPorHora"]
+    nFilas = 8760 * pasosPorHora
+    parentID = nombreCaso
+
+    # SENSORES EN UNA GRILLA DE 0.5 m, LA VENTANA EN y = 0
+    columnas = int(np.ceil(np.sqrt(nSensores)))
+    x = (np.arange(nSensores) % columnas) * 0.5
+    y = (np.arange(nSensores) // columnas) * 0.5 + 0.25
+    cieloDiario = np.where(generador.random(365) < 0.6, 1.0, 0.25)
+
+    for r in range(caso["results"]):
+        orientacion = f"o{r}"
+        atenuacion = 0.08 * np.exp(-y / (1.5 + r)) + 0.002
+        with open(os.path.join(paths["datos"], f"results_{parentID}_{orientacion}.csv"), "w") as f:
+            for inicio in range(0, nFilas, filasPorEscritura):
+                bloque = iluminancias_sinteticas(generador, inicio, min(filasPorEscritura, nFilas - inicio), pasosPorHora, atenuacion, cieloDiario)
+                np.savetxt(f, bloque, fmt="%d", delimiter=",")
+        coordenadas = np.column_stack([x, y, np.full(nSensores, 0.8), np.zeros(nSensores), np.zeros(nSensores), np.ones(nSensores)])
+        np.savetxt(os.path.join(paths["coordenadas"], f"results_{parentID}_{orientacion}.pts"), coordenadas, fmt="%g", delimiter="\t")
+
+    # SCHEDULES DE OCUPACIÓN: DISTINTOS HORARIOS DIARIOS, DE LUNES A VIERNES EN LOS ÍMPARES
+    paso = np.arange(nFilas)
+    hora = (paso % (24 * pasosPorHora)) / pasosPorHora + 0.5 / pasosPorHora
+    dia = paso // (24 * pasosPorHora)
+    fechas = np.datetime64("2023-01-01") + dia.astype("timedelta64[D]")
+    mes = fechas.astype("datetime64[M]").astype(int) % 12 + 1
+    diaMes = (fechas - fechas.astype("datetime64[M]")).astype(int) + 1
+    for s in range(caso["schedules"]):
+        entrada, salida = 8 + s, 18 + s
+        ocupacion = (hora >= entrada) & (hora < salida)
+        if s % 2 == 1:
+            ocupacion &= (dia % 7) < 5
+        schedule = np.column_stack([mes, diaMes, hora, ocupacion.astype(int), np.ones(nFilas, dtype=int)])
+        np.savetxt(os.path.join(paths["datos"], f"schedule_{parentID}_s{s}.csv"), schedule, fmt=["%d", "%d", "%g", "%d", "%d"], delimiter=",")
+
+    return paths
+
+def medir(funcion, repeticionesEtapa, memoria=True):
+    '''
+    - TIEMPO Y PICO DE MEMORIA DE UNA ETAPA -
+
+    El tiempo es el mínimo de las repeticiones; el pico de memoria se mide en una ejecución aparte con tracemalloc, para no afectar el
+    tiempo. Los mensajes de pac_md se descartan.
+
+    Parámetros output
+        medicion - Elemento tipo diccionario {"tiempo": [s], "memoriaPicoMB": [MB] o None}
+        resultado - valor devuelto por la última ejecución de funcion
+    '''
+    tiempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticionesEtapa):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+
+        memoriaPico = None
+        if memoria:
+            tracemalloc.start()
+            funcion()
+            memoriaPico = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+    return {"tiempo": min(tiempos), "memoriaPicoMB": memoriaPico}, resultado
+
+def medir_caso(nombreCaso, caso, carpetaDatos, repeticionesCaso, memoria=True, graficos=True):
+    '''
+    - MEDICIÓN DE TODAS LAS ETAPAS DE UN CASO -
+
+    Parámetros output
+        etapas - Elemento tipo diccionario {nombre de la etapa: {"tiempo", "memoriaPicoMB"}}, en el orden en que se ejecutan
+    '''
+    carpeta = os.path.join(carpetaDatos, nombreCaso)
+    inicio = time.perf_counter()
+    if os.path.isdir(carpeta):
+        shutil.rmtree(carpeta)
+    paths = generar_datos(carpeta, nombreCaso, caso)
+    print(f"  datos sintéticos generados en {time.perf_counter() - inicio:.1f} s")
+
+    parametros = pac_md.configurar_parametros()
+    rutaResultados = os.path.join(paths["datos"], f"results_{nombreCaso}_o0.csv")
+    rutasSchedule = [os.path.join(paths["datos"], f"schedule_{nombreCaso}_s{s}.csv") for s in range(caso["schedules"])]
+    etapas = {}
+
+    def etapa(nombre, funcion, repeticionesEtapa=repeticionesCaso):
+        etapas[nombre], resultado = medir(funcion, repeticionesEtapa, memoria)
+        print(f"  {nombre:<28} {etapas[nombre]['tiempo']:>10.4f} s" + (f" {etapas[nombre]['memoriaPicoMB']:>10.1f} MB" if memoria else ""))
+        return resultado
+
+    etapa("descubrimiento", lambda: pac_md.plan_pares(paths["datos"], paths["coordenadas"]))
+
+    # LECTURA DE LOS CSV SIN CACHE Y DESDE LA CACHE BINARIA (mmap)
+    usarCacheCSV = pac_md.usarCacheCSV
+    pac_md.usarCacheCSV = False
+    matriz = etapa("lectura_csv_results", lambda: pac_md.leer_matriz_cacheada(rutaResultados, ','))
+    pac_md.usarCacheCSV = True
+    pac_md.leer_matriz_cacheada(rutaResultados, ',')
+    etapa("lectura_cache_results", lambda: np.asarray(pac_md.leer_matriz_cacheada(rutaResultados, ',')).sum())
+    pac_md.usarCacheCSV = usarCacheCSV
+
+    def lectura_schedules():
+        pac_md.limpiar_registro_schedules()
+        return [pac_md.registrar_schedule(ruta) for ruta in rutasSchedule]
+    entradas = etapa("lectura_schedules", lectura_schedules)
+    matriz = np.asarray(matriz)
+    listaCondiciones = [entrada["condicion"] for entrada in entradas]
+    listaRealHours = [entrada["dmcRealHours"] for entrada in entradas]
+    condicion, realHours = listaCondiciones[0], listaRealHours[0]
+
+    # FUNCIONES DE CÁLCULO DE MÉTRICAS
+    etapa("motor_metricas_dinamicas", lambda: pac_md.motor_metricas_dinamicas(matriz, condicion, realHours, parametros["daIlumValue"], parametros["sdaIlumValue"], parametros["sdaPorcentajeHoras"], parametros["udiIlumMin"], parametros["udiIlumMax"], parametros["sudiIlumMin"], parametros["sudiIlumMax"], parametros["sudiPorcentajeHoras"]))
+    etapa("motor_cdi", lambda: pac_md.motor_cdi(matriz, condicion, realHours, parametros["cdiPorcentajeSensores"], parametros["cdiEscala"]))
+    etapa("motor_metricas_lote", lambda: pac_md.motor_metricas_lote(matriz, listaCondiciones, listaRealHours, parametros))
+    mascaras = etapa("construir_mascaras_bits", lambda: pac_md.construir_mascaras_bits(matriz, parametros))
+    etapa("metricas_desde_mascaras", lambda: pac_md.metricas_desde_mascaras(mascaras, listaCondiciones, listaRealHours, parametros))
+    indice = etapa("construir_indice_ocupado", lambda: pac_md.construir_indice_ocupado(matriz, condicion))
+    etapa("metricas_desde_indice", lambda: pac_md.metricas_desde_indice(indice, parametros))
+    etapa("motor_metricas_streaming", lambda: pac_md.motor_metricas_streaming(rutaResultados, rutasSchedule, parametros, pac_md.presupuestoMemoriaMB), 1)
+
+    # ESCRITURA DE LAS SALIDAS
+    m = pac_md.calcular_metricas_par(matriz, condicion, realHours, parametros)
+    dmcRows = min(matriz.shape[0], condicion.shape[0])
+    carpetaSalida = paths["procesados"]
+    os.makedirs(carpetaSalida, exist_ok=True)
+    nombre = f"{nombreCaso}_o0_s0"
+    etapa("escritura_csv", lambda: pac_md.creacion_archivos(carpetaSalida, nombre, rutaResultados, rutasSchedule[0], m["daIlumHoursCount"], m["daOcurranceRate"], m["daAverageOcurranceRate"], m["udiIlumHoursCount"], m["udiOcurranceRate"], m["udiAverageOcurranceRate"], m["udiHours"], m["sUDI"], m["sudiIlumSensorCount"], m["sudiOccurrancePercentSensor"], m["sdaIlumSensorCount"], m["sdaOccurrancePercentSensor"], m["sdaAnualOccurranceRate"], m["sdaOcurranceAllSensors"], m["cdiValues"], m["sCDI"], m["cdi"], dmcRows, m["dmcNsensors"], m["sUDIhoras"], parametros))
+    dfTabla = pac_md.tabla_sensores(m["daIlumHoursCount"], m["daOcurranceRate"], m["udiIlumHoursCount"], m["udiOcurranceRate"], m["cdiValues"], m["sdaIlumSensorCount"], m["sdaOccurrancePercentSensor"], m["sudiIlumSensorCount"], m["sudiOccurrancePercentSensor"], parametros)
+    metadatos = {"tabla": "sensores", "parentID": nombreCaso, "resultID": "o0", "scheduleID": "s0", "parametros": parametros}
+    formatoColumnar = pac_md.formato_salida_efectivo("parquet")
+    rutaColumnar = carpetaSalida + pac_md.procesadosFileReference + nombre + pac_md.extensionesSalida[formatoColumnar]
+    etapa(f"escritura_{formatoColumnar}", lambda: pac_md.guardar_tabla(dfTabla, rutaColumnar, formatoColumnar, metadatos))
+
+    # GRÁFICOS DE UNA ESCENA, A BAJA RESOLUCIÓN
+    if graficos:
+        try:
+            pac_md.importar_pyplot()
+        except ImportError:
+            print("  graficos: matplotlib no está instalado, se omite la etapa")
+        else:
+            opciones = pac_md.opciones_graficos()
+            opciones.update({"dpi": 72, "formato": "png", "carpetaImagen": "images_benchmark/"})
+            escena = pac_md.escenas_graficos([pac_md.resultado_par(dfTabla, metadatos)])[0]
+            os.makedirs(paths["imagenes"] + opciones["carpetaImagen"], exist_ok=True)
+            etapa("graficos_escena", lambda: pac_md.renderizar_escena(escena, paths, opciones), 1)
+
+    # PROCESAMIENTO COMPLETO, SIN CACHE NI MANIFIESTO PREVIOS Y SIN IMÁGENES
+    def procesamiento_completo():
+        pac_md.purgar_cache([paths["datos"], paths["coordenadas"]])
+        pac_md.limpiar_registro_schedules()
+        return pac_md.run_batch(paths, plots=False, incremental=False)
+    etapa("run_batch", procesamiento_completo, 1)
+
+    return etapas
+
+def revision_git():
+    '''
+    - COMMIT ACTUAL DEL REPOSITORIO, SI ESTÁ DISPONIBLE -
+    '''
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=carpetaRepositorio, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return salida.stdout.strip()
+
+def cargar_historial():
+    '''
+    - LECTURA DEL HISTORIAL DE EJECUCIONES -
+
+    Parámetros output
+        historial - Elemento tipo lista de diccionarios, una entrada por caso y ejecución
+    '''
+    historial = []
+    if not os.path.isfile(archivoHistorial):
+        return historial
+    with open(archivoHistorial, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                historial.append(json.loads(linea))
+            except json.JSONDecodeError:
+                continue
+    return historial
+
+def regresiones(entrada, historial):
+    '''
+    - COMPARACIÓN DE UNA EJECUCIÓN CONTRA EL HISTORIAL DEL MISMO CASO Y EQUIPO -
+
+    Parámetros output
+        errores - Elemento tipo lista con un mensaje por etapa más lenta que la mediana de referencia más la tolerancia
+    '''
+    anteriores = [h for h in historial if h["caso"] == entrada["caso"] and h["equipo"] == entrada["equipo"]][-ejecucionesReferencia:]
+    errores = []
+    for nombre, medicion in entrada["etapas"].items():
+        tiempos = [h["etapas"][nombre]["tiempo"] for h in anteriores if nombre in h["etapas"]]
+        if len(tiempos) == 0:
+            continue
+        referencia = statistics.median(tiempos)
+        if medicion["tiempo"] > max(referencia, tiempoMinimoVerificacion) * (1 + tolerancia):
+            errores.append(f"{entrada['caso']} - {nombre}: {medicion['tiempo']:.4f} s, referencia {referencia:.4f} s")
+    return errores
+
+def main():
+    '''
+    - EJECUCIÓN DEL BENCHMARK -
+    '''
+    parser = argparse.ArgumentParser(description="PAC-MD - benchmark del motor de métricas y del procesamiento completo")
+    parser.add_argument("--casos", nargs="+", choices=list(casos), default=casosPorDefecto, help="casos sintéticos a medir")
+    parser.add_argument("--repeticiones", type=int, default=repeticiones, help="repeticiones por etapa, se informa el mínimo")
+    parser.add_argument("--carpeta-datos", help="carpeta donde se generan los datos sintéticos (por defecto una carpeta temporal que se elimina al finalizar)")
+    parser.add_argument("--sin-memoria", action="store_true", help="no mide el pico de memoria de cada etapa")
+    parser.add_argument("--sin-graficos", action="store_true", help="no mide la etapa de gráficos")
+    parser.add_argument("--sin-historial", action="store_true", help="no agrega los resultados al historial")
+    parser.add_argument("--verificar", action="store_true", help="finaliza con código 1 si alguna etapa es más lenta que el historial")
+    argumentos = parser.parse_args()
+
+    carpetaDatos = argumentos.carpeta_datos or tempfile.mkdtemp(prefix="pac_md_benchmark_")
+    historial = cargar_historial()
+    errores = []
+    try:
+        for nombreCaso in argumentos.casos:
+            caso = casos[nombreCaso]
+            print(f"Caso {nombreCaso}: {caso['sensores']} sensores, {caso['pasosPorHora']} pasos por hora, {caso['results']} results x {caso['schedules']} schedules")
+            etapas = medir_caso(nombreCaso, caso, carpetaDatos, argumentos.repeticiones, not argumentos.sin_memoria, not argumentos.sin_graficos)
+
+            entrada = {
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "caso": nombreCaso,
+                "configuracion": caso,
+                "equipo": platform.node(),
+                "python": sys.version.split()[0],
+                "numpy": np.__version__,
+                "pandas": pac_md.pd.__version__,
+                "commit": revision_git(),
+                "etapas": etapas
+            }
+            if argumentos.verificar:
+                errores += regresiones(entrada, historial)
+            if not argumentos.sin_historial:
+                with open(archivoHistorial, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entrada) + "\n")
+                historial.append(entrada)
+    finally:
+        if argumentos.carpeta_datos is None:
+            shutil.rmtree(carpetaDatos, ignore_errors=True)
+
+    if not argumentos.sin_historial:
+        print(f"Historial actualizado: {archivoHistorial}")
+    for error in errores:
+        print(f"ERROR: etapa más lenta que el historial (tolerancia {tolerancia*100:.0f} %): {error}")
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,90 @@
+'''
+    PAC-MD - BENCHMARK DEL TIEMPO DE INICIO
+
+    Mide, en procesos nuevos, el tiempo de "import pac_md" y verifica que no se carguen los módulos de gráficos (matplotlib) al importar.
+    Finaliza con código 1 si la mediana supera el tiempo de referencia guardado en tiempo_inicio.json más la tolerancia indicada, o el
+    límite absoluto si todavía no hay referencia.
+
+    Uso:
+        python3 benchmarks/tiempo_inicio.py                 # compara contra la referencia
+        python3 benchmarks/tiempo_inicio.py --actualizar    # guarda la mediana actual como referencia
+'''
+###### LIBRARIES ######
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from sys import exit
+
+######  CONFIG PARAMETERS   ######
+carpetaRepositorio = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+archivoReferencia = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiempo_inicio.json")
+
+repeticiones = 7 # number of fresh interpreters to measure
+tolerancia = 0.25 # allowed regression over the reference time (fraction)
+limiteAbsoluto = 2.0 # [s] limit used when there is no reference file
+modulosProhibidos = ["matplotlib", "matplotlib.pyplot"] # must not be loaded by "import pac_md"
+
+codigoMedicion = (
+    "import sys, time\n"
+    "t = time.perf_counter()\n"
+    "import pac_md\n"
+    "t = time.perf_counter() - t\n"
+    "import json\n"
+    "print(json.dumps({'tiempo': t, 'modulos': sorted(m for m in " + repr(modulosProhibidos) + " if m in sys.modules)}))\n"
+)
+
+######  FUNCTIONS DECLARATION   ######
+def medir_importacion():
+    '''
+    - TIEMPO DE "import pac_md" EN UN INTÉRPRETE NUEVO -
+
+    Parámetros output
+        medicion - Elemento tipo diccionario, {"tiempo": float [s], "modulos": lista de módulos prohibidos que se cargaron}
+    '''
+    salida = subprocess.run([sys.executable, "-c", codigoMedicion], cwd=carpetaRepositorio, capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+def main():
+    '''
+    - EJECUCIÓN DEL BENCHMARK -
+    '''
+    parser = argparse.ArgumentParser(description="PAC-MD - benchmark del tiempo de inicio")
+    parser.add_argument("--actualizar", action="store_true", help="guarda la mediana medida como nueva referencia")
+    parser.add_argument("--repeticiones", type=int, default=repeticiones, help="cantidad de intérpretes a medir")
+    argumentos = parser.parse_args()
+
+    # LA PRIMERA EJECUCIÓN GENERA LOS .pyc Y NO SE CONSIDERA
+    medir_importacion()
+    mediciones = [medir_importacion() for _ in range(argumentos.repeticiones)]
+    tiempos = [m["tiempo"] for m in mediciones]
+    mediana = statistics.median(tiempos)
+    print(f"import pac_md - mediana: {mediana:.3f} s, mínimo: {min(tiempos):.3f} s, máximo: {max(tiempos):.3f} s ({len(tiempos)} repeticiones)")
+
+    errores = []
+    modulosCargados = sorted(set(m for medicion in mediciones for m in medicion["modulos"]))
+    if modulosCargados:
+        errores.append(f"import pac_md carga módulos de gráficos: {', '.join(modulosCargados)}")
+
+    if argumentos.actualizar:
+        with open(archivoReferencia, "w") as f:
+            json.dump({"mediana": mediana, "python": sys.version.split()[0]}, f, indent=1)
+        print(f"Referencia actualizada: {archivoReferencia}")
+    elif os.path.isfile(archivoReferencia):
+        with open(archivoReferencia, "r") as f:
+            referencia = json.load(f)
+        limite = referencia["mediana"] * (1 + tolerancia)
+        print(f"Referencia: {referencia['mediana']:.3f} s, límite: {limite:.3f} s")
+        if mediana > limite:
+            errores.append(f"El tiempo de inicio aumentó más del {tolerancia*100:.0f} % respecto a la referencia")
+    elif mediana > limiteAbsoluto:
+        errores.append(f"El tiempo de inicio supera el límite de {limiteAbsoluto} s")
+
+    for error in errores:
+        print(f"ERROR: {error}")
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    exit(main())
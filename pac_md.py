@@ -18,30 +18,30 @@ from datetime import datetime
 import pandas as pd
 import numpy as np
 import os
+import pathlib
+import re
 import glob
+import json
+import hashlib
+import argparse
+import functools
+import platform
+import time
 from sys import exit
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from io import StringIO
-import matplotlib
-import matplotlib as mpl
-import matplotlib.pyplot as plt
 
 ######  CONFIG PARAMETERS OF DYNAMIC METRICS   ######
 
 # FILES PATHS
-# SO Windows
-filesPathData = ".\example\Results\\" 
-filesPathCoordenadas = ".\example\Workplanes\\"
-filesPathProcesados = ".\example\Results\pac_md\\"
-filePathsImagen = ".\example\Results\pac_md\\"
+# OS-neutral paths (Windows, Mac or Linux). They can also be set in the run configuration file (--config)
+filesPathData = os.path.join(".", "example", "Results", "")
+filesPathCoordenadas = os.path.join(".", "example", "Workplanes", "")
+filesPathProcesados = os.path.join(".", "example", "Results", "pac_md", "")
+filePathsImagen = os.path.join(".", "example", "Results", "pac_md", "")
 
- 
-# SO Mac or Linux
-#filesPathData = "./example/Results/"
-#filesPathCoordenadas = "./example/Workplanes/"
-#filesPathProcesados = "./example/Results/pac_md/"
-#filePathsImagen = "./example/Results/pac_md/"
-
-nombreCarpetaImagen = "images\\"
+nombreCarpetaImagen = os.path.join("images", "")
 
 # HEADERS && EXTENSIONS
 
@@ -51,11 +51,29 @@ procesadosFileReference = "procesados-"
 wpFileHeader = "results_"
 extensionCSV = ".csv"
 extensionPTS = ".pts"
+extensionResultados = ".npz"
+extensionesDefinicionSchedule = [".toml", ".json"] # rule-based schedule definitions (weekday hours, analysis periods, holidays, timestep), accepted besides the schedule csv files, see expandir_schedule
+anioSchedule = 2023 # year used for the weekdays of the rule-based schedules that do not set "anio"
+extensionesResultados = [".csv", ".ill", ".mtx", ".bin"] # accepted results files, in order of preference: csv, DAYSIM .ill and Radiance matrices (detected by their "#?RADIANCE" header)
+filasMatrizRadiance = "sensores" # what the rows of Radiance matrices are: "sensores" (dctimestep/rfluxmtx output, sensors x time steps) or "horas" (transposed, rmtxop -t)
+dcFileReference = "dc_" # daylight coefficient matrices (sensors x sky patches, rfluxmtx), dc_<parentID>_<resultID>.<ext>
+skyFileReference = "sky_" # sky matrices (sky patches x time steps, gendaymtx), sky_<parentID>_<skyID>.<ext> or sky_<skyID>.<ext> for every parentID
+extensionesMatrices = [".mtx", ".dmx", ".smx", ".bin"] # accepted extensions of the daylight coefficient and sky matrices
+separadorFuenteDC = "|" # joins the paths of the daylight coefficient and sky matrices of a computed results source
+matricesEnMemoria = 4 # daylight coefficient and sky matrices kept in memory per process, reused by the results sources that share them
+extensionesSalida = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather", "npz": ".npz"} # extension of the output tables, by format
+versionResultados = 2 # schema version of the output tables (procesados-*.npz and columnar metadata)
+archivoManifiesto = "manifiesto.jsonl" # manifest of the computed pairs, in the output folder
+versionManifiesto = 2 # schema version of the manifest entries
 
 ######  CONFIG PARAMETERS FOR GRAPHICS ######
 
 valorAlpha = 0.25
 markerSize = 15
+formatoImagen = "png" # image format: "png", "svg" or "pdf"
+dpiImagen = 800 # image resolution [dpi]
+modoMiniaturas = False # save only low resolution png images (dpiMiniaturas) in the "miniaturas" subfolder, for a quick review
+dpiMiniaturas = 72 # thumbnail resolution [dpi]
 
 
 # DA - DAYLIGHT AUTONOMY
@@ -103,9 +121,296 @@ no representa un porcentaje de tiempo correspondiente a una iluminancia objetivo
 '''
 cdiPorcentajeSensores = 0.5 # fraction of sensor to consider for analysis CDI
 scdiPorcentajeSensores = cdiPorcentajeSensores # fraction of sensor to consider for analysis sCDI
+cdiEscala = [0, 50, 100, 200, 300, 500, 750, 1000, 2000] # illuminance scale [lx], ascending. First value is the class below the second threshold
+#cdiEscala = list(range(0, 2025, 25)) # finer scale, every 25 lx
+
+# THRESHOLD PROFILES
+perfilesUmbrales = [] # named threshold sets evaluated in the same pass over each results file, e.g. [{"nombre": "LEED", "daIlumValue": 300}]. Empty: only the thresholds above
+
+# BATCH EVALUATION
+evaluacionPorLotes = True # evaluate all schedules of a parentID at once against each results file (same results as pair by pair)
+
+# BIT-PACKED THRESHOLD MASKS CACHE
+usarCacheMascaras = False # opt-in: keep, per results file, the packed threshold masks (one per threshold and CDI scale step) to re-score changed schedules without reading the results file. Off by default: the masks cover all hours and their cost grows with the CDI scale
+maximoMascarasPorResults = 8 # mask files (one per threshold set) kept per results file; the least recently used and those of older versions of the file are deleted
+carpetaCache = ".pac_md_cache" # cache folder, created inside the folder of each data file
+
+# BINARY CACHE OF PARSED INPUT FILES
+usarCacheCSV = True # keep parsed results, schedule and pts files as memory-mappable .npy in carpetaCache
+
+# STREAMING MODE
+modoStreaming = False # read results and schedule files in blocks of hours, for results files larger than the available memory
+presupuestoMemoriaMB = 512 # approximate memory per block [MB], sets the number of hours per block
+
+# TIME STEP
+pasoMinutos = None # time step of the results and schedule files [min]; None: inferred from the hour column of each schedule. Counts are kept in time steps and reported in hours
+
+# OCCUPIED-ILLUMINANCE INDEX
+guardarIndiceOcupado = False # save, per results/schedule pair, the sorted occupied illuminances (indice-*.npz) for threshold sweeps with barrido_umbrales
+
+# INCREMENTAL RUNS
+ejecucionIncremental = True # only compute the pairs whose results, schedule or thresholds changed since the last run (see archivoManifiesto)
+
+# WATCH MODE
+intervaloVigilancia = 30 # [s] time between two scans of filesPathData in watch mode (--vigilar)
+esperaEstabilidad = 60 # [s] a file is considered finished when it has not been modified for this time (and passes archivo_completo)
+filasEsperadas = None # expected rows (time steps) of the text results and schedule files in watch mode, None: not checked
+colaVigilancia = 64 # maximum number of new results files admitted to the calculation per watch cycle
+
+# OUTPUT FORMAT
+formatoSalida = "csv" # format of the per-sensor and unified tables: "csv", "parquet" or "feather" (require pyarrow, otherwise "npz" is used) or "npz"
+
+# PARALLEL EXECUTION
+procesosParalelos = 1 # number of worker processes for the results/schedule pairs (can be overridden with --workers N)
+
+# INSTRUMENTATION
+nivelDetalle = 1 # console output: 0 warnings and errors only, 1 progress, 2 detail (file lists, unified DataFrame). Can be set with --detalle
+archivoEventos = None # JSON-lines event log with the time of each stage (None: no log). Can be set with --eventos
 
 ######  FUNCTIONS DECLARATION   ######
 
+# ESTADO DE LA INSTRUMENTACIÓN DEL PROCESO: NIVEL DE DETALLE, REGISTRO DE EVENTOS, TIEMPOS POR ETAPA Y CONTADORES
+instrumentacion = {"nivel": nivelDetalle, "rutaEventos": archivoEventos, "archivo": None, "pid": None, "etapas": {}, "contadores": {}, "inicio": time.perf_counter()}
+
+def mensaje(*valores, nivel=1):
+    '''
+    - MENSAJE EN LA CONSOLA, DE ACUERDO AL NIVEL DE DETALLE CONFIGURADO -
+
+    Parámetros input
+        valores - los mismos argumentos de print
+        nivel - Elemento tipo entero, 0 advertencias y errores, 1 progreso, 2 detalle (ver nivelDetalle)
+    '''
+    if nivel <= instrumentacion["nivel"]:
+        print(*valores)
+    return 1
+
+def configurar_instrumentacion(nivel=None, rutaEventos=None, reiniciar=False):
+    '''
+    - CONFIGURACIÓN DEL NIVEL DE DETALLE Y DEL REGISTRO DE EVENTOS DEL PROCESO -
+
+    Se utiliza también como inicializador de los procesos de los ProcessPoolExecutor, para que hereden la configuración del proceso principal
+
+    Parámetros input
+        nivel - Elemento tipo entero, ver nivelDetalle. None conserva el actual
+        rutaEventos - Elemento tipo string, archivo JSON-lines de eventos. None conserva el actual
+        reiniciar - Elemento tipo booleano, vaciar los tiempos por etapa y los contadores
+    '''
+    if nivel is not None:
+        instrumentacion["nivel"] = nivel
+    if rutaEventos is not None:
+        instrumentacion["rutaEventos"] = rutaEventos
+    if reiniciar:
+        instrumentacion["etapas"] = {}
+        instrumentacion["contadores"] = {}
+        instrumentacion["inicio"] = time.perf_counter()
+    return 1
+
+def parametros_instrumentacion():
+    '''
+    - ARGUMENTOS DE configurar_instrumentacion PARA LOS PROCESOS DE UN ProcessPoolExecutor -
+    '''
+    return (instrumentacion["nivel"], instrumentacion["rutaEventos"], True)
+
+def registrar_evento(evento, **datos):
+    '''
+    - REGISTRO DE UN EVENTO EN EL ARCHIVO JSON-lines (archivoEventos o --eventos) -
+
+    Cada proceso abre el archivo en modo "append" y escribe una línea completa por evento, de modo que los procesos de un pool pueden
+    registrar eventos en el mismo archivo. Si no hay archivo configurado no se hace nada.
+    '''
+    if instrumentacion["rutaEventos"] is None:
+        return 0
+    if instrumentacion["archivo"] is None or instrumentacion["pid"] != os.getpid():
+        carpeta = os.path.dirname(instrumentacion["rutaEventos"])
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        instrumentacion["archivo"] = open(instrumentacion["rutaEventos"], "a", encoding="utf-8", buffering=1)
+        instrumentacion["pid"] = os.getpid()
+    linea = {"fecha": datetime.now().isoformat(timespec="milliseconds"), "pid": os.getpid(), "evento": evento}
+    linea.update(datos)
+    instrumentacion["archivo"].write(json.dumps(linea, default=valor_json) + "\n")
+    return 1
+
+def acumular_etapa(nombre, duracion, filas=0, llamadas=1):
+    '''
+    - SUMA DE UNA MEDICIÓN A LOS TIEMPOS POR ETAPA DEL PROCESO -
+    '''
+    etapa = instrumentacion["etapas"].setdefault(nombre, {"llamadas": 0, "tiempo": 0.0, "filas": 0})
+    etapa["llamadas"] += llamadas
+    etapa["tiempo"] += duracion
+    etapa["filas"] += int(filas)
+    return 1
+
+def contar(nombre, cantidad=1):
+    '''
+    - INCREMENTO DE UN CONTADOR (PARES CALCULADOS, IMÁGENES, ETC.) -
+    '''
+    instrumentacion["contadores"][nombre] = instrumentacion["contadores"].get(nombre, 0) + cantidad
+    return 1
+
+def filas_procesadas(argumentos, resultado):
+    '''
+    - CANTIDAD DE FILAS (PASOS DE TIEMPO O SENSORES) DE UNA ETAPA: LA DEL PRIMER ARGUMENTO O LA DEL RESULTADO QUE SEA UNA MATRIZ -
+    '''
+    for valor in (argumentos[0] if argumentos else None, resultado):
+        if hasattr(valor, "shape") and len(valor.shape) > 0:
+            return valor.shape[0]
+    return 0
+
+def instrumentar(nombre, filas=filas_procesadas):
+    '''
+    - DECORADOR QUE MIDE EL TIEMPO Y LAS FILAS PROCESADAS DE UNA FUNCIÓN -
+
+    Los tiempos se acumulan por etapa (ver resumen_instrumentacion) y, si hay archivo de eventos, se registra un evento por llamada. El
+    tiempo de una etapa incluye el de las etapas que se llaman desde ella (por ejemplo motor_cdi dentro de motor_metricas_lote).
+
+    Parámetros input
+        nombre - Elemento tipo string, nombre de la etapa ("lectura", "calculo.motor_cdi", ...)
+        filas - Elemento tipo función (argumentos, resultado) -> cantidad de filas procesadas, por defecto filas_procesadas
+    '''
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def funcion_instrumentada(*argumentos, **opciones):
+            inicio = time.perf_counter()
+            resultado = funcion(*argumentos, **opciones)
+            duracion = time.perf_counter() - inicio
+            cantidad = filas(argumentos, resultado)
+            acumular_etapa(nombre, duracion, cantidad)
+            if instrumentacion["rutaEventos"] is not None:
+                registrar_evento("etapa", etapa=nombre, duracion=duracion, filas=cantidad)
+            return resultado
+        return funcion_instrumentada
+    return decorador
+
+def ejecutar_instrumentado(funcion, *argumentos):
+    '''
+    - EJECUCIÓN DE UNA FUNCIÓN EN UN PROCESO DE UN POOL, DEVOLVIENDO TAMBIÉN SUS TIEMPOS POR ETAPA Y CONTADORES -
+
+    Parámetros output
+        resultado - valor devuelto por funcion
+        etapas, contadores - Elemento tipo diccionario, para sumarlos en el proceso principal con acumular_instrumentacion
+    '''
+    instrumentacion["etapas"] = {}
+    instrumentacion["contadores"] = {}
+    resultado = funcion(*argumentos)
+    return resultado, instrumentacion["etapas"], instrumentacion["contadores"]
+
+def acumular_instrumentacion(etapas, contadores):
+    '''
+    - SUMA DE LOS TIEMPOS POR ETAPA Y CONTADORES DE UN PROCESO DEL POOL A LOS DEL PROCESO PRINCIPAL -
+    '''
+    for nombre, etapa in etapas.items():
+        acumular_etapa(nombre, etapa["tiempo"], etapa["filas"], etapa["llamadas"])
+    for nombre, cantidad in contadores.items():
+        contar(nombre, cantidad)
+    return 1
+
+def memoria_pico_mb():
+    '''
+    - MEMORIA RESIDENTE MÁXIMA (RSS) DEL PROCESO PRINCIPAL Y DE LOS PROCESOS HIJOS FINALIZADOS [MB] -
+
+    Parámetros output
+        memoria - Elemento tipo diccionario {"proceso", "procesosHijos"}, con None si el sistema operativo no lo informa (Windows)
+    '''
+    try:
+        import resource
+    except ImportError:
+        return {"proceso": None, "procesosHijos": None}
+    # ru_maxrss SE INFORMA EN KB EN LINUX Y EN BYTES EN MAC
+    escala = 2**20 if platform.system() == "Darwin" else 2**10
+    return {
+            "proceso": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / escala,
+            "procesosHijos": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / escala
+        }
+
+def resumen_instrumentacion():
+    '''
+    - RESUMEN POR ETAPA DE LA EJECUCIÓN -
+
+    Parámetros output
+        resumen - Elemento tipo diccionario {"duracion", "etapas": {nombre: {"llamadas", "tiempo", "filas", "filasPorSegundo"}},
+        "contadores", "rssPicoMB": ver memoria_pico_mb}
+    '''
+    etapas = {}
+    for nombre, etapa in sorted(instrumentacion["etapas"].items()):
+        etapas[nombre] = dict(etapa, filasPorSegundo=etapa["filas"] / etapa["tiempo"] if etapa["tiempo"] > 0 else None)
+    resumen = {
+                "duracion": time.perf_counter() - instrumentacion["inicio"],
+                "etapas": etapas,
+                "contadores": dict(instrumentacion["contadores"]),
+                "rssPicoMB": memoria_pico_mb()
+            }
+    return resumen
+
+def imprimir_resumen(resumen):
+    '''
+    - TABLA DEL RESUMEN POR ETAPA EN LA CONSOLA Y EVENTO "resumen" EN EL ARCHIVO DE EVENTOS -
+    '''
+    registrar_evento("resumen", **resumen)
+    mensaje("\n#########   RESUMEN POR ETAPA    ######### \n")
+    mensaje(f"{'Etapa':<36}{'Llamadas':>10}{'Tiempo [s]':>12}{'Filas':>14}{'Filas/s':>14}")
+    for nombre, etapa in resumen["etapas"].items():
+        filasPorSegundo = f"{etapa['filasPorSegundo']:.0f}" if etapa["filasPorSegundo"] else "-"
+        mensaje(f"{nombre:<36}{etapa['llamadas']:>10}{etapa['tiempo']:>12.3f}{etapa['filas']:>14}{filasPorSegundo:>14}")
+    for nombre, cantidad in resumen["contadores"].items():
+        mensaje(f"{nombre}: {cantidad}")
+    rss = resumen["rssPicoMB"]
+    if rss["proceso"] is not None:
+        mensaje(f"Memoria RSS máxima: {rss['proceso']:.1f} MB (proceso principal), {rss['procesosHijos']:.1f} MB (procesos del pool)")
+    mensaje(f"Duración total: {resumen['duracion']:.3f} s\n")
+    return 1
+
+def iniciar_perfil(modo):
+    '''
+    - INICIO DEL PERFILADO OPCIONAL (--perfil cprofile|tracemalloc) DEL PROCESO PRINCIPAL -
+
+    Parámetros output
+        perfil - Elemento tipo cProfile.Profile en modo "cprofile", None en los demás casos
+    '''
+    if modo == "cprofile":
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
+        return perfil
+    if modo == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+    return None
+
+def finalizar_perfil(modo, perfil, carpetaSalida):
+    '''
+    - FIN DEL PERFILADO: SE GUARDA EN LA CARPETA DE SALIDA Y SE MUESTRAN LAS FUNCIONES O LÍNEAS PRINCIPALES -
+
+    Parámetros output
+        rutaPerfil - Elemento tipo string, archivo generado ("perfil.prof" para pstats/snakeviz, "perfil_memoria.txt"), o None
+    '''
+    if modo is None:
+        return None
+    os.makedirs(carpetaSalida, exist_ok=True)
+    if modo == "cprofile":
+        import pstats
+        perfil.disable()
+        rutaPerfil = os.path.join(carpetaSalida, "perfil.prof")
+        perfil.dump_stats(rutaPerfil)
+        texto = StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(25)
+    else:
+        import tracemalloc
+        actual, pico = tracemalloc.get_traced_memory()
+        lineas = tracemalloc.take_snapshot().statistics("lineno")[:25]
+        tracemalloc.stop()
+        rutaPerfil = os.path.join(carpetaSalida, "perfil_memoria.txt")
+        texto = StringIO()
+        texto.write(f"Memoria asignada (tracemalloc): actual {actual / 2**20:.1f} MB, pico {pico / 2**20:.1f} MB\n")
+        for linea in lineas:
+            texto.write(f"{linea}\n")
+        with open(rutaPerfil, "w", encoding="utf-8") as f:
+            f.write(texto.getvalue())
+    mensaje(texto.getvalue())
+    mensaje(f"Perfil guardado en {rutaPerfil}")
+    return rutaPerfil
+
+@instrumentar("descubrimiento", filas=lambda argumentos, resultado: len(resultado))
 def listar_archivos(ruta, fileNameReference, extension):
     ''' 
     - EXTACCIÓN DE NOMBRE DE ARCHIVOS DE UNA CARPETA -
@@ -125,7 +430,7 @@ def listar_archivos(ruta, fileNameReference, extension):
     listaRutas = []
 
     rutaDeBusqueda = ruta+fileNameReference+"*"+extension
-    print(f"Ruta de archivos {rutaDeBusqueda} \n")
+    mensaje(f"Ruta de archivos {rutaDeBusqueda} \n", nivel=2)
     listaArchivos = glob.glob(rutaDeBusqueda)
     listaArchivos.sort()  
     txtAux = ruta + fileNameReference
@@ -135,7 +440,7 @@ def listar_archivos(ruta, fileNameReference, extension):
         listaRutas.append(r[routePos:-(len(extension))])       
 
     listaCompleta = listaRutas
-    print(f"Lista de {fileNameReference} de archivos encontrados es: \n {listaCompleta}")
+    mensaje(f"Lista de {fileNameReference} de archivos encontrados es: \n {listaCompleta}", nivel=2)
     
     return listaCompleta
 
@@ -143,7 +448,7 @@ def split_filenames(lista):
     '''
     - EXTRACCIÓN DE IDENTIFICADOR DE LOS ARCHIVOS results Y schedule -
 
-    Se genera una lista de los ID de los archivos listados
+    Se genera una lista de los ID de los archivos listados. run_batch utiliza plan_pares, que lee la carpeta una sola vez
 
     Parámetos input
         lista - Estructura tipo diccionario {"resultados":[], "schedules":[]} la cual contiene los nombres de los archivos results y schedule a analizar, esta lista se genera
@@ -162,44 +467,31 @@ def split_filenames(lista):
     resultados = lista["resultados"]
     schedules = lista["schedules"]
     underScore = "_"
-    exten = ".csv"
-
-    rLista = []
-    sLista = []
 
-    # Separamos los "APELLIDOS" y los NOMBRES  de la lista de archivos a procesar y los guardamos en una lista
-    for r in resultados:
-        rLista.append(r.split(underScore))         
-    
-    for s in schedules:
-        sLista.append(s.split(underScore))       
-    
-    # Creamos una lista con elementos tipo diccionario con los pares apellido y nombre obtenidos en la lista anterior
+    # Separamos los "APELLIDOS" (hasta el primer "_") y los NOMBRES (el resto, que puede incluir otros "_"), ver patron_archivos
     rDict = []
     sDict = []
 
-    for elemento in rLista:
+    for r in resultados:
+        elemento = r.split(underScore, 1)
         rDict.append({"parentID": elemento[0], "childID": elemento[1]})
 
-    for elemento in sLista:
+    for s in schedules:
+        elemento = s.split(underScore, 1)
         sDict.append({"parentID": elemento[0], "childID": elemento[1]})
 
+    # SCHEDULES AGRUPADOS POR parentID CON UN ÚNICO RECORRIDO, SÓLO PARA LOS parentID DE LOS results
+    schedulesPorParent = {}
+    for elemento in sDict:
+        schedulesPorParent.setdefault(elemento["parentID"], []).append(str(elemento["childID"]))
+
     sIndex = {}
-    
-    #Se crean los key con los nombres de los "parentID en función de la lista de parentID de rDict"
     for row in rDict:
         if row["parentID"] not in sIndex:
-            sIndex[str(row["parentID"])] = []
-
-
-    for row in sIndex:
-        for elemento in sDict:
-            if elemento["parentID"] == row:
-                #sIndex[row].append(str(elemento["parentID"]+"_"+elemento["childID"]))
-                sIndex[row].append(str(elemento["childID"]))
+            sIndex[str(row["parentID"])] = schedulesPorParent.get(row["parentID"], [])
 
-    print("Schedules Index")
-    print(sIndex)    
+    mensaje("Schedules Index", nivel=2)
+    mensaje(sIndex, nivel=2)    
         
     return rDict, sDict, sIndex
 
@@ -227,7 +519,191 @@ def count_ocurrencies(lista, indice):
             counts[str(row[indice])] += 1
     return counts
 
-def daylight_autonomy(daIlumValue, dmcNsensors, dmcCondicion, dmcRows, dmcRealHours, dfResultados):    
+def cantidad_minima(valorReferencia, porcentaje):
+    '''
+    - CANTIDAD MÍNIMA CORRESPONDIENTE A UN PORCENTAJE -
+
+    Redondeo hacia arriba de valorReferencia * porcentaje, tal como se aplica para obtener las horas (sDA, sUDI) o sensores (UDI) a considerar
+
+    Parámetros input
+        valorReferencia - Elemento tipo entero o float, cantidad total de horas o sensores
+        porcentaje - Elemento tipo float, fracción a considerar (0.5 = 50 %)
+
+    Parámetros output
+        cantidad - Elemento tipo entero, cantidad mínima de horas o sensores
+    '''
+    referencia = valorReferencia * porcentaje
+    condicion = referencia - int(referencia)
+
+    if (condicion) > 0:
+        cantidad = int(referencia) + 1
+    else:
+        cantidad = int(referencia)
+
+    return cantidad
+
+def suma_secuencial(valores):
+    '''
+    - SUMA ACUMULADA EN EL MISMO ORDEN QUE EL RECORRIDO POR SENSOR -
+
+    np.sum utiliza suma por pares, lo que puede diferir en el último decimal respecto a sumar sensor por sensor. np.cumsum suma en orden,
+    por lo que los promedios coinciden exactamente con los valores históricos de PAC-MD.
+    '''
+    if len(valores) == 0:
+        return 0.0
+    return np.cumsum(valores)[-1]
+
+def agregar_metricas(daIlumHoursCount, sdaIlumSensorCount, udiIlumHoursCount, sudiIlumSensorCount, dmcRealHours, sdaPorcentajeHoras, sudiPorcentajeHoras, dmcRows):
+    '''
+    - CÁLCULO DE DA, sDA, UDI Y sUDI A PARTIR DE LOS CONTEOS DE HORAS POR SENSOR -
+
+    Es el paso común a todos los motores de cálculo: cualquiera sea la forma de contar las horas que cumplen cada umbral (máscaras, índice
+    ordenado, productos matriciales, etc.), los porcentajes y promedios se obtienen aquí, de la misma forma.
+
+    Parámetros input
+        daIlumHoursCount - Elemento tipo numpy array (Sensores), horas ocupadas con iluminancia >= daIlumValue
+        sdaIlumSensorCount - Elemento tipo numpy array (Sensores), horas ocupadas con iluminancia >= sdaIlumValue
+        udiIlumHoursCount - Elemento tipo numpy array (Sensores), horas ocupadas con iluminancia entre udiIlumMin y udiIlumMax
+        sudiIlumSensorCount - Elemento tipo numpy array (Sensores), horas ocupadas con iluminancia entre sudiIlumMin y sudiIlumMax
+        dmcRealHours - Elemento tipo entero, cantidad de horas reales a considerar de acuerdo a la ocupacion y periodoAnalisis
+        sdaPorcentajeHoras, sudiPorcentajeHoras - Fracción de horas a considerar para sDA y sUDI
+        dmcRows - Elemento tipo entero, cantidad de filas analizadas
+
+    Parámetros output
+        metricas - Elemento tipo diccionario, con los mismos nombres de variables que devuelven daylight_autonomy,
+        spatial_daylight_autonomy y useful_daylight_index
+    '''
+    daIlumHoursCount = np.asarray(daIlumHoursCount, dtype=float)
+    sdaIlumSensorCount = np.asarray(sdaIlumSensorCount, dtype=float)
+    udiIlumHoursCount = np.asarray(udiIlumHoursCount, dtype=float)
+    sudiIlumSensorCount = np.asarray(sudiIlumSensorCount, dtype=float)
+    dmcNsensors = len(daIlumHoursCount)
+
+    # DA
+    daOcurranceRate = (daIlumHoursCount * 100) / dmcRealHours
+    daAverageOcurranceRate = suma_secuencial(daOcurranceRate)/dmcNsensors
+
+    # sDA
+    sdaQttyHoras = cantidad_minima(dmcRealHours, sdaPorcentajeHoras)
+    sdaOccurrancePercentSensor = (sdaIlumSensorCount >= sdaQttyHoras).astype(float)
+    sdaOcurranceAllSensors = suma_secuencial(sdaOccurrancePercentSensor)
+    sdaAnualOccurranceRate = sdaOcurranceAllSensors*100/dmcNsensors
+
+    # UDI
+    udiOcurranceRate = (udiIlumHoursCount * 100) / dmcRealHours
+    udiAverageOcurranceRate = suma_secuencial(udiOcurranceRate)/dmcNsensors
+    udiHours = suma_secuencial(udiIlumHoursCount)
+
+    # sUDI
+    sudiQttyHoras = cantidad_minima(dmcRealHours, sudiPorcentajeHoras)
+    sudiOccurrancePercentSensor = (sudiIlumSensorCount >= sudiQttyHoras).astype(float)
+    sUDIhoras = suma_secuencial(sudiOccurrancePercentSensor)
+    sUDI = sUDIhoras * 100 / dmcNsensors
+
+    metricas = {
+                "dmcRows": dmcRows,
+                "dmcNsensors": dmcNsensors,
+                "dmcRealHours": dmcRealHours,
+                "daIlumHoursCount": daIlumHoursCount,
+                "daOcurranceRate": daOcurranceRate,
+                "daAverageOcurranceRate": daAverageOcurranceRate,
+                "sdaQttyHoras": sdaQttyHoras,
+                "sdaIlumSensorCount": sdaIlumSensorCount,
+                "sdaOccurrancePercentSensor": sdaOccurrancePercentSensor,
+                "sdaAnualOccurranceRate": sdaAnualOccurranceRate,
+                "sdaOcurranceAllSensors": sdaOcurranceAllSensors,
+                "udiIlumHoursCount": udiIlumHoursCount,
+                "udiOcurranceRate": udiOcurranceRate,
+                "udiAverageOcurranceRate": udiAverageOcurranceRate,
+                "udiHours": udiHours,
+                "sudiQttyHoras": sudiQttyHoras,
+                "sudiIlumSensorCount": sudiIlumSensorCount,
+                "sudiOccurrancePercentSensor": sudiOccurrancePercentSensor,
+                "sUDIhoras": sUDIhoras,
+                "sUDI": sUDI
+            }
+
+    return metricas
+
+@instrumentar("calculo.compactar_ocupadas", filas=lambda argumentos, resultado: resultado[0].shape[0])
+def compactar_ocupadas(matrizIluminancia, listaCondiciones):
+    '''
+    - MATRIZ DE ILUMINANCIAS COMPACTADA A LAS HORAS OCUPADAS DE UNO O VARIOS SCHEDULES -
+
+    Las horas que no cumplen la condición de ocupación y período de análisis en ningún schedule no aportan a ninguna métrica, por lo que
+    se descartan una única vez, con un índice de filas, antes de calcular las máscaras de umbral. Si la matriz está mapeada en memoria
+    (cache .npy, matrices binarias de Radiance) sólo se leen las filas ocupadas; si todas las horas están ocupadas no se copia.
+
+    Parámetros input
+        matrizIluminancia - Elemento tipo numpy array (Horas x Sensores)
+        listaCondiciones - Elemento tipo lista con K vectores (Horas) de valores 0 ó 1, obtenidos de dmc_condicion_and_realHours
+
+    Parámetros output
+        bloqueOcupado - Elemento tipo numpy array (Horas ocupadas en algún schedule x Sensores)
+        condicionesOcupadas - Elemento tipo lista con K vectores booleanos (Horas ocupadas en algún schedule)
+        listaRows - Elemento tipo lista con K enteros, cantidad de filas analizadas de cada schedule
+    '''
+    matriz = np.asarray(matrizIluminancia)
+    nHoras = matriz.shape[0]
+
+    ocupadas = np.zeros((len(listaCondiciones), nHoras), dtype=bool)
+    listaRows = []
+    for k, vectorCondicion in enumerate(listaCondiciones):
+        condicion = np.asarray(vectorCondicion)
+        filas = min(nHoras, condicion.shape[0])
+        ocupadas[k, :filas] = (condicion[:filas] == 1)
+        listaRows.append(filas)
+
+    filasOcupadas = np.flatnonzero(ocupadas.any(axis=0))
+    if len(filasOcupadas) == nHoras:
+        return matriz, list(ocupadas), listaRows
+    return matriz[filasOcupadas], list(ocupadas[:, filasOcupadas]), listaRows
+
+@instrumentar("calculo.motor_metricas_dinamicas")
+def motor_metricas_dinamicas(matrizIluminancia, vectorCondicion, dmcRealHours, daIlumValue, sdaIlumValue, sdaPorcentajeHoras, udiIlumMin, udiIlumMax, sudiIlumMin, sudiIlumMax, sudiPorcentajeHoras, dmcRows=None):
+    '''
+    - MOTOR VECTORIZADO DE MÉTRICAS DINÁMICAS: DA, sDA, UDI Y sUDI -
+
+    Se construyen una única vez las máscaras de umbral (Horas x Sensores) y se obtienen los conteos por sensor mediante reducciones por columna,
+    reemplazando el recorrido sensor por sensor de daylight_autonomy, spatial_daylight_autonomy y useful_daylight_index. Si los umbrales de sDA
+    y sUDI coinciden con los de DA y UDI, las máscaras se reutilizan.
+
+    Parámetros input
+        matrizIluminancia - Elemento tipo numpy array (Horas x Sensores) con los valores de iluminancia de todos los sensores
+        vectorCondicion - Elemento tipo numpy array (Horas), valores 0 ó 1 obtenidos de dmc_condicion_and_realHours
+        dmcRealHours - Elemento tipo entero, cantidad de horas reales a considerar de acuerdo a la ocupacion y periodoAnalisis
+        daIlumValue, sdaIlumValue - Umbrales [lx] de DA y sDA
+        sdaPorcentajeHoras - Fracción de horas a considerar para sDA
+        udiIlumMin, udiIlumMax, sudiIlumMin, sudiIlumMax - Límites [lx] de UDI y sUDI
+        sudiPorcentajeHoras - Fracción de horas a considerar para sUDI
+        dmcRows - Elemento tipo entero, filas analizadas si matrizIluminancia ya está compactada a las horas ocupadas (compactar_ocupadas),
+        en ese caso vectorCondicion no se utiliza. Por defecto la matriz se compacta aquí
+
+    Parámetros output
+        metricas - Elemento tipo diccionario, ver agregar_metricas
+    '''
+    if dmcRows is None:
+        matriz, _, listaRows = compactar_ocupadas(matrizIluminancia, [vectorCondicion])
+        dmcRows = listaRows[0]
+    else:
+        matriz = np.asarray(matrizIluminancia)
+
+    # MÁSCARAS DE UMBRAL SOBRE LAS HORAS OCUPADAS, SE CALCULAN UNA SOLA VEZ
+    daIlumHoursCount = np.count_nonzero(matriz >= daIlumValue, axis=0)
+    if sdaIlumValue == daIlumValue:
+        sdaIlumSensorCount = daIlumHoursCount
+    else:
+        sdaIlumSensorCount = np.count_nonzero(matriz >= sdaIlumValue, axis=0)
+
+    udiIlumHoursCount = np.count_nonzero((matriz >= udiIlumMin) & (matriz <= udiIlumMax), axis=0)
+    if (sudiIlumMin == udiIlumMin) and (sudiIlumMax == udiIlumMax):
+        sudiIlumSensorCount = udiIlumHoursCount
+    else:
+        sudiIlumSensorCount = np.count_nonzero((matriz >= sudiIlumMin) & (matriz <= sudiIlumMax), axis=0)
+
+    return agregar_metricas(daIlumHoursCount, sdaIlumSensorCount, udiIlumHoursCount, sudiIlumSensorCount, dmcRealHours, sdaPorcentajeHoras, sudiPorcentajeHoras, dmcRows)
+
+def daylight_autonomy(daIlumValue, dmcNsensors, dmcCondicion, dmcRows, dmcRealHours, dfResultados):
     '''
     - DAYLIGHT AUTONOMY -
 
@@ -235,131 +711,62 @@ def daylight_autonomy(daIlumValue, dmcNsensors, dmcCondicion, dmcRows, dmcRealHo
 
     CALCULO DE CANTIDAD DE HORAS QUE TIENEN UN VALOR SUPERIOR A daIlumValue = 300 Y CUMPLEN CON LA CONDICIÓN DE ocupacion Y periodoAnalisis
 
-    SE REALIZA EL CALCULO POR SENSOR
+    SE REALIZA EL CALCULO POR SENSOR, A TRAVÉS DE motor_metricas_dinamicas
 
     Parámetos input
-        daIlumValue - Elemento tipo entero, indica el mínimo valor de medición de sensor 
+        daIlumValue - Elemento tipo entero, indica el mínimo valor de medición de sensor
 
     Parámetros output
-        daIlumHoursCount - Elemento tipo lista, cada elemento indica la cantidad de horas anuales en las que el sensor analizado supera el valor mínimo indicado en la variable daIlumValue y 
+        daIlumHoursCount - Elemento tipo lista, cada elemento indica la cantidad de horas anuales en las que el sensor analizado supera el valor mínimo indicado en la variable daIlumValue y
         cumple con las condiciones de ocupación y período de análisis
         daOcurranceRate - Elemento tipo lista, cada valor indica el porcentaje entre daIlumHoursCount y las horas reales de análisis por cada sensor
         daAverageOcurranceRate - Elemento tipo float con el valor promedio (%) entre daOcurranceRate y la cantidad de sensores
 
     '''
+    metricas = motor_metricas_dinamicas(dfResultados, dmcCondicion['condicion'], dmcRealHours, daIlumValue, sdaIlumValue, sdaPorcentajeHoras, udiIlumMin, udiIlumMax, sudiIlumMin, sudiIlumMax, sudiPorcentajeHoras)
+    mensaje(f"La cantidad de sensores son: {dmcNsensors}")
 
-    daIlumHoursCount = np.zeros(dmcNsensors)
-    daOcurranceRate = np.zeros(dmcNsensors)
-    daAux = 0
-
-    dfIlumHoursCount = dfResultados.copy()
-    dfIlumHoursCount[:] = 0
-
-    for sensor in range(dfIlumHoursCount.shape[1]):
-        dfIlumHoursCount.loc[((dfResultados[sensor] >= daIlumValue) & (dmcCondicion['condicion'] == 1)), sensor] = 1
-        daIlumHoursCount[sensor]= dfIlumHoursCount[sensor].sum()
-        daOcurranceRate[sensor] = (daIlumHoursCount[sensor] * 100) / dmcRealHours
-        daAux = daAux + daOcurranceRate[sensor]
-
-    daAverageOcurranceRate = daAux/dmcNsensors
-    print(f"La cantidad de sensores son: {dmcNsensors}")
+    return metricas["daIlumHoursCount"], metricas["daOcurranceRate"], metricas["daAverageOcurranceRate"]
 
-    return daIlumHoursCount, daOcurranceRate, daAverageOcurranceRate
-
-def useful_daylight_index(udiIlumMin, udiIlumMax, dmcNsensors, dmcRealHours, dmcRows, dfResultados):
-    ''' 
+def useful_daylight_index(udiIlumMin, udiIlumMax, dmcNsensors, dmcRealHours, dmcRows, dfResultados, dmcCondicion):
+    '''
     - USEFUL DAYLIGHT INDEX AND sUDI-
 
     CALCULO DE CANTIDAD DE HORAS QUE TIENEN UN VALOR COMPRENDIDO ENTRE UN MÍNIMO Y UN MÁXIMO Y CUMPLEN CON LA CONDICIÓN DE ocupacion Y periodoAnalisis
-    SE REALIZA EL CALCULO POR SENSOR
+    SE REALIZA EL CALCULO POR SENSOR, A TRAVÉS DE motor_metricas_dinamicas
 
     Parámetros input
         udiIlumMin - Elemento tipo entero, india el mínimo valor de medición de sensor
         udiIlumMax - Elemento tipo entero, india el máximo valor de medición de sensor
         dmcNsensors - Elemento tipo entero, indica cantidad de sensores
         dmcRealHours - Elemento tipo entero, cantidad de horas a considerar
-        dfResultados - Elemento tipo lista con los valores de medición de todos los sensores 
+        dfResultados - Elemento tipo lista con los valores de medición de todos los sensores
+        dmcCondicion - Elemento tipo Pandas DataFrame, obtenido de dmc_condicion_and_realHours
 
     Parámetros output
-        udiIlumHoursCount - Cantidad de horas anuales en las que el sensor analizado se encuentra comprendido entre los valores 
+        udiIlumHoursCount - Cantidad de horas anuales en las que el sensor analizado se encuentra comprendido entre los valores
         establecidoes entre un mínimo udiIlumMin y un valor maximo udiIlumMax y cumple con las condiciones de ocupación y período de análisis
         udiOcurranceRate - Elemento tipo float con el valor promedio (%) entre udiIlumHoursCount y las horas reales de análisis
 
     '''
-    udiIlumHoursCount = np.zeros(dmcNsensors)
-    udiOcurranceRate = np.zeros(dmcNsensors)
-    sudiIlumSensorCount = np.zeros(dmcNsensors)
-    sudiOccurrancePercentSensor = np.zeros(dmcNsensors)
-    udiAux = 0
-    udiHours = 0
-    udiQttySensor = 0
-    sudiQttyHoras = 0
-    sUDIhoras = 0
-    sUDI = 0
-
-    # DETERMIANR LA CANTIDAD DE SENSORES CORRESPONDIENTE AL PORCETAJE SELECCIONADO
-    udiSensors = dmcNsensors*udiPorcentajeSensores
-    condicionSensores = udiSensors - int(udiSensors)
-        
-    if (condicionSensores) > 0:
-        udiQttySensor = int(udiSensors) + 1 
-    else:
-        udiQttySensor = int(udiSensors)
-
-    dfudiIlumHoursCount = dfResultados.copy()
-    dfudiIlumHoursCount[:] = 0
-
-    for sensor in range(dfudiIlumHoursCount.shape[1]):
-        dfudiIlumHoursCount.loc[((dfResultados[sensor] >= udiIlumMin) & (dfResultados[sensor] <= udiIlumMax) & (dmcCondicion["condicion"] == 1)), sensor ] = 1
-        udiIlumHoursCount[sensor] = dfudiIlumHoursCount[sensor].sum()    
-        udiOcurranceRate[sensor] = (udiIlumHoursCount[sensor] * 100) / dmcRealHours
-        udiAux = udiAux + udiOcurranceRate[sensor]
-        udiHours= udiHours + udiIlumHoursCount[sensor] # calculo de horas totales que cumplen con el rango seleccionado
-    
-    #       CALCULO DE sUDI          #
-    # DETERMIANR LA CANTIDAD DE HORAS CORRESPONDIENTE AL PORCETAJE SELECCIONADO
-    sudiHoursReference = dmcRealHours*sudiPorcentajeHoras
-    condicionHoras = sudiHoursReference - int(sudiHoursReference)
-        
-    if (condicionHoras) > 0:
-        sudiQttyHoras = int(sudiHoursReference) + 1 
-    else:
-        sudiQttyHoras = int(sudiHoursReference)
+    metricas = motor_metricas_dinamicas(dfResultados, dmcCondicion['condicion'], dmcRealHours, daIlumValue, sdaIlumValue, sdaPorcentajeHoras, udiIlumMin, udiIlumMax, sudiIlumMin, sudiIlumMax, sudiPorcentajeHoras)
 
-    dfsudiIlumSensorCount = dfResultados.copy()
-    dfsudiIlumSensorCount[:] = 0
+    mensaje(f"sUDI - Limite inferior [lx]: {sudiIlumMin}, Limite superior [lx]: {sudiIlumMax}")
+    mensaje(f"sUDI - Horas simuladas: {dmcRealHours}, Horas considedradas: {metricas['sudiQttyHoras']}")
+    mensaje(f"sUDI - Horas que cumplen la condicion del {(udiPorcentajeSensores*100)}: {metricas['sUDIhoras']}")
 
-    for sensor in range(dfsudiIlumSensorCount.shape[1]):    
-        dfsudiIlumSensorCount.loc[((dfResultados[sensor] >= sudiIlumMin) & (dfResultados[sensor] <= sudiIlumMax) & (dmcCondicion['condicion'] == 1)), sensor] = 1
-        sudiIlumSensorCount[sensor] = dfsudiIlumSensorCount[sensor].sum()
-
-        if sudiIlumSensorCount[sensor] >= sudiQttyHoras: # considera solo los casos en donde la cantidad de sensores es igual o mayor a la deseada
-            sudiOccurrancePercentSensor[sensor] = 1
-        else:
-            sudiOccurrancePercentSensor[sensor] = 0
-
-        sUDIhoras = sUDIhoras + sudiOccurrancePercentSensor[sensor]
-    sUDI = sUDIhoras * 100 / dmcNsensors
-    #       FIN CALCULO DE sUDI          #
-
-    udiAverageOcurranceRate = udiAux/dmcNsensors
-
-    print(f"sUDI - Limite inferior [lx]: {sudiIlumMin}, Limite superior [lx]: {sudiIlumMax}")
-    print(f"sUDI - Horas simuladas: {dmcRealHours}, Horas considedradas: {sudiQttyHoras}")
-    print(f"sUDI - Horas que cumplen la condicion del {(udiPorcentajeSensores*100)}: {sUDIhoras}")
-
-    return udiIlumHoursCount, udiOcurranceRate, udiAverageOcurranceRate, udiHours, sUDI, sUDIhoras, sudiIlumSensorCount, sudiOccurrancePercentSensor
+    return metricas["udiIlumHoursCount"], metricas["udiOcurranceRate"], metricas["udiAverageOcurranceRate"], metricas["udiHours"], metricas["sUDI"], metricas["sUDIhoras"], metricas["sudiIlumSensorCount"], metricas["sudiOccurrancePercentSensor"]
 
 def spatial_daylight_autonomy(sdaIlumValue, dmcNsensors, dmcRealHours, dmcCondicion, dfResultados):
-    ''' 
+    '''
     - SPATIAL DAYLIGHT AUTONOMY -
     CALCULO POR HORA DE LA CANTIDAD DE HORAS QUE EL SENSOR ANALIZADO TIENE UN VALOR MEDIDO SUPERIOR O IGUAL A UN MINIMO Y CUMPLEN CON LA CONDICIÓN DE ocupacion Y periodoAnalisis
 
-    SE REALIZA EL ANÁLISIS PARA LAS HORAS ANUALES Y PARA TODOS LOS SENSORES DEL ARCHIVO ANALIZADO
+    SE REALIZA EL ANÁLISIS PARA LAS HORAS ANUALES Y PARA TODOS LOS SENSORES DEL ARCHIVO ANALIZADO, A TRAVÉS DE motor_metricas_dinamicas
 
     Parámetros Input
         sdaIlumValue - Elemento tipo entero, indica el mínimo valor de medición de sensor
-        dmcCondicion - Elemento tipo lista, indica si la hora analizada debe tenerse en cuenta o no, surge de analizar las condiciones de hora de uso y periodo del año analizado, 
+        dmcCondicion - Elemento tipo lista, indica si la hora analizada debe tenerse en cuenta o no, surge de analizar las condiciones de hora de uso y periodo del año analizado,
             tiene la misma longitud de dfResultados
         dmcRealHours - Elemento tipo entero, cantidad de horas de análisis, será afectado por el porcentaje de horas a considerar
         dmcNsensors - Elemento tipo entero, cantidad de horas a considerar
@@ -369,43 +776,16 @@ def spatial_daylight_autonomy(sdaIlumValue, dmcNsensors, dmcRealHours, dmcCondic
         sdaIlumSensorCount - Elemento tipo lista con la cantidad de sensores que superan el valor mínimo establecido y cumplen con las condiciones de ocupación y período de análisis por hora analizada
         sdaOccurrancePercentSensor - Elemento tipo lista, se indica si en la Hora analizada la cantidad de sensores contabilizados es igual o mayor a la totalidad de los mismos
         sdaAnualOccurranceRate - Elemento tipo float con el valor promedio (%) de "sdaOccurrancePercentSensor" con respecto a la cantidad total de horas analizadas
-        sdaOcurranceAllSensors - type int. How many sensor comply with hours condition  
+        sdaOcurranceAllSensors - type int. How many sensor comply with hours condition
     '''
-    sdaIlumHoursCount = np.zeros(dmcNsensors)
-    sdaOccurrancePercentSensor = np.zeros(dmcNsensors)
-    sdaQttyHoras = 0
-    sdaOcurranceAllSensors = 0
-
-    # DETERMINAR LA CANTIDAD DE HORAS A CONSIDERAR
-    sdaHoras = dmcRealHours * sdaPorcentajeHoras
-    condicionHoras = sdaHoras - int(sdaHoras)
-    
-    if (condicionHoras) > 0:
-        sdaQttyHoras = int(sdaHoras) + 1 
-    else:
-        sdaQttyHoras = int(sdaHoras)
-
-    print (f"sDA - Horas de análisis: {dmcRealHours}, Horas consideradas: {sdaQttyHoras}")
-
-    dfsdaIlumHoursCount = dfResultados.copy()
-    dfsdaIlumHoursCount[:] = 0
-
-    for sensor in range(dfsdaIlumHoursCount.shape[1]):    
-        dfsdaIlumHoursCount.loc[(dfResultados[sensor] >= sdaIlumValue) & (dmcCondicion["condicion"] == 1), sensor] = 1
-        sdaIlumHoursCount[sensor] = dfsdaIlumHoursCount[sensor].sum()
-
-        if sdaIlumHoursCount[sensor] >= sdaQttyHoras: # considera solo los casos en donde la cantidad de sensores es igual o mayor a la deseada
-            sdaOccurrancePercentSensor[sensor] = 1
-        else:
-            sdaOccurrancePercentSensor[sensor] = 0
-
-        sdaOcurranceAllSensors = sdaOcurranceAllSensors + sdaOccurrancePercentSensor[sensor] # how many sensor comply with hours condition        
+    metricas = motor_metricas_dinamicas(dfResultados, dmcCondicion['condicion'], dmcRealHours, daIlumValue, sdaIlumValue, sdaPorcentajeHoras, udiIlumMin, udiIlumMax, sudiIlumMin, sudiIlumMax, sudiPorcentajeHoras)
 
-    print(f"sDA - Sensores con cumplimiento del {(sdaPorcentajeHoras*100)}%: {sdaOcurranceAllSensors}\n")
-    sdaAnualOccurranceRate = sdaOcurranceAllSensors*100/dmcNsensors
+    mensaje(f"sDA - Horas de análisis: {dmcRealHours}, Horas consideradas: {metricas['sdaQttyHoras']}")
+    mensaje(f"sDA - Sensores con cumplimiento del {(sdaPorcentajeHoras*100)}%: {metricas['sdaOcurranceAllSensors']}\n")
 
-    return sdaIlumHoursCount, sdaOccurrancePercentSensor, sdaAnualOccurranceRate, sdaOcurranceAllSensors
+    return metricas["sdaIlumSensorCount"], metricas["sdaOccurrancePercentSensor"], metricas["sdaAnualOccurranceRate"], metricas["sdaOcurranceAllSensors"]
 
+@instrumentar("condiciones")
 def dmc_condicion_and_realHours(dfCondiciones, dmcRows):
     '''
     - CALCULO DE LAS CONDICIONES Y LAS CANTIDADES DE HORAS REALES - 
@@ -428,175 +808,2271 @@ def dmc_condicion_and_realHours(dfCondiciones, dmcRows):
 
     return dmcCondicion, dmcRealHours
 
-def get_cdi_index(dmcNsensors, dmcRows, dmcRealHours, dmcCondicion, dfResultados):
+def etiqueta_cdi(valorEscala):
     '''
-    - CALCULO DE PARÁMETRO CDI
-    Escala de valores de iluminancia: 0lx, 50lx, 100lx, 200lx, 300lx, 500lx, 750lx, 1000lx, 2000lx
+    - ETIQUETA DE UN VALOR DE LA ESCALA CDI -
 
-    Parámetros Input
-        dmcNsensors -  cantida de sensores 
-        dmcRealHours - cantidad de horas a considerar 
-        dmcCondicion - condición de ocupación, y horas a considerar
-        dfResultados - dataFrame con los valores de iluminancia de todos los sensores a analizar
+    Convierte un valor de la escala de iluminancias en la etiqueta utilizada en sCDI y en los archivos de salida (50 -> "50lx", 12.5 -> "12.5lx")
+    '''
+    return f"{valorEscala:g}lx"
 
-    Parámetros Output
-        cdiValues - dataframe, valor de máxima iluminancia por sensor, segun escala
-        sCDIvalues - porcentaje de sensores para cada rango de la escala indicada
+def conteo_minimo_porcentaje(dmcRealHours, porcentaje):
+    '''
+    - CANTIDAD MÍNIMA DE HORAS PARA ALCANZAR UN PORCENTAJE DE LAS HORAS REALES -
+
+    Menor cantidad entera de horas "m" tal que m * 100 / dmcRealHours >= porcentaje. Se evalúa la misma expresión en punto flotante
+    que se utiliza para comparar cada sensor, por lo que el resultado es idéntico a comparar hora por hora.
+
+    Parámetros input
+        dmcRealHours - Elemento tipo entero o float, cantidad de horas reales a considerar
+        porcentaje - Elemento tipo float, porcentaje (0-100) a alcanzar
+
+    Parámetros output
+        m - Elemento tipo entero, puede ser mayor a dmcRealHours si el porcentaje no se puede alcanzar
+    '''
+    if dmcRealHours <= 0:
+        # SIN HORAS OCUPADAS NINGÚN SENSOR ALCANZA EL PORCENTAJE (HORA POR HORA, 0 * 100 / 0 NO ES >= porcentaje): CLASE MÁS BAJA DEL CDI
+        return 1
+
+    m = max(int(np.ceil(porcentaje * dmcRealHours / 100)) - 1, 0)
+    while (m * 100 / dmcRealHours) < porcentaje:
+        m += 1
+
+    return m
+
+def clases_cdi(iluminanciaReferencia, cdiEscala):
+    '''
+    - CLASIFICACIÓN DE SENSORES SEGÚN LA ESCALA CDI -
+
+    Parámetros input
+        iluminanciaReferencia - Elemento tipo numpy array (Sensores), iluminancia superada por cada sensor durante el porcentaje de horas requerido
+        cdiEscala - Elemento tipo lista, escala de iluminancias ordenada de forma ascendente
+
+    Parámetros output
+        indiceClase - Elemento tipo numpy array (Sensores), posición en cdiEscala de la clase asignada a cada sensor
+    '''
+    escala = np.asarray(cdiEscala, dtype=float)
+    indiceClase = np.searchsorted(escala, iluminanciaReferencia, side='right') - 1
+
+    return np.clip(indiceClase, 0, len(escala) - 1)
+
+def iluminancia_percentil_ocupado(bloqueOcupado, horasRequeridas):
+    '''
+    - ILUMINANCIA SUPERADA DURANTE UNA CANTIDAD DE HORAS POR SENSOR -
+
+    Devuelve, por sensor, el valor de iluminancia que ocupa la posición "horasRequeridas" al ordenar de mayor a menor las horas ocupadas.
+    Un sensor supera un umbral durante al menos horasRequeridas horas si y sólo si este valor es mayor o igual al umbral, por lo que
+    el histograma acumulado de cualquier escala se resuelve con una única búsqueda binaria sobre este vector.
+
+    Parámetros input
+        bloqueOcupado - Elemento tipo numpy array (Horas ocupadas x Sensores)
+        horasRequeridas - Elemento tipo entero, obtenido con conteo_minimo_porcentaje
+
+    Parámetros output
+        iluminanciaReferencia - Elemento tipo numpy array (Sensores). +inf si horasRequeridas es 0, -inf si supera las horas ocupadas
+    '''
+    nHoras, nSensores = bloqueOcupado.shape
+
+    if horasRequeridas <= 0:
+        return np.full(nSensores, np.inf)
+    if horasRequeridas > nHoras:
+        return np.full(nSensores, -np.inf)
+
+    posicion = nHoras - horasRequeridas
+    return np.partition(bloqueOcupado, posicion, axis=0)[posicion]
+
+def resumen_scdi(indiceClase, cdiEscala, dmcNsensors, cdiPorcentajeSensores):
+    '''
+    - CÁLCULO DE sCDI Y CDI DEL ESPACIO A PARTIR DE LA CLASE DE CADA SENSOR -
 
+    Parámetros input
+        indiceClase - Elemento tipo numpy array (Sensores), obtenido con clases_cdi
+        cdiEscala - Elemento tipo lista, escala de iluminancias
+        dmcNsensors - Elemento tipo entero, cantidad de sensores
+        cdiPorcentajeSensores - Elemento tipo float, fracción de sensores a considerar
+
+    Parámetros output
+        sCDIvalues - Elemento tipo diccionario, porcentaje de sensores para cada valor de la escala, por ejemplo {"0lx": 0.0, "50lx": 1.67, ...}
+        cdi - Elemento tipo string, etiqueta de la clase en la que se alcanza el porcentaje de sensores indicado
+        sCDIconteo - Elemento tipo diccionario, cantidad de sensores para cada valor de la escala
     '''
-    cdiMenor50 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor50 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor100 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor200 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor300 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor500 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor750 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor1000 = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor2000 = np.zeros(dmcNsensors, dtype=float)
-
-    cdiMenor50Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor50Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor100Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor200Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor300Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor500Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor750Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor1000Aux = np.zeros(dmcNsensors, dtype=float)
-    cdiMayor2000Aux = np.zeros(dmcNsensors, dtype=float)
-
-    cdiValues = np.zeros(dmcNsensors,dtype=float)
+    conteo = np.bincount(indiceClase, minlength=len(cdiEscala))
+    sCDIconteo = {etiqueta_cdi(valor): int(conteo[i]) for i, valor in enumerate(cdiEscala)}
+    sCDIvalues = {}
+    for k in sCDIconteo:
+        sCDIvalues[k] = sCDIconteo[k]*100/dmcNsensors
+
     cdiValue = 0.0
-    sCDIvalues = { "0lx": 0, "50lx": 0, "100lx": 0, "200lx": 0, "300lx": 0, "500lx": 0, "750lx": 0, "1000lx": 0, "2000lx": 0 }
     cdi = ""
-
-    # DETERMIANR LA CANTIDAD DE SENSORES CORRESPONDIENTE AL PORCETAJE SELECCIONADO
-    cdiSensorsPercent = 100 * cdiPorcentajeSensores
-    scdiSensorPercent = 100 * scdiPorcentajeSensores
-    print(f"\nCDI - Porcentaje de sensores considerados: {cdiSensorsPercent:.2f} %\n")
-    
-    dfCDIVector = dfResultados[[dfResultados.columns[0]]].copy() # permite generar un array con la misma cantida de filas que el dataFrame que recibimos
-    dfCDIVector[:] = 0    
-    
-    for sensor in range(dfResultados.shape[1]):
-        dfCDIVector.loc[((dfResultados[sensor] < 50) & (dmcCondicion['condicion'] == 1)), dfCDIVector.columns[0]] = 1
-        cdiMenor50[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0        
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 50) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor50[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 100) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor100[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 200) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor200[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 300) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor300[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 500) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor500[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 750) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor750[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 1000) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor1000[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()
-        dfCDIVector[:] = 0
-
-        dfCDIVector.loc[(dfResultados[sensor] >= 2000) & (dmcCondicion['condicion'] == 1), dfCDIVector.columns[0]] = 1
-        cdiMayor2000[sensor] = dfCDIVector[dfCDIVector.columns[0]].sum()     
-        dfCDIVector[:] = 0         
-
-        cdiMenor50Aux[sensor] = cdiMenor50[sensor] * 100 / dmcRealHours
-        cdiMayor50Aux[sensor] = cdiMayor50[sensor] * 100 / dmcRealHours
-        cdiMayor100Aux[sensor] = cdiMayor100[sensor] * 100 / dmcRealHours
-        cdiMayor200Aux[sensor] = cdiMayor200[sensor] * 100 / dmcRealHours
-        cdiMayor300Aux[sensor] = cdiMayor300[sensor] * 100 / dmcRealHours
-        cdiMayor500Aux[sensor] = cdiMayor500[sensor] * 100 / dmcRealHours
-        cdiMayor750Aux[sensor] = cdiMayor750[sensor] * 100 / dmcRealHours
-        cdiMayor1000Aux[sensor] = cdiMayor1000[sensor] * 100 / dmcRealHours
-        cdiMayor2000Aux[sensor] = cdiMayor2000[sensor] * 100 / dmcRealHours
-
-        if cdiMenor50Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 0
-        if cdiMayor50Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 50
-        if cdiMayor100Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 100
-        if cdiMayor200Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 200
-        if cdiMayor300Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 300
-        if cdiMayor500Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 500
-        if cdiMayor750Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 750
-        if cdiMayor1000Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 1000
-        if cdiMayor2000Aux[sensor] >= cdiSensorsPercent:
-            cdiValues[sensor] = 2000
-        
-        if int(cdiValues[sensor]) == 0:
-            sCDIvalues["0lx"] = sCDIvalues["0lx"] + 1
-        if int(cdiValues[sensor]) == 50:
-            sCDIvalues["50lx"] = sCDIvalues["50lx"] + 1
-        if int(cdiValues[sensor]) == 100:
-            sCDIvalues["100lx"] = sCDIvalues["100lx"] + 1
-        if int(cdiValues[sensor]) == 200:
-            sCDIvalues["200lx"] = sCDIvalues["200lx"] + 1
-        if int(cdiValues[sensor]) == 300:
-            sCDIvalues["300lx"] = sCDIvalues["300lx"] + 1
-        if int(cdiValues[sensor]) == 500:
-            sCDIvalues["500lx"] = sCDIvalues["500lx"] + 1
-        if int(cdiValues[sensor]) == 750:
-            sCDIvalues["750lx"] = sCDIvalues["750lx"] + 1
-        if int(cdiValues[sensor] )== 1000:
-            sCDIvalues["1000lx"] = sCDIvalues["1000lx"] + 1
-        if int(cdiValues[sensor]) == 2000:
-            sCDIvalues["2000lx"] = sCDIvalues["2000lx"] + 1
-    
-    
-    print(f"valores de sCDI: {sCDIvalues}")
-    for k in sCDIvalues:
-        sCDIvalues[k] = sCDIvalues[k]*100/dmcNsensors 
-    
     for k in sCDIvalues:
         cdiValue += sCDIvalues[k]
         cdi = k
         if (cdiValue >= cdiPorcentajeSensores*100):
             break
 
-    print(f"Valores de sCDI normalizados: < 50lx: {sCDIvalues['0lx']:.2f} >= 50lx: {sCDIvalues['50lx']:.2f}, >= 100lx: {sCDIvalues['100lx']:.2f}, >= 200lx: {sCDIvalues['200lx']:.2f}, >= 300lx: {sCDIvalues['300lx']:.2f}, >= 500lx: {sCDIvalues['500lx']:.2f}, >= 750lx: {sCDIvalues['750lx']:.2f}, >= 1000lx: {sCDIvalues['1000lx']:.2f}, >= 2000lx: {sCDIvalues['2000lx']:.2f}\n")
-    
-    return cdiValues, sCDIvalues, cdi
+    return sCDIvalues, cdi, sCDIconteo
 
-def creacion_archivos(filePath, nombre, pathResultados, pathSchedule ,daIlumHoursCount, daOcurranceRate, daAverageOcurranceRate, udiIlumHoursCount, udiOcurranceRate, udiAverageOcurranceRate, udiHours, sUDIpercentual,  sUDIsensorCount, sUDIsensorOccurrance, sdaSensorCount, sdaOccurrancePercentSensor, sdaAnualOccurranceRate, sdaHoras, cdiList, sCDI, CDI, dmcRows, dmcNsensors):
+def cdi_desde_conteos(conteoCDI, dmcRealHours, cdiPorcentajeSensores, cdiEscala):
     '''
-    - GENERACIÓN DE ARCHIVOS CON LOS DATOS PROCESADOS
-        Se generan los archivos "procesados-..." con los datos calculados, en el directorio indicado.
-        
-    '''
-    dfArchivo = pd.DataFrame()
-   
-    dfArchivo['DA Horas Contabilizadas'] = daIlumHoursCount
-    dfArchivo['DA Frecuencia de Ocurrencia'] = daOcurranceRate
-    dfArchivo['UDI Horas Contabilizadas'] = udiIlumHoursCount
-    dfArchivo['UDI Frecuencia de Ocurrencia'] = udiOcurranceRate
-    dfArchivo['CDI'] = cdiList
-    dfArchivo['SDA Contabilizacion de sensores'] = sdaSensorCount
-    dfArchivo[f'SDA Frecuencia de Ocurrencia mayor al {(sdaPorcentajeHoras*100)} %'] = sdaOccurrancePercentSensor
-    dfArchivo['sUDI Sensores Contabilizados'] = sUDIsensorCount
-    dfArchivo[f'sUDI Frecuencia de ocurrencia mayor al {(sudiPorcentajeHoras*100)} %'] = sUDIsensorOccurrance
-    
-    fileName = procesadosFileReference+nombre+'.csv'
-    #fileNameTodo = 'otroResumen-'+nombre+'.csv'
+    - CDI Y sCDI A PARTIR DE LAS HORAS QUE SUPERAN CADA UMBRAL DE LA ESCALA -
+
+    Para los motores que cuentan horas por umbral (máscaras de bits, lectura por bloques) en lugar de ordenar las iluminancias. Como la
+    cantidad de horas que superan un umbral no aumenta al aumentar el umbral, la clase de cada sensor es la cantidad de umbrales superados.
+
+    Parámetros input
+        conteoCDI - Elemento tipo numpy array (Umbrales x Sensores), horas ocupadas con iluminancia >= cdiEscala[1:]
+        dmcRealHours - Elemento tipo entero, cantidad de horas reales a considerar
+        cdiPorcentajeSensores - Elemento tipo float, fracción de horas ocupadas y de sensores a considerar
+        cdiEscala - Elemento tipo lista, escala de iluminancias ordenada de forma ascendente
+
+    Parámetros output
+        resultadoCDI - Elemento tipo diccionario, ver motor_cdi
+    '''
+    horasRequeridas = conteo_minimo_porcentaje(dmcRealHours, 100 * cdiPorcentajeSensores)
+    indiceClase = np.count_nonzero(np.asarray(conteoCDI) >= horasRequeridas, axis=0)
+
+    sCDIvalues, cdi, sCDIconteo = resumen_scdi(indiceClase, cdiEscala, np.shape(conteoCDI)[1], cdiPorcentajeSensores)
+    resultadoCDI = {
+                    "cdiValues": np.asarray(cdiEscala, dtype=float)[indiceClase],
+                    "sCDI": sCDIvalues,
+                    "cdi": cdi,
+                    "sCDIconteo": sCDIconteo
+                }
+    return resultadoCDI
+
+@instrumentar("calculo.motor_cdi")
+def motor_cdi(matrizIluminancia, vectorCondicion, dmcRealHours, cdiPorcentajeSensores, cdiEscala, compactada=False):
+    '''
+    - CÁLCULO DE CDI Y sCDI PARA UN PAR results/schedule -
+
+    Parámetros input
+        matrizIluminancia - Elemento tipo numpy array (Horas x Sensores)
+        vectorCondicion - Elemento tipo numpy array (Horas), valores 0 ó 1 obtenidos de dmc_condicion_and_realHours
+        dmcRealHours - Elemento tipo entero, cantidad de horas reales a considerar
+        cdiPorcentajeSensores - Elemento tipo float, fracción de horas ocupadas y de sensores a considerar
+        cdiEscala - Elemento tipo lista, escala de iluminancias ordenada de forma ascendente
+        compactada - Elemento tipo booleano, True si matrizIluminancia ya contiene sólo las horas ocupadas (compactar_ocupadas), en ese caso
+        vectorCondicion no se utiliza
+
+    Parámetros output
+        resultadoCDI - Elemento tipo diccionario, {"cdiValues": numpy array (Sensores), "sCDI": diccionario, "cdi": string, "sCDIconteo": diccionario}
+    '''
+    if compactada:
+        bloqueOcupado = np.asarray(matrizIluminancia)
+    else:
+        bloqueOcupado = compactar_ocupadas(matrizIluminancia, [vectorCondicion])[0]
+
+    horasRequeridas = conteo_minimo_porcentaje(dmcRealHours, 100 * cdiPorcentajeSensores)
+    iluminanciaReferencia = iluminancia_percentil_ocupado(bloqueOcupado, horasRequeridas)
+    indiceClase = clases_cdi(iluminanciaReferencia, cdiEscala)
+
+    sCDIvalues, cdi, sCDIconteo = resumen_scdi(indiceClase, cdiEscala, bloqueOcupado.shape[1], cdiPorcentajeSensores)
+    resultadoCDI = {
+                    "cdiValues": np.asarray(cdiEscala, dtype=float)[indiceClase],
+                    "sCDI": sCDIvalues,
+                    "cdi": cdi,
+                    "sCDIconteo": sCDIconteo
+                }
+    return resultadoCDI
+
+def get_cdi_index(dmcNsensors, dmcRows, dmcRealHours, dmcCondicion, dfResultados, cdiEscala):
+    '''
+    - CALCULO DE PARÁMETRO CDI
+    Escala de valores de iluminancia por defecto (cdiEscala): 0lx, 50lx, 100lx, 200lx, 300lx, 500lx, 750lx, 1000lx, 2000lx
+
+    A cada sensor se le asigna el mayor valor de la escala que se supera durante al menos el porcentaje de horas ocupadas indicado en
+    cdiPorcentajeSensores. En lugar de contar las horas para cada umbral, se obtiene por sensor la iluminancia superada durante esa cantidad
+    de horas (iluminancia_percentil_ocupado) y se ubica en la escala con una búsqueda binaria, de modo que una escala más fina (cada 25 lx)
+    no incrementa el tiempo de cálculo de forma lineal con la cantidad de clases.
+
+    Parámetros Input
+        dmcNsensors -  cantida de sensores
+        dmcRealHours - cantidad de horas a considerar
+        dmcCondicion - condición de ocupación, y horas a considerar
+        dfResultados - dataFrame con los valores de iluminancia de todos los sensores a analizar
+        cdiEscala - lista ascendente con la escala de iluminancias (por defecto 0lx ... 2000lx)
+
+    Parámetros Output
+        cdiValues - dataframe, valor de máxima iluminancia por sensor, segun escala
+        sCDIvalues - porcentaje de sensores para cada rango de la escala indicada
+        cdi - etiqueta de la escala en la que se alcanza el porcentaje de sensores indicado
+
+    '''
+    # DETERMIANR LA CANTIDAD DE SENSORES CORRESPONDIENTE AL PORCETAJE SELECCIONADO
+    cdiSensorsPercent = 100 * cdiPorcentajeSensores
+    mensaje(f"\nCDI - Porcentaje de sensores considerados: {cdiSensorsPercent:.2f} %\n")
+
+    resultadoCDI = motor_cdi(dfResultados, dmcCondicion['condicion'], dmcRealHours, cdiPorcentajeSensores, cdiEscala)
+    cdiValues, sCDIvalues, cdi = resultadoCDI["cdiValues"], resultadoCDI["sCDI"], resultadoCDI["cdi"]
+
+    mensaje(f"valores de sCDI: {resultadoCDI['sCDIconteo']}")
+    etiquetas = list(sCDIvalues)
+    normalizados = [f"< {etiqueta_cdi(cdiEscala[1])}: {sCDIvalues[etiquetas[0]]:.2f}"] if len(cdiEscala) > 1 else []
+    normalizados += [f">= {k}: {sCDIvalues[k]:.2f}" for k in etiquetas[1:]]
+    mensaje(f"Valores de sCDI normalizados: {', '.join(normalizados)}\n")
+
+    return cdiValues, sCDIvalues, cdi
+
+def parametros_metricas():
+    '''
+    - PARÁMETROS DE LAS MÉTRICAS DINÁMICAS -
+
+    Devuelve en un diccionario los umbrales y porcentajes configurados al inicio del programa, para utilizarlos como base de consultas y barridos
+
+    Parámetros output
+        parametros - Elemento tipo diccionario, {"daIlumValue": 200, "sdaIlumValue": 200, ...}
+    '''
+    parametros = {
+                    "daIlumValue": daIlumValue,
+                    "sdaIlumValue": sdaIlumValue,
+                    "sdaPorcentajeHoras": sdaPorcentajeHoras,
+                    "udiIlumMin": udiIlumMin,
+                    "udiIlumMax": udiIlumMax,
+                    "sudiIlumMin": sudiIlumMin,
+                    "sudiIlumMax": sudiIlumMax,
+                    "sudiPorcentajeHoras": sudiPorcentajeHoras,
+                    "cdiPorcentajeSensores": cdiPorcentajeSensores,
+                    "cdiEscala": list(cdiEscala)
+                }
+    return parametros
+
+def configurar_parametros(config=None, parametros=None):
+    '''
+    - PARÁMETROS DE LAS MÉTRICAS CON VALORES MODIFICADOS -
+
+    Los umbrales de sDA y sUDI acompañan a los de DA y UDI cuando en los parámetros base son iguales y no se indican en config, tal como
+    en la configuración por defecto.
+
+    Parámetros input
+        config - Elemento tipo diccionario con los valores a modificar, por ejemplo {"daIlumValue": 300}, o None
+        parametros - Elemento tipo diccionario, parámetros base. Por defecto parametros_metricas()
+
+    Parámetros output
+        parametros - Elemento tipo diccionario, nueva copia con los valores modificados
+    '''
+    if parametros is None:
+        parametros = parametros_metricas()
+    config = config or {}
+    for clave in config:
+        if clave not in parametros:
+            raise KeyError(f"Parámetro desconocido: {clave}")
+
+    vinculados = {"daIlumValue": "sdaIlumValue", "udiIlumMin": "sudiIlumMin", "udiIlumMax": "sudiIlumMax", "sdaPorcentajeHoras": "sudiPorcentajeHoras"}
+
+    consulta = dict(parametros)
+    consulta.update(config)
+    for clave, vinculada in vinculados.items():
+        if clave in config and vinculada not in config and parametros[vinculada] == parametros[clave]:
+            consulta[vinculada] = config[clave]
+    consulta["cdiEscala"] = list(consulta["cdiEscala"])
+
+    return consulta
+
+def calcular_metricas_par(matrizIluminancia, vectorCondicion, dmcRealHours, parametros, dmcRows=None):
+    '''
+    - CÁLCULO DE TODAS LAS MÉTRICAS PARA UN PAR results/schedule -
+
+    La matriz se compacta una sola vez a las horas ocupadas (compactar_ocupadas) y DA, sDA, UDI, sUDI y CDI se calculan sobre ese bloque.
+
+    Parámetros input
+        matrizIluminancia - Elemento tipo numpy array (Horas x Sensores)
+        vectorCondicion - Elemento tipo numpy array (Horas), valores 0 ó 1 obtenidos de dmc_condicion_and_realHours
+        dmcRealHours - Elemento tipo entero, cantidad de horas reales a considerar
+        parametros - Elemento tipo diccionario con los umbrales, ver parametros_metricas
+        dmcRows - Elemento tipo entero, filas analizadas si matrizIluminancia ya está compactada, ver motor_metricas_dinamicas
+
+    Parámetros output
+        metricas - Elemento tipo diccionario, ver agregar_metricas y motor_cdi
+    '''
+    if dmcRows is None:
+        matrizIluminancia, _, listaRows = compactar_ocupadas(matrizIluminancia, [vectorCondicion])
+        dmcRows = listaRows[0]
+
+    metricas = motor_metricas_dinamicas(matrizIluminancia, None, dmcRealHours, parametros["daIlumValue"], parametros["sdaIlumValue"], parametros["sdaPorcentajeHoras"], parametros["udiIlumMin"], parametros["udiIlumMax"], parametros["sudiIlumMin"], parametros["sudiIlumMax"], parametros["sudiPorcentajeHoras"], dmcRows=dmcRows)
+    metricas.update(motor_cdi(matrizIluminancia, None, dmcRealHours, parametros["cdiPorcentajeSensores"], parametros["cdiEscala"], compactada=True))
+
+    return metricas
+
+@instrumentar("calculo.motor_metricas_lote")
+def motor_metricas_lote(matrizIluminancia, listaCondiciones, listaRealHours, parametros, sensoresPorBloque=4096, listaRows=None):
+    '''
+    - EVALUACIÓN SIMULTÁNEA DE VARIOS SCHEDULES CONTRA UN MISMO ARCHIVO results -
+
+    Las K condiciones de ocupación se apilan en una matriz (K x Horas). Las máscaras de umbral (Horas x Sensores) no dependen del schedule,
+    por lo que se calculan una sola vez y los conteos de horas de todos los schedules se obtienen con un producto matricial:
+    conteo (K x Sensores) = condiciones (K x Horas) @ máscara (Horas x Sensores). Los sensores se procesan en bloques de sensoresPorBloque
+    columnas para acotar la memoria de las máscaras. Antes se descartan las horas que no están ocupadas en ningún schedule (compactar_ocupadas).
+
+    Parámetros input
+        matrizIluminancia - Elemento tipo numpy array (Horas x Sensores)
+        listaCondiciones - Elemento tipo lista con K vectores (Horas) de valores 0 ó 1, obtenidos de dmc_condicion_and_realHours
+        listaRealHours - Elemento tipo lista con las K horas reales de cada schedule
+        parametros - Elemento tipo diccionario con los umbrales, ver parametros_metricas
+        sensoresPorBloque - Elemento tipo entero, cantidad de sensores por bloque
+        listaRows - Elemento tipo lista con las K filas analizadas si matrizIluminancia y listaCondiciones ya están compactadas con
+        compactar_ocupadas. Por defecto se compactan aquí
+
+    Parámetros output
+        listaMetricas - Elemento tipo lista con K diccionarios, idénticos a los que devuelve calcular_metricas_par para cada schedule
+    '''
+    if listaRows is None:
+        matrizIluminancia, listaCondiciones, listaRows = compactar_ocupadas(matrizIluminancia, listaCondiciones)
+    matriz = np.asarray(matrizIluminancia)
+    nHoras, nSensores = matriz.shape
+    nSchedules = len(listaCondiciones)
+
+    # LOS CONTEOS SON ENTEROS, float32 LOS REPRESENTA SIN ERROR HASTA 2^24 HORAS
+    tipo = np.float32 if nHoras < 2**24 else np.float64
+    condiciones = np.asarray(listaCondiciones, dtype=tipo).reshape(nSchedules, nHoras)
+
+    mismoSDA = parametros["sdaIlumValue"] == parametros["daIlumValue"]
+    mismoSUDI = (parametros["sudiIlumMin"] == parametros["udiIlumMin"]) and (parametros["sudiIlumMax"] == parametros["udiIlumMax"])
+
+    conteoDA = np.zeros((nSchedules, nSensores))
+    conteoSDA = conteoDA if mismoSDA else np.zeros((nSchedules, nSensores))
+    conteoUDI = np.zeros((nSchedules, nSensores))
+    conteoSUDI = conteoUDI if mismoSUDI else np.zeros((nSchedules, nSensores))
+
+    for inicio in range(0, nSensores, sensoresPorBloque):
+        bloque = matriz[:, inicio:inicio+sensoresPorBloque]
+        columnas = slice(inicio, inicio + bloque.shape[1])
+
+        conteoDA[:, columnas] = condiciones @ (bloque >= parametros["daIlumValue"]).astype(tipo)
+        if not mismoSDA:
+            conteoSDA[:, columnas] = condiciones @ (bloque >= parametros["sdaIlumValue"]).astype(tipo)
+        conteoUDI[:, columnas] = condiciones @ ((bloque >= parametros["udiIlumMin"]) & (bloque <= parametros["udiIlumMax"])).astype(tipo)
+        if not mismoSUDI:
+            conteoSUDI[:, columnas] = condiciones @ ((bloque >= parametros["sudiIlumMin"]) & (bloque <= parametros["sudiIlumMax"])).astype(tipo)
+
+    listaMetricas = []
+    for k in range(nSchedules):
+        metricas = agregar_metricas(conteoDA[k], conteoSDA[k], conteoUDI[k], conteoSUDI[k], listaRealHours[k], parametros["sdaPorcentajeHoras"], parametros["sudiPorcentajeHoras"], listaRows[k])
+        metricas.update(motor_cdi(matriz, listaCondiciones[k], listaRealHours[k], parametros["cdiPorcentajeSensores"], parametros["cdiEscala"]))
+        listaMetricas.append(metricas)
+
+    return listaMetricas
+
+@instrumentar("calculo.construir_indice_ocupado")
+def construir_indice_ocupado(matrizIluminancia, vectorCondicion):
+    '''
+    - ÍNDICE DE ILUMINANCIAS OCUPADAS ORDENADAS POR SENSOR -
+
+    Se conservan sólo las horas que cumplen la condición de ocupación y período de análisis, y se ordenan de forma ascendente por sensor.
+    El índice se construye una vez por par results/schedule; a partir de él cualquier consulta de DA, sDA, UDI, sUDI o CDI, con cualquier
+    umbral, se resuelve con búsquedas binarias (horas_sobre_umbral) en lugar de recorrer nuevamente todas las horas.
+
+    Parámetros input
+        matrizIluminancia - Elemento tipo numpy array (Horas x Sensores)
+        vectorCondicion - Elemento tipo numpy array (Horas), valores 0 ó 1 obtenidos de dmc_condicion_and_realHours
+
+    Parámetros output
+        indice - Elemento tipo diccionario, {"ordenados": numpy array (Horas ocupadas x Sensores), "dmcRealHours": float, "dmcRows": int, "dmcNsensors": int}
+    '''
+    condicion = np.asarray(vectorCondicion)
+    bloqueOcupado, _, listaRows = compactar_ocupadas(matrizIluminancia, [condicion])
+    dmcRows = listaRows[0]
+    ordenados = np.sort(bloqueOcupado, axis=0)
+
+    indice = {
+                "ordenados": ordenados,
+                "dmcRealHours": condicion[:dmcRows].sum(),
+                "dmcRows": dmcRows,
+                "dmcNsensors": bloqueOcupado.shape[1]
+            }
+    return indice
+
+def busqueda_binaria_columnas(ordenados, valores, lado):
+    '''
+    - BÚSQUEDA BINARIA SIMULTÁNEA EN TODAS LAS COLUMNAS -
+
+    Equivalente a aplicar np.searchsorted(ordenados[:, sensor], valores, side=lado) a cada sensor, pero resuelto para todos los sensores
+    a la vez con log2(Horas) pasos vectorizados.
+
+    Parámetros input
+        ordenados - Elemento tipo numpy array (Horas x Sensores), ordenado de forma ascendente por columna
+        valores - Elemento tipo numpy array (Umbrales), valores a ubicar
+        lado - Elemento tipo string, "left" (cantidad de horas < valor) o "right" (cantidad de horas <= valor)
+
+    Parámetros output
+        posiciones - Elemento tipo numpy array (Umbrales x Sensores)
+    '''
+    nHoras, nSensores = ordenados.shape
+    valores = np.asarray(valores, dtype=float).reshape(-1, 1)
+    inferior = np.zeros((len(valores), nSensores), dtype=np.int64)
+    superior = np.full((len(valores), nSensores), nHoras, dtype=np.int64)
+    columnas = np.arange(nSensores)
+
+    activos = inferior < superior
+    while np.any(activos):
+        medio = (inferior + superior) // 2
+        valorMedio = ordenados[np.minimum(medio, nHoras - 1), columnas]
+        if lado == "left":
+            avanzar = valorMedio < valores
+        else:
+            avanzar = valorMedio <= valores
+        inferior = np.where(activos & avanzar, medio + 1, inferior)
+        superior = np.where(activos & ~avanzar, medio, superior)
+        activos = inferior < superior
+
+    return inferior
+
+def horas_sobre_umbral(indice, umbrales):
+    '''
+    - CANTIDAD DE HORAS OCUPADAS CON ILUMINANCIA >= UMBRAL, POR SENSOR -
+
+    Parámetros input
+        indice - Elemento tipo diccionario, obtenido con construir_indice_ocupado
+        umbrales - Elemento tipo float o lista de float [lx]
+
+    Parámetros output
+        conteo - Elemento tipo numpy array (Umbrales x Sensores)
+    '''
+    ordenados = indice["ordenados"]
+    return ordenados.shape[0] - busqueda_binaria_columnas(ordenados, np.atleast_1d(umbrales), "left")
+
+def horas_en_rango(indice, minimos, maximos):
+    '''
+    - CANTIDAD DE HORAS OCUPADAS CON ILUMINANCIA ENTRE UN MÍNIMO Y UN MÁXIMO (INCLUIDOS), POR SENSOR -
+
+    Parámetros input
+        indice - Elemento tipo diccionario, obtenido con construir_indice_ocupado
+        minimos, maximos - Elemento tipo float o lista de float [lx], de igual longitud
+
+    Parámetros output
+        conteo - Elemento tipo numpy array (Rangos x Sensores)
+    '''
+    ordenados = indice["ordenados"]
+    return busqueda_binaria_columnas(ordenados, np.atleast_1d(maximos), "right") - busqueda_binaria_columnas(ordenados, np.atleast_1d(minimos), "left")
+
+@instrumentar("calculo.metricas_desde_indice", filas=lambda argumentos, resultado: argumentos[0]["ordenados"].shape[0])
+def metricas_desde_indice(indice, parametros):
+    '''
+    - CONSULTA DE TODAS LAS MÉTRICAS A PARTIR DEL ÍNDICE DE ILUMINANCIAS OCUPADAS -
+
+    Parámetros input
+        indice - Elemento tipo diccionario, obtenido con construir_indice_ocupado
+        parametros - Elemento tipo diccionario con los umbrales, ver parametros_metricas
+
+    Parámetros output
+        metricas - Elemento tipo diccionario, ver agregar_metricas. Incluye además "cdiValues", "sCDI" y "cdi"
+    '''
+    ordenados = indice["ordenados"]
+    dmcRealHours = indice["dmcRealHours"]
+
+    sobreUmbral = horas_sobre_umbral(indice, [parametros["daIlumValue"], parametros["sdaIlumValue"]])
+    enRango = horas_en_rango(indice, [parametros["udiIlumMin"], parametros["sudiIlumMin"]], [parametros["udiIlumMax"], parametros["sudiIlumMax"]])
+    metricas = agregar_metricas(sobreUmbral[0], sobreUmbral[1], enRango[0], enRango[1], dmcRealHours, parametros["sdaPorcentajeHoras"], parametros["sudiPorcentajeHoras"], indice["dmcRows"])
+
+    # CDI: LA ILUMINANCIA SUPERADA DURANTE LAS HORAS REQUERIDAS SE LEE DIRECTAMENTE DEL ÍNDICE ORDENADO
+    horasRequeridas = conteo_minimo_porcentaje(dmcRealHours, 100 * parametros["cdiPorcentajeSensores"])
+    if horasRequeridas <= 0:
+        iluminanciaReferencia = np.full(indice["dmcNsensors"], np.inf)
+    elif horasRequeridas > ordenados.shape[0]:
+        iluminanciaReferencia = np.full(indice["dmcNsensors"], -np.inf)
+    else:
+        iluminanciaReferencia = ordenados[ordenados.shape[0] - horasRequeridas]
+    indiceClase = clases_cdi(iluminanciaReferencia, parametros["cdiEscala"])
+    metricas["cdiValues"] = np.asarray(parametros["cdiEscala"], dtype=float)[indiceClase]
+    metricas["sCDI"], metricas["cdi"], _ = resumen_scdi(indiceClase, parametros["cdiEscala"], indice["dmcNsensors"], parametros["cdiPorcentajeSensores"])
+
+    return metricas
+
+def barrido_umbrales(indice, parametro, valores, parametros=None):
+    '''
+    - CURVAS MÉTRICA VS UMBRAL -
+
+    Evalúa DA, sDA, UDI, sUDI y CDI para cada valor del parámetro indicado, manteniendo el resto de los parámetros. Cada punto de la curva
+    se resuelve con búsquedas binarias sobre el índice, por lo que cientos de umbrales se evalúan en una sola llamada sin volver a leer
+    los archivos ni recorrer las horas.
+
+    Parámetros input
+        indice - Elemento tipo diccionario, obtenido con construir_indice_ocupado
+        parametro - Elemento tipo string, nombre del parámetro a variar ("daIlumValue", "udiIlumMin", "sdaPorcentajeHoras", "cdiPorcentajeSensores", ...)
+        valores - Elemento tipo lista, valores del parámetro a evaluar
+        parametros - Elemento tipo diccionario, parámetros base. Por defecto parametros_metricas()
+
+    Parámetros output
+        dfBarrido - Elemento tipo Pandas DataFrame, una fila por valor con las columnas [parametro, "DA", "sDA", "UDI", "sUDI", "CDI"]
+    '''
+    if parametros is None:
+        parametros = parametros_metricas()
+    if parametro not in parametros:
+        raise KeyError(f"Parámetro desconocido para el barrido: {parametro}")
+
+    filas = []
+    for valor in valores:
+        consulta = configurar_parametros({parametro: valor}, parametros)
+        metricas = metricas_desde_indice(indice, consulta)
+        filas.append({
+                        parametro: valor,
+                        "DA": metricas["daAverageOcurranceRate"],
+                        "sDA": metricas["sdaAnualOccurranceRate"],
+                        "UDI": metricas["udiAverageOcurranceRate"],
+                        "sUDI": metricas["sUDI"],
+                        "CDI": metricas["cdi"]
+                    })
+
+    return pd.DataFrame(filas)
+
+def guardar_indice_ocupado(indice, ruta):
+    '''
+    - ALMACENAMIENTO DEL ÍNDICE DE ILUMINANCIAS OCUPADAS (.npz) -
+
+    Se graba desde los procesos de cálculo, antes de que creacion_archivos genere la carpeta de salida, por lo que la carpeta se crea aquí.
+    La escritura se hace a través de un archivo temporal, como las demás salidas
+    '''
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    rutaTemporal = ruta + f".{os.getpid()}.tmp"
+    with open(rutaTemporal, "wb") as f:
+        np.savez(f, ordenados=indice["ordenados"], dmcRealHours=indice["dmcRealHours"], dmcRows=indice["dmcRows"], dmcNsensors=indice["dmcNsensors"])
+    os.replace(rutaTemporal, ruta)
+    return 1
+
+def cargar_indice_ocupado(ruta):
+    '''
+    - LECTURA DE UN ÍNDICE DE ILUMINANCIAS OCUPADAS GENERADO CON guardar_indice_ocupado -
+    '''
+    with np.load(ruta) as datos:
+        indice = {
+                    "ordenados": datos["ordenados"],
+                    "dmcRealHours": datos["dmcRealHours"][()],
+                    "dmcRows": int(datos["dmcRows"]),
+                    "dmcNsensors": int(datos["dmcNsensors"])
+                }
+    return indice
+
+def ruta_cache(rutaArchivo, sufijo):
+    '''
+    - RUTA DEL ARCHIVO DE CACHE ASOCIADO A UN ARCHIVO DE DATOS -
+
+    Los archivos de cache se guardan en la carpeta carpetaCache, dentro de la misma carpeta del archivo de datos
+
+    Parámetros input
+        rutaArchivo - Elemento tipo string, ruta del archivo de datos (results, schedule, pts)
+        sufijo - Elemento tipo string, se agrega al nombre del archivo de datos (por ejemplo ".npy")
+
+    Parámetros output
+        rutaCache - Elemento tipo string
+    '''
+    carpeta, nombre = os.path.split(rutaArchivo)
+    return os.path.join(carpeta, carpetaCache, nombre + sufijo)
+
+def firma_archivo(rutaArchivo):
+    '''
+    - FIRMA DE UN ARCHIVO DE DATOS: RUTA, TAMAÑO Y FECHA DE MODIFICACIÓN -
+
+    Para una fuente de coeficientes de luz natural y cielo (ver fuente_dc) se suman los tamaños y se toma la fecha más reciente de ambos
+    '''
+    componentes = fuente_dc(rutaArchivo) or (rutaArchivo,)
+    estados = [os.stat(ruta) for ruta in componentes]
+    return {"ruta": separadorFuenteDC.join(os.path.abspath(ruta) for ruta in componentes), "tamanio": sum(e.st_size for e in estados), "mtime": max(e.st_mtime_ns for e in estados)}
+
+def empaquetar_bits(mascara):
+    '''
+    - EMPAQUETADO DE UNA MÁSCARA BOOLEANA EN PALABRAS DE 64 BITS -
+
+    Parámetros input
+        mascara - Elemento tipo numpy array booleano (Filas x Horas)
+
+    Parámetros output
+        palabras - Elemento tipo numpy array uint64 (Filas x ceil(Horas / 64)), 1/64 del tamaño de la matriz float64 original
+    '''
+    mascara = np.atleast_2d(mascara)
+    empaquetado = np.packbits(mascara, axis=1)
+    relleno = (-empaquetado.shape[1]) % 8
+    if relleno:
+        empaquetado = np.pad(empaquetado, ((0, 0), (0, relleno)))
+    return np.ascontiguousarray(empaquetado).view(np.uint64)
+
+def contar_bits(palabras):
+    '''
+    - CANTIDAD DE BITS EN 1 POR FILA (POPCOUNT) -
+
+    Se utiliza np.bitwise_count (numpy >= 2.0); en versiones anteriores se recurre a una tabla de 256 valores sobre los bytes
+    '''
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(palabras).sum(axis=-1, dtype=np.int64)
+    tabla = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return tabla[palabras.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+def firma_umbrales(parametros):
+    '''
+    - UMBRALES DE ILUMINANCIA DE LOS QUE DEPENDEN LAS MÁSCARAS DE BITS -
+
+    Los porcentajes de horas y sensores no intervienen en las máscaras, por lo que pueden modificarse sin invalidar la cache
+    '''
+    claves = ["daIlumValue", "sdaIlumValue", "udiIlumMin", "udiIlumMax", "sudiIlumMin", "sudiIlumMax", "cdiEscala"]
+    return {k: parametros[k] for k in claves}
+
+@instrumentar("calculo.construir_mascaras_bits")
+def construir_mascaras_bits(matrizIluminancia, parametros):
+    '''
+    - MÁSCARAS DE SUPERACIÓN DE UMBRALES EMPAQUETADAS EN BITS -
+
+    Para cada umbral configurado se guarda, por sensor, un bit por hora indicando si la iluminancia cumple la condición. Al cambiar
+    únicamente el schedule, las métricas se recalculan con un AND entre palabras y un conteo de bits (metricas_desde_mascaras), sin
+    volver a comparar la matriz de iluminancias. Cada máscara ocupa 1/64 de la matriz float64, pero hay una por umbral y por escalón
+    de cdiEscala: con una escala cada 25 lx las del CDI superan a la matriz, y el tiempo de construcción crece con la cantidad de
+    escalones. Por eso la cache de máscaras es opcional (usarCacheMascaras) y el cálculo por defecto ordena las horas ocupadas (motor_cdi).
+
+    Parámetros input
+        matrizIluminancia - Elemento tipo numpy array (Horas x Sensores)
+        parametros - Elemento tipo diccionario con los umbrales, ver parametros_metricas
+
+    Parámetros output
+        mascaras - Elemento tipo diccionario, {"da", "sda", "udi", "sudi": uint64 (Sensores x Palabras), "cdi": uint64 (Umbrales x Sensores x Palabras), "nHoras", "nSensores", "umbrales"}
+    '''
+    matriz = np.asarray(matrizIluminancia).T
+    nSensores, nHoras = matriz.shape
+
+    mascaras = {
+                "nHoras": nHoras,
+                "nSensores": nSensores,
+                "umbrales": firma_umbrales(parametros),
+                "da": empaquetar_bits(matriz >= parametros["daIlumValue"]),
+                "sda": empaquetar_bits(matriz >= parametros["sdaIlumValue"]),
+                "udi": empaquetar_bits((matriz >= parametros["udiIlumMin"]) & (matriz <= parametros["udiIlumMax"])),
+                "sudi": empaquetar_bits((matriz >= parametros["sudiIlumMin"]) & (matriz <= parametros["sudiIlumMax"]))
+            }
+    if len(parametros["cdiEscala"]) > 1:
+        mascaras["cdi"] = np.stack([empaquetar_bits(matriz >= umbral) for umbral in parametros["cdiEscala"][1:]])
+    else:
+        mascaras["cdi"] = np.zeros((0,) + mascaras["da"].shape, dtype=np.uint64)
+    return mascaras
+
+@instrumentar("calculo.metricas_desde_mascaras", filas=lambda argumentos, resultado: argumentos[0]["nHoras"] * len(argumentos[1]))
+def metricas_desde_mascaras(mascaras, listaCondiciones, listaRealHours, parametros):
+    '''
+    - MÉTRICAS DE UNO O VARIOS SCHEDULES A PARTIR DE LAS MÁSCARAS DE BITS -
+
+    Parámetros input
+        mascaras - Elemento tipo diccionario, obtenido con construir_mascaras_bits o cargar_mascaras_bits
+        listaCondiciones - Elemento tipo lista con K vectores (Horas) de valores 0 ó 1, obtenidos de dmc_condicion_and_realHours
+        listaRealHours - Elemento tipo lista con las K horas reales de cada schedule
+        parametros - Elemento tipo diccionario con los umbrales, deben coincidir con los utilizados para construir las máscaras
+
+    Parámetros output
+        listaMetricas - Elemento tipo lista con K diccionarios, idénticos a los que devuelve calcular_metricas_par
+    '''
+    if mascaras["umbrales"] != firma_umbrales(parametros):
+        raise ValueError("Las máscaras de bits fueron generadas con umbrales distintos a los indicados")
+
+    nHoras = mascaras["nHoras"]
+    listaMetricas = []
+    for vectorCondicion, dmcRealHours in zip(listaCondiciones, listaRealHours):
+        condicion = np.asarray(vectorCondicion)
+        dmcRows = min(nHoras, condicion.shape[0])
+        horasOcupadas = np.zeros(nHoras, dtype=bool)
+        horasOcupadas[:dmcRows] = (condicion[:dmcRows] == 1)
+        palabrasSchedule = empaquetar_bits(horasOcupadas)[0]
+
+        conteo = {k: contar_bits(mascaras[k] & palabrasSchedule) for k in ["da", "sda", "udi", "sudi"]}
+        metricas = agregar_metricas(conteo["da"], conteo["sda"], conteo["udi"], conteo["sudi"], dmcRealHours, parametros["sdaPorcentajeHoras"], parametros["sudiPorcentajeHoras"], dmcRows)
+
+        conteoCDI = contar_bits(mascaras["cdi"] & palabrasSchedule).reshape(-1, mascaras["nSensores"])
+        metricas.update(cdi_desde_conteos(conteoCDI, dmcRealHours, parametros["cdiPorcentajeSensores"], parametros["cdiEscala"]))
+        listaMetricas.append(metricas)
+
+    return listaMetricas
+
+def ruta_mascaras(rutaResultados, umbrales):
+    '''
+    - RUTA DE LAS MÁSCARAS DE BITS DE UN ARCHIVO results PARA UN CONJUNTO DE UMBRALES -
+
+    Cada conjunto de umbrales (ver firma_umbrales) tiene su propio archivo, para que las máscaras de varios perfiles se mantengan vigentes a la vez
+    '''
+    firma = hashlib.blake2b(json.dumps(umbrales, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+    return ruta_cache(rutaResultados, f".mascaras-{firma}.npz")
+
+def guardar_mascaras_bits(mascaras, rutaResultados):
+    '''
+    - ALMACENAMIENTO DE LAS MÁSCARAS DE BITS EN LA CARPETA DE CACHE -
+
+    Junto a las máscaras se guarda la firma del archivo results y de los umbrales, utilizada por cargar_mascaras_bits para invalidarlas
+    '''
+    rutaCache = ruta_mascaras(rutaResultados, mascaras["umbrales"])
+    os.makedirs(os.path.dirname(rutaCache), exist_ok=True)
+    clave = json.dumps({"archivo": firma_archivo(rutaResultados), "umbrales": mascaras["umbrales"]}, sort_keys=True)
+
+    rutaTemporal = rutaCache + f".{os.getpid()}.tmp"
+    with open(rutaTemporal, "wb") as f:
+        np.savez(f, clave=np.array(clave), nHoras=mascaras["nHoras"], nSensores=mascaras["nSensores"], da=mascaras["da"], sda=mascaras["sda"], udi=mascaras["udi"], sudi=mascaras["sudi"], cdi=mascaras["cdi"])
+    os.replace(rutaTemporal, rutaCache)
+    podar_mascaras(rutaResultados)
+    return 1
+
+def listar_mascaras(rutaResultados):
+    '''
+    - ARCHIVOS DE MÁSCARAS DE BITS DE UN ARCHIVO results, UNO POR CONJUNTO DE UMBRALES, DEL USADO MÁS RECIENTEMENTE AL MÁS ANTIGUO -
+    '''
+    rutas = glob.glob(glob.escape(ruta_cache(rutaResultados, ".mascaras-")) + "*.npz")
+    return sorted(rutas, key=os.path.getmtime, reverse=True)
+
+def estado_mascaras(rutaMascaras, rutaResultados):
+    '''
+    - ESTADO DE UN ARCHIVO DE MÁSCARAS DE BITS: "vigente" SI SE GENERÓ CON LA VERSIÓN ACTUAL DEL ARCHIVO results, "desactualizada" SI NO -
+    '''
+    try:
+        with np.load(rutaMascaras) as datos:
+            clave = json.loads(str(datos["clave"]))
+    except (OSError, ValueError, KeyError):
+        return "desactualizada"
+    return "vigente" if clave["archivo"] == firma_archivo(rutaResultados) else "desactualizada"
+
+def podar_mascaras(rutaResultados):
+    '''
+    - ELIMINACIÓN DE LAS MÁSCARAS DE BITS DESACTUALIZADAS O EXCEDENTES DE UN ARCHIVO results -
+
+    Se eliminan las generadas con una versión anterior del archivo results y, de las vigentes, las usadas menos recientemente más allá de
+    maximoMascarasPorResults (cargar_mascaras_bits actualiza la fecha de las que utiliza), para que un barrido de umbrales no acumule un
+    archivo por cada conjunto
+
+    Parámetros output
+        eliminadas - Elemento tipo lista con las rutas eliminadas
+    '''
+    vigentes, eliminadas = 0, []
+    for rutaMascaras in listar_mascaras(rutaResultados):
+        if vigentes < maximoMascarasPorResults and estado_mascaras(rutaMascaras, rutaResultados) == "vigente":
+            vigentes += 1
+            continue
+        try:
+            os.remove(rutaMascaras)
+            eliminadas.append(rutaMascaras)
+        except OSError:
+            # OTRO PROCESO LA ELIMINÓ O LA ESTÁ LEYENDO, SE PODA EN LA PRÓXIMA ESCRITURA
+            pass
+    return eliminadas
+
+def verificar_mascaras(rutasResultados):
+    '''
+    - VERIFICACIÓN DE LAS MÁSCARAS DE BITS GUARDADAS EN LA CACHE PARA CADA ARCHIVO results -
+
+    Parámetros output
+        estados - Elemento tipo diccionario, {ruta de las máscaras: "vigente" | "desactualizada"}
+    '''
+    estados = {}
+    for rutaResultados in rutasResultados:
+        for rutaMascaras in listar_mascaras(rutaResultados):
+            estados[rutaMascaras] = estado_mascaras(rutaMascaras, rutaResultados)
+            mensaje(f"Cache {estados[rutaMascaras]}: {rutaMascaras}")
+    return estados
+
+def cargar_mascaras_bits(rutaResultados, parametros):
+    '''
+    - LECTURA DE LAS MÁSCARAS DE BITS DE UN ARCHIVO results -
+
+    Parámetros output
+        mascaras - Elemento tipo diccionario, o None si no existen o si el archivo results o los umbrales cambiaron desde que se generaron
+    '''
+    rutaCache = ruta_mascaras(rutaResultados, firma_umbrales(parametros))
+    if not os.path.isfile(rutaCache):
+        return None
+
+    clave = json.dumps({"archivo": firma_archivo(rutaResultados), "umbrales": firma_umbrales(parametros)}, sort_keys=True)
+    with np.load(rutaCache) as datos:
+        if str(datos["clave"]) != clave:
+            return None
+        mascaras = {k: datos[k] for k in ["da", "sda", "udi", "sudi", "cdi"]}
+        mascaras["nHoras"] = int(datos["nHoras"])
+        mascaras["nSensores"] = int(datos["nSensores"])
+    mascaras["umbrales"] = firma_umbrales(parametros)
+    # LA FECHA DE MODIFICACIÓN INDICA EL ÚLTIMO USO, VER podar_mascaras
+    try:
+        os.utime(rutaCache)
+    except OSError:
+        pass
+
+    return mascaras
+
+def hash_contenido(rutaArchivo, tamanioBloque=1 << 20):
+    '''
+    - HASH DEL CONTENIDO DE UN ARCHIVO (BLAKE2b), O DE LAS DOS MATRICES DE UNA FUENTE DE COEFICIENTES DE LUZ NATURAL Y CIELO -
+    '''
+    h = hashlib.blake2b(digest_size=20)
+    for ruta in fuente_dc(rutaArchivo) or (rutaArchivo,):
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(tamanioBloque), b""):
+                h.update(bloque)
+    return h.hexdigest()
+
+def cache_vigente(rutaArchivo, separador):
+    '''
+    - VERIFICACIÓN RÁPIDA DE LA CACHE BINARIA DE UN ARCHIVO -
+
+    Parámetros output
+        rutaNpy - Elemento tipo string con la ruta del .npy si la cache corresponde al archivo, o None
+    '''
+    rutaNpy = ruta_cache(rutaArchivo, ".npy")
+    rutaClave = ruta_cache(rutaArchivo, ".json")
+    if not (os.path.isfile(rutaNpy) and os.path.isfile(rutaClave)):
+        return None
+
+    firma = firma_archivo(rutaArchivo)
+    with open(rutaClave, "r") as f:
+        clave = json.load(f)
+    if clave["separador"] != separador or clave["tamanio"] != firma["tamanio"]:
+        return None
+    if clave["mtime"] == firma["mtime"] and clave["ruta"] == firma["ruta"]:
+        return rutaNpy
+    if clave["hash"] == hash_contenido(rutaArchivo):
+        clave.update(firma)
+        escribir_json_atomico(rutaClave, clave)
+        return rutaNpy
+
+    return None
+
+@instrumentar("lectura")
+def leer_matriz_cacheada(rutaArchivo, separador):
+    '''
+    - LECTURA DE UNA MATRIZ NUMÉRICA (results, schedule, pts) CON CACHE BINARIA -
+
+    La primera lectura interpreta el archivo de texto y guarda la matriz en formato .npy en la carpeta carpetaCache, junto con un archivo
+    .json con la ruta, tamaño, fecha de modificación y hash del contenido. Las lecturas siguientes abren el .npy con np.load(mmap_mode='r'),
+    sin volver a interpretar el texto. Si cambia el tamaño o la fecha pero no el contenido (archivo copiado o tocado) la cache se reutiliza.
+
+    Parámetros input
+        rutaArchivo - Elemento tipo string, ruta del archivo de texto
+        separador - Elemento tipo string, separador de columnas ("," para results y schedule, "\t" para pts), o el formato de los results
+        que no son csv ("daysim", "radiance"), ver interpretar_matriz
+
+    Parámetros output
+        matriz - Elemento tipo numpy array (Filas x Columnas), de sólo lectura si proviene de la cache
+    '''
+    if not usarCacheCSV:
+        return interpretar_matriz(rutaArchivo, separador)
+
+    rutaNpy = cache_vigente(rutaArchivo, separador)
+    if rutaNpy is not None:
+        return np.load(rutaNpy, mmap_mode='r')
+
+    rutaNpy = ruta_cache(rutaArchivo, ".npy")
+    rutaClave = ruta_cache(rutaArchivo, ".json")
+    firma = firma_archivo(rutaArchivo)
+    matriz = interpretar_matriz(rutaArchivo, separador)
+    if matriz.dtype == object:
+        # COLUMNAS NO NUMÉRICAS, NO SE GUARDAN EN LA CACHE
+        return matriz
+
+    os.makedirs(os.path.dirname(rutaNpy), exist_ok=True)
+    rutaTemporal = rutaNpy + f".{os.getpid()}.tmp"
+    with open(rutaTemporal, "wb") as f:
+        np.save(f, matriz)
+    os.replace(rutaTemporal, rutaNpy)
+
+    clave = dict(firma)
+    clave.update({"hash": hash_contenido(rutaArchivo), "separador": separador, "forma": list(matriz.shape), "dtype": str(matriz.dtype)})
+    escribir_json_atomico(rutaClave, clave)
+
+    return np.load(rutaNpy, mmap_mode='r')
+
+def escribir_json_atomico(rutaArchivo, contenido):
+    '''
+    - ESCRITURA DE UN ARCHIVO JSON A TRAVÉS DE UN ARCHIVO TEMPORAL -
+    '''
+    rutaTemporal = rutaArchivo + f".{os.getpid()}.tmp"
+    with open(rutaTemporal, "w") as f:
+        json.dump(contenido, f, indent=1)
+    os.replace(rutaTemporal, rutaArchivo)
+    return 1
+
+def separador_schedule(rutaSchedule):
+    '''
+    - SEPARADOR (O FORMATO) CON EL QUE SE LEE UN ARCHIVO schedule, VER interpretar_matriz -
+
+    Parámetros output
+        separador - Elemento tipo string, "," para csv o "definicion" para las definiciones por reglas (extensionesDefinicionSchedule)
+    '''
+    if os.path.splitext(rutaSchedule)[1].lower() in extensionesDefinicionSchedule:
+        return "definicion"
+    return ","
+
+def leer_definicion_schedule(rutaSchedule):
+    '''
+    - LECTURA DE LA DEFINICIÓN POR REGLAS DE UN SCHEDULE (TOML O JSON), VER expandir_schedule -
+    '''
+    definicion = leer_toml_json(rutaSchedule)
+    if not isinstance(definicion, dict):
+        raise ValueError(f"La definición del schedule debe ser una tabla de claves y valores: {rutaSchedule}")
+    return definicion
+
+def fecha_mes_dia(texto):
+    '''
+    - FECHA "MM-DD" DE UNA DEFINICIÓN DE SCHEDULE COMO ENTERO MM * 100 + DD, COMPARABLE CON mes_dia DE expandir_schedule -
+    '''
+    coincidencia = re.fullmatch(r"(\d{1,2})-(\d{1,2})", str(texto).strip())
+    if coincidencia is None:
+        raise ValueError(f"Fecha no válida en la definición del schedule: {texto} (formato MM-DD)")
+    mes, dia = int(coincidencia[1]), int(coincidencia[2])
+    if not (1 <= mes <= 12 and 1 <= dia <= 31):
+        raise ValueError(f"Fecha no válida en la definición del schedule: {texto} (formato MM-DD)")
+    return mes * 100 + dia
+
+def validar_claves_schedule(diccionario, clavesValidas, contexto):
+    '''
+    - VERIFICACIÓN DE LAS CLAVES DE UNA DEFINICIÓN DE SCHEDULE O DE UNA DE SUS REGLAS, VER expandir_schedule -
+    '''
+    for clave in diccionario:
+        if clave not in clavesValidas:
+            raise KeyError(f"Parámetro desconocido en {contexto}: {clave} (admitidos: {', '.join(clavesValidas)})")
+    return 1
+
+def expandir_schedule(definicion):
+    '''
+    - EXPANSIÓN DE UNA DEFINICIÓN POR REGLAS A LA MATRIZ DE UN ARCHIVO schedule -
+
+    En lugar de un archivo csv con una fila por hora, el schedule se describe con reglas, por ejemplo en schedule_<parentID>_<scheduleID>.toml:
+
+        anio = 2023                             # año de los días de la semana, por defecto anioSchedule
+        pasoMinutos = 60                        # paso de tiempo [min], divisor de 1440, por defecto 60
+        feriados = ["01-01", "05-01", "12-25"]  # días MM-DD sin ocupación
+
+        [[ocupacion]]                           # horas ocupadas, unión de todas las reglas
+        dias = [1, 2, 3, 4, 5]                  # días de la semana (1 lunes ... 7 domingo), por defecto todos
+        desde = 8                               # [h] inicio de la ocupación
+        hasta = 18                              # [h] fin de la ocupación, no incluido. Si es menor que desde, se ocupan esos días
+                                                # desde "desde" hasta la medianoche y desde la medianoche hasta "hasta"
+
+        [[periodoAnalisis]]                     # períodos MM-DD incluidos en el análisis, por defecto todo el año
+        desde = "03-21"
+        hasta = "09-21"                         # si es anterior a desde, el período pasa el fin de año
+
+    La expansión se hace por días con operaciones vectorizadas sobre fechas numpy (datetime64) y se repite para los pasos de cada día.
+    Un paso está ocupado si su punto medio (por ejemplo 8.5 para la hora de 8 a 9) está dentro de una regla. El 29 de febrero de los
+    años bisiestos se omite, de modo que con pasos horarios el schedule tiene siempre 8760 filas como los archivos de clima.
+
+    Parámetros input
+        definicion - Elemento tipo diccionario con las claves "anio", "pasoMinutos", "ocupacion", "feriados" y "periodoAnalisis", todas opcionales
+
+    Parámetros output
+        matrizSchedule - Elemento tipo numpy array (Pasos x 5) con las columnas mes, día, hora (punto medio del paso), ocupación y período
+        de análisis, como la de un archivo schedule csv
+    '''
+    validar_claves_schedule(definicion, ["anio", "pasoMinutos", "ocupacion", "feriados", "periodoAnalisis"], "la definición del schedule")
+    for regla in definicion.get("ocupacion", []):
+        validar_claves_schedule(regla, ["dias", "desde", "hasta"], "una regla de ocupacion")
+        diasInvalidos = [dia for dia in regla.get("dias", []) if dia not in range(1, 8)]
+        if diasInvalidos:
+            raise ValueError(f"Días de la semana inválidos en una regla de ocupacion: {diasInvalidos} (admitidos: 1 lunes ... 7 domingo)")
+        for clave in ["desde", "hasta"]:
+            if clave in regla and not 0 <= float(regla[clave]) <= 24:
+                raise ValueError(f"{clave} debe estar entre 0 y 24 h en una regla de ocupacion: {regla[clave]}")
+    for regla in definicion.get("periodoAnalisis", []):
+        validar_claves_schedule(regla, ["desde", "hasta"], "una regla de periodoAnalisis")
+
+    anio = int(definicion.get("anio", anioSchedule))
+    pasoMinutos = definicion.get("pasoMinutos", 60)
+    if not (isinstance(pasoMinutos, int) and pasoMinutos > 0 and 1440 % pasoMinutos == 0):
+        raise ValueError(f"pasoMinutos debe ser un entero divisor de 1440: {pasoMinutos}")
+
+    # DÍAS DEL AÑO, SIN EL 29 DE FEBRERO
+    dias = np.arange(np.datetime64(f"{anio:04d}-01-01"), np.datetime64(f"{anio + 1:04d}-01-01"))
+    meses = dias.astype("datetime64[M]")
+    mesDia = (meses.astype(np.int64) % 12 + 1) * 100 + (dias - meses).astype(np.int64) + 1
+    dias, mesDia = dias[mesDia != 229], mesDia[mesDia != 229]
+    diaSemana = (dias.astype(np.int64) + 3) % 7 + 1 # EL 1970-01-01 FUE JUEVES
+
+    pasosPorDia = 1440 // pasoMinutos
+    horas = (np.arange(pasosPorDia) + 0.5) * pasoMinutos / 60
+
+    # OCUPACIÓN (Días x Pasos): UNIÓN DE LAS REGLAS, SIN LOS FERIADOS
+    ocupacion = np.zeros((len(dias), pasosPorDia), dtype=bool)
+    for regla in definicion.get("ocupacion", []):
+        diasRegla = np.isin(diaSemana, regla.get("dias", [1, 2, 3, 4, 5, 6, 7]))
+        desde, hasta = float(regla.get("desde", 0)), float(regla.get("hasta", 24))
+        if desde <= hasta:
+            horasRegla = (horas >= desde) & (horas < hasta)
+        else:
+            horasRegla = (horas >= desde) | (horas < hasta)
+        ocupacion |= diasRegla[:, np.newaxis] & horasRegla[np.newaxis, :]
+    feriados = [fecha_mes_dia(fecha) for fecha in definicion.get("feriados", [])]
+    ocupacion[np.isin(mesDia, feriados)] = False
+
+    # PERÍODO DE ANÁLISIS POR DÍA
+    if "periodoAnalisis" in definicion:
+        periodo = np.zeros(len(dias), dtype=bool)
+        for regla in definicion["periodoAnalisis"]:
+            desde, hasta = fecha_mes_dia(regla.get("desde", "01-01")), fecha_mes_dia(regla.get("hasta", "12-31"))
+            if desde <= hasta:
+                periodo |= (mesDia >= desde) & (mesDia <= hasta)
+            else:
+                periodo |= (mesDia >= desde) | (mesDia <= hasta)
+    else:
+        periodo = np.ones(len(dias), dtype=bool)
+
+    matrizSchedule = np.column_stack([
+                                        np.repeat(mesDia // 100, pasosPorDia),
+                                        np.repeat(mesDia % 100, pasosPorDia),
+                                        np.tile(horas, len(dias)),
+                                        ocupacion.ravel(),
+                                        np.repeat(periodo, pasosPorDia)
+                                    ]).astype(np.float64)
+    return matrizSchedule
+
+def paso_schedule(matrizSchedule, rutaSchedule=None):
+    '''
+    - PASO DE TIEMPO [min] DE UN SCHEDULE -
+
+    Si pasoMinutos está configurado se utiliza ese valor. En caso contrario, si la cantidad de filas es un múltiplo exacto de 8760 (un año
+    sin el 29 de febrero) el paso es 60 * 8760 / filas: 60 para 8760 filas, 5 para 105120. Si no lo es (por ejemplo, 8784 filas de un año
+    bisiesto) se toma la menor diferencia positiva entre las horas (columna 2) de las filas del primer día. Cuando ambos valores no
+    coinciden, por ejemplo en un schedule de 5 minutos que repite la hora de cada fila horaria, se utiliza el de la cantidad de filas y se
+    muestra una advertencia.
+
+    Parámetros input
+        matrizSchedule - Elemento tipo numpy array (Pasos x 5), ver expandir_schedule
+        rutaSchedule - Elemento tipo string, ruta del schedule, sólo para la advertencia
+
+    Parámetros output
+        pasoMinutos - Elemento tipo entero
+    '''
+    if pasoMinutos is not None:
+        return pasoMinutos
+    matrizSchedule = np.asarray(matrizSchedule, dtype=float)
+    nFilas = matrizSchedule.shape[0]
+
+    diferencias = np.diff(matrizSchedule[:1441, 2])
+    diferencias = diferencias[diferencias > 0]
+    pasoHoras = max(1, int(round(diferencias.min() * 60))) if len(diferencias) > 0 else None
+
+    if nFilas == 0 or nFilas % 8760 != 0 or (60 * 8760) % nFilas != 0:
+        return pasoHoras or 60
+    pasoFilas = 60 * 8760 // nFilas
+    if pasoHoras is not None and pasoHoras != pasoFilas:
+        mensaje(f"ATENCIÓN: {rutaSchedule or 'schedule'} tiene {nFilas} filas (paso de {pasoFilas} min) y su columna de horas indica un paso de {pasoHoras} min; se utiliza {pasoFilas} min (ver pasoMinutos)", nivel=0)
+    return pasoFilas
+
+def horas_de_pasos(cantidad, pasoSchedule):
+    '''
+    - CONVERSIÓN DE UNA CANTIDAD DE PASOS DE TIEMPO A HORAS -
+
+    Los motores de cálculo cuentan pasos (filas); las horas se obtienen sólo al informar los resultados. Con pasos horarios se devuelve el
+    mismo valor, sin cambiar su tipo, por lo que las salidas horarias no se modifican. Una cantidad entera que resulta en horas enteras se
+    devuelve como entero (por ejemplo, 105120 pasos de 5 min son 8760 horas).
+
+    Parámetros input
+        cantidad - Elemento tipo entero, float o numpy array, cantidad de pasos
+        pasoSchedule - Elemento tipo entero, paso de tiempo [min], ver paso_schedule
+    '''
+    if pasoSchedule == 60:
+        return cantidad
+    horas = cantidad * pasoSchedule / 60
+    if isinstance(cantidad, (int, np.integer)) and float(horas).is_integer():
+        return int(horas)
+    return horas
+
+def hash_definicion(definicion):
+    '''
+    - HASH (BLAKE2b) DE UNA DEFINICIÓN DE SCHEDULE EN MEMORIA, INDEPENDIENTE DEL ORDEN DE LAS CLAVES -
+    '''
+    return hashlib.blake2b(json.dumps(definicion, sort_keys=True).encode("utf-8"), digest_size=20).hexdigest()
+
+# REGISTRO DE SCHEDULES DEL PROCESO: FIRMA DEL ARCHIVO -> HASH DEL CONTENIDO -> CONDICIÓN DE OCUPACIÓN
+registroSchedules = {"firmas": {}, "schedules": {}}
+
+def registrar_schedule(rutaSchedule):
+    '''
+    - REGISTRO DE UN ARCHIVO schedule: SE INTERPRETA UNA SOLA VEZ POR PROCESO -
+
+    La condición de ocupación (ocupación y período de análisis, columnas 3 y 4) se guarda como vector booleano, identificada por el hash del
+    contenido del archivo: todos los pares results/schedule la reutilizan, y los schedules idénticos con distinto nombre se interpretan una
+    única vez. Si el archivo cambia (tamaño o fecha de modificación) se vuelve a registrar. Las definiciones por reglas se expanden una
+    sola vez (ver expandir_schedule) y la matriz expandida se guarda en la cache binaria como la de un csv; las definiciones en memoria
+    (diccionarios) se identifican por el hash de su contenido, sin leer ningún archivo.
+
+    Parámetros input
+        rutaSchedule - Elemento tipo string, ruta del archivo schedule (csv o definición por reglas), o diccionario con la definición
+
+    Parámetros output
+        entrada - Elemento tipo diccionario {"hash", "condicion": numpy array booleano (Pasos), "nHoras": cantidad de pasos, "dmcRealHours":
+        pasos ocupados, "pasoMinutos": ver paso_schedule}
+    '''
+    if isinstance(rutaSchedule, dict):
+        claveFirma = None
+        hashSchedule = hash_definicion(rutaSchedule)
+    else:
+        firma = firma_archivo(rutaSchedule)
+        claveFirma = (firma["ruta"], firma["tamanio"], firma["mtime"])
+        hashSchedule = registroSchedules["firmas"].get(claveFirma)
+        if hashSchedule is not None:
+            return registroSchedules["schedules"][hashSchedule]
+        hashSchedule = hash_contenido(rutaSchedule)
+
+    if hashSchedule not in registroSchedules["schedules"]:
+        if claveFirma is None:
+            dfSchedule = pd.DataFrame(expandir_schedule(rutaSchedule))
+        else:
+            dfSchedule = pd.DataFrame(leer_matriz_cacheada(rutaSchedule, separador_schedule(rutaSchedule)))
+
+        # Extraemos los valores de ocupacion y periodo de analisis
+        dfCondiciones = dfSchedule.loc[:,[3,4]] # columna 3 representa la condicion de ocupacion, columna 4 representa la condicion de periodo de analisis
+        dfCondiciones.columns = ['ocupacion', 'periodoAnalisis']
+        dmcCondicion, dmcRealHours = dmc_condicion_and_realHours(dfCondiciones, len(dfSchedule.axes[0]))
+
+        registroSchedules["schedules"][hashSchedule] = {
+                                                        "hash": hashSchedule,
+                                                        "condicion": dmcCondicion['condicion'].to_numpy() == 1,
+                                                        "nHoras": len(dfSchedule.axes[0]),
+                                                        "dmcRealHours": dmcRealHours,
+                                                        "pasoMinutos": paso_schedule(dfSchedule.to_numpy(), None if isinstance(rutaSchedule, dict) else rutaSchedule)
+                                                    }
+    if claveFirma is not None:
+        registroSchedules["firmas"][claveFirma] = hashSchedule
+    return registroSchedules["schedules"][hashSchedule]
+
+def limpiar_registro_schedules():
+    '''
+    - VACIADO DEL REGISTRO DE SCHEDULES DEL PROCESO -
+    '''
+    registroSchedules["firmas"].clear()
+    registroSchedules["schedules"].clear()
+    return 1
+
+def archivos_cacheables(filesPathData, filesPathCoordenadas):
+    '''
+    - LISTADO DE ARCHIVOS DE ENTRADA QUE ADMITEN CACHE BINARIA -
+
+    Parámetros output
+        archivos - Elemento tipo lista de tuplas (ruta, separador) con los results de texto (csv, .ill, matrices ascii de Radiance), los
+        schedule (.csv y definiciones por reglas) y los workplanes (.pts). Las matrices binarias de Radiance no necesitan cache, se mapean en memoria directamente
+    '''
+    rutasResultados = sorted(listar_resultados(ruta_carpeta(filesPathData))[1].values())
+    archivos = [(r, separador_resultados(r)) for r in rutasResultados if separador_resultados(r) is not None]
+    for extension in [extensionCSV] + extensionesDefinicionSchedule:
+        archivos += [(r, separador_schedule(r)) for r in sorted(glob.glob(os.path.join(filesPathData, scheduleFileReference + "*" + extension)))]
+    archivos += [(r, "\t") for r in sorted(glob.glob(os.path.join(filesPathCoordenadas, wpFileHeader + "*" + extensionPTS)))]
+    return archivos
+
+def construir_cache(archivos):
+    '''
+    - GENERACIÓN (O ACTUALIZACIÓN) DE LA CACHE BINARIA DE LOS ARCHIVOS INDICADOS -
+    '''
+    for rutaArchivo, separador in archivos:
+        matriz = leer_matriz_cacheada(rutaArchivo, separador)
+        mensaje(f"Cache: {rutaArchivo} {matriz.shape}", nivel=2)
+    return 1
+
+def verificar_cache(archivos):
+    '''
+    - VERIFICACIÓN DE LA CACHE BINARIA -
+
+    Se recalcula el hash del contenido de cada archivo y se compara con el guardado en la cache
+
+    Parámetros output
+        estados - Elemento tipo diccionario, {ruta: "vigente" | "desactualizada" | "inexistente"}
+    '''
+    estados = {}
+    for rutaArchivo, separador in archivos:
+        rutaNpy = ruta_cache(rutaArchivo, ".npy")
+        rutaClave = ruta_cache(rutaArchivo, ".json")
+        if not (os.path.isfile(rutaNpy) and os.path.isfile(rutaClave)):
+            estados[rutaArchivo] = "inexistente"
+        else:
+            with open(rutaClave, "r") as f:
+                clave = json.load(f)
+            matriz = np.load(rutaNpy, mmap_mode='r')
+            if clave["hash"] == hash_contenido(rutaArchivo) and list(matriz.shape) == clave["forma"] and clave["separador"] == separador:
+                estados[rutaArchivo] = "vigente"
+            else:
+                estados[rutaArchivo] = "desactualizada"
+        mensaje(f"Cache {estados[rutaArchivo]}: {rutaArchivo}")
+    return estados
+
+def purgar_cache(carpetas):
+    '''
+    - ELIMINACIÓN DE LOS ARCHIVOS DE CACHE GENERADOS POR PAC-MD -
+
+    Sólo se eliminan los archivos con las extensiones propias de la cache; la carpeta se elimina si queda vacía
+    '''
+    extensionesCache = (".npy", ".json", ".npz", ".tmp")
+    for carpeta in carpetas:
+        rutaCarpeta = os.path.join(carpeta, carpetaCache)
+        if not os.path.isdir(rutaCarpeta):
+            continue
+        for nombre in os.listdir(rutaCarpeta):
+            if nombre.endswith(extensionesCache):
+                os.remove(os.path.join(rutaCarpeta, nombre))
+        if not os.listdir(rutaCarpeta):
+            os.rmdir(rutaCarpeta)
+        mensaje(f"Cache eliminada: {rutaCarpeta}")
+    return 1
+
+def leer_bloques(rutaArchivo, separador, filasPorBloque, columnas=None):
+    '''
+    - LECTURA POR BLOQUES DE FILAS DE UNA MATRIZ NUMÉRICA -
+
+    Si existe una cache binaria vigente (leer_matriz_cacheada) los bloques se toman del .npy mapeado en memoria, en caso contrario se
+    interpreta el archivo de texto por partes. En ningún caso se carga la matriz completa.
+
+    Parámetros input
+        rutaArchivo - Elemento tipo string, ruta del archivo de texto
+        separador - Elemento tipo string, separador de columnas
+        filasPorBloque - Elemento tipo entero, cantidad de filas (horas) por bloque
+        columnas - Elemento tipo lista, columnas a leer. Por defecto todas
+
+    Parámetros output
+        generador de numpy array (Filas del bloque x Columnas)
+    '''
+    rutaNpy = cache_vigente(rutaArchivo, separador) if usarCacheCSV else None
+    if rutaNpy is not None:
+        matriz = np.load(rutaNpy, mmap_mode='r')
+        for inicio in range(0, matriz.shape[0], filasPorBloque):
+            bloque = matriz[inicio:inicio+filasPorBloque]
+            yield np.array(bloque if columnas is None else bloque[:, columnas])
+    else:
+        for dfBloque in pd.read_csv(rutaArchivo, sep=separador, header=None, usecols=columnas, chunksize=filasPorBloque):
+            yield dfBloque.to_numpy()
+
+def cantidad_columnas(rutaArchivo, separador):
+    '''
+    - CANTIDAD DE COLUMNAS DE UN ARCHIVO DE TEXTO, A PARTIR DE SU PRIMERA FILA -
+    '''
+    with open(rutaArchivo, "r") as f:
+        primeraFila = f.readline()
+    return len(primeraFila.rstrip("\r\n").split(separador))
+
+def formato_resultados(rutaArchivo):
+    '''
+    - FORMATO DE UN ARCHIVO results, SEGÚN SU ENCABEZADO O SU EXTENSIÓN -
+
+    Parámetros output
+        formato - Elemento tipo string, "radiance" (matriz de Radiance, binaria o ascii), "daysim" (.ill de DAYSIM), "csv" o "dc" (coeficientes
+        de luz natural por matriz de cielo, ver fuente_dc)
+    '''
+    if fuente_dc(rutaArchivo) is not None:
+        return "dc"
+    with open(rutaArchivo, "rb") as f:
+        inicio = f.read(10)
+    if inicio == b"#?RADIANCE":
+        return "radiance"
+    extension = os.path.splitext(rutaArchivo)[1].lower()
+    if extension == ".ill":
+        return "daysim"
+    if extension == extensionCSV:
+        return "csv"
+    raise ValueError(f"Formato de results no reconocido: {rutaArchivo} (las matrices de Radiance deben incluir el encabezado)")
+
+def leer_encabezado_radiance(rutaArchivo):
+    '''
+    - ENCABEZADO DE UNA MATRIZ DE RADIANCE (dctimestep, rmtxop, rfluxmtx) -
+
+    El encabezado comienza con "#?RADIANCE" y finaliza con una línea vacía; indica las dimensiones (NROWS, NCOLS, NCOMP), el formato de
+    los datos (FORMAT=float, double o ascii) y, para los binarios, el orden de los bytes (BIGENDIAN)
+
+    Parámetros output
+        encabezado - Elemento tipo diccionario {"nFilas", "nColumnas", "nComponentes", "formato", "dtype", "inicioDatos", "lineasEncabezado"}
+    '''
+    valores = {}
+    lineasEncabezado = 0
+    with open(rutaArchivo, "rb") as f:
+        for linea in iter(f.readline, b""):
+            lineasEncabezado += 1
+            texto = linea.decode("latin-1").strip()
+            if texto == "":
+                break
+            if "=" in texto:
+                clave, valor = texto.split("=", 1)
+                valores[clave.strip()] = valor.strip()
+        else:
+            raise ValueError(f"Encabezado de Radiance incompleto: {rutaArchivo}")
+        inicioDatos = f.tell()
+
+    formato = valores.get("FORMAT", "ascii")
+    tiposBinarios = {"float": np.float32, "double": np.float64}
+    if formato != "ascii" and formato not in tiposBinarios:
+        raise ValueError(f"Formato de matriz de Radiance no soportado: {formato} ({rutaArchivo})")
+    if "NCOLS" not in valores:
+        raise ValueError(f"La matriz de Radiance no indica NCOLS: {rutaArchivo}")
+
+    nColumnas = int(valores["NCOLS"])
+    nComponentes = int(valores.get("NCOMP", 3))
+    dtype = None
+    if formato in tiposBinarios:
+        dtype = np.dtype(tiposBinarios[formato]).newbyteorder(">" if valores.get("BIGENDIAN", "0") == "1" else "<")
+    if "NROWS" in valores:
+        nFilas = int(valores["NROWS"])
+    elif dtype is not None:
+        nFilas = (os.path.getsize(rutaArchivo) - inicioDatos) // (nColumnas * nComponentes * dtype.itemsize)
+    else:
+        nFilas = None
+
+    return {"nFilas": nFilas, "nColumnas": nColumnas, "nComponentes": nComponentes, "formato": formato, "dtype": dtype, "inicioDatos": inicioDatos, "lineasEncabezado": lineasEncabezado}
+
+def leer_componentes_radiance(rutaArchivo):
+    '''
+    - DATOS DE UNA MATRIZ DE RADIANCE (Filas x Columnas x Componentes) -
+
+    Las matrices binarias se abren con np.memmap, sin leerlas completas; las matrices ascii se interpretan como texto
+
+    Parámetros output
+        datos - Elemento tipo numpy array (Filas x Columnas x Componentes)
+    '''
+    encabezado = leer_encabezado_radiance(rutaArchivo)
+    forma = (encabezado["nColumnas"], encabezado["nComponentes"])
+    if encabezado["dtype"] is not None:
+        return np.memmap(rutaArchivo, dtype=encabezado["dtype"], mode='r', offset=encabezado["inicioDatos"], shape=(encabezado["nFilas"],) + forma)
+    valores = pd.read_csv(rutaArchivo, sep=r"\s+", header=None, skiprows=encabezado["lineasEncabezado"]).to_numpy(dtype=np.float64)
+    return valores.reshape((-1,) + forma)
+
+def iluminancia_rgb(matrizRGB):
+    '''
+    - CONVERSIÓN DE IRRADIANCIAS RGB DE RADIANCE A ILUMINANCIA [lx] -
+
+    Ev = 179 * (0.265 R + 0.670 G + 0.065 B), sobre el último eje de la matriz. Con una sola componente los valores ya son iluminancias
+
+    Parámetros input
+        matrizRGB - Elemento tipo numpy array (... x Componentes), con 1 ó 3 componentes
+
+    Parámetros output
+        matriz - Elemento tipo numpy array (...), iluminancias
+    '''
+    if matrizRGB.shape[-1] == 1:
+        return matrizRGB[..., 0]
+    return 179.0 * (0.265 * matrizRGB[..., 0].astype(np.float64) + 0.670 * matrizRGB[..., 1] + 0.065 * matrizRGB[..., 2])
+
+@instrumentar("lectura")
+def matriz_radiance(rutaArchivo, horas=slice(None)):
+    '''
+    - ILUMINANCIAS (Horas x Sensores) DE UNA MATRIZ BINARIA DE RADIANCE, MAPEADA EN MEMORIA -
+
+    El archivo se abre con np.memmap (ver leer_componentes_radiance), sin leerlo completo ni convertirlo a texto; sólo se leen y convierten
+    las horas indicadas. La orientación de la matriz se toma de filasMatrizRadiance.
+
+    Parámetros input
+        rutaArchivo - Elemento tipo string, ruta de la matriz (FORMAT=float o double)
+        horas - Elemento tipo slice, horas a leer. Por defecto todas
+
+    Parámetros output
+        matriz - Elemento tipo numpy array (Horas x Sensores). Con una componente y orientación "horas" es una vista de sólo lectura del archivo
+    '''
+    datos = leer_componentes_radiance(rutaArchivo)
+    if filasMatrizRadiance == "sensores":
+        return iluminancia_rgb(datos[:, horas]).T
+    return iluminancia_rgb(datos[horas])
+
+def fuente_dc(rutaResultados):
+    '''
+    - MATRICES DE UNA FUENTE DE COEFICIENTES DE LUZ NATURAL Y CIELO -
+
+    Una fuente de este tipo es un results calculado, sin archivo propio: su ruta une con separadorFuenteDC la matriz de coeficientes de luz
+    natural (Sensores x Parches de cielo) y la matriz de cielo (Parches de cielo x Horas), ver listar_resultados
+
+    Parámetros output
+        matrices - Elemento tipo tupla (rutaDC, rutaCielo), o None si la ruta es la de un archivo results
+    '''
+    if not isinstance(rutaResultados, str) or separadorFuenteDC not in rutaResultados:
+        return None
+    return tuple(rutaResultados.split(separadorFuenteDC, 1))
+
+def lectura_por_bloques(rutaResultados):
+    '''
+    - INDICA SI UN results SE CALCULA POR BLOQUES DE HORAS (MOTOR STREAMING) -
+
+    Es el caso con modoStreaming y el de las fuentes de coeficientes de luz natural y cielo, cuya matriz de iluminancias no se forma completa
+    '''
+    return modoStreaming or fuente_dc(rutaResultados) is not None
+
+registroMatrices = {}
+
+def registrar_matriz_radiance(rutaArchivo, rol):
+    '''
+    - MATRIZ DE COEFICIENTES DE LUZ NATURAL O DE CIELO, PREPARADA PARA EL PRODUCTO Y COMPARTIDA POR LAS FUENTES DEL PROCESO -
+
+    Cada matriz se lee una vez por proceso mientras no cambie su tamaño o fecha de modificación. Las componentes se ordenan de forma que
+    la iluminancia de un bloque de horas sea un único producto de matrices (BLAS), ver matriz_dc:
+        "dc" - (Parches*Componentes x Sensores), con los coeficientes de la conversión a iluminancia de iluminancia_rgb ya aplicados
+        "cielo" - (Horas x Parches*Componentes), cada bloque de horas es un conjunto de filas contiguas
+    Se conservan las últimas matricesEnMemoria matrices utilizadas.
+
+    Parámetros input
+        rutaArchivo - Elemento tipo string, ruta de la matriz de Radiance (binaria o ascii)
+        rol - Elemento tipo string, "dc" o "cielo"
+
+    Parámetros output
+        matriz - Elemento tipo numpy array float64, ver arriba
+    '''
+    clave = (os.path.abspath(rutaArchivo), rol)
+    estado = os.stat(rutaArchivo)
+    firma = (estado.st_size, estado.st_mtime_ns)
+    registro = registroMatrices.pop(clave, None)
+    if registro is None or registro[0] != firma:
+        datos = leer_componentes_radiance(rutaArchivo)
+        nFilas, nColumnas, nComponentes = datos.shape
+        if rol == "dc":
+            pesos = np.array([1.0]) if nComponentes == 1 else 179.0 * np.array([0.265, 0.670, 0.065])
+            if len(pesos) != nComponentes:
+                raise ValueError(f"La matriz de coeficientes debe tener 1 ó 3 componentes: {rutaArchivo}")
+            matriz = np.ascontiguousarray((datos * pesos).reshape(nFilas, nColumnas * nComponentes).T)
+        else:
+            matriz = np.ascontiguousarray(np.asarray(datos, dtype=np.float64).transpose(1, 0, 2).reshape(nColumnas, nFilas * nComponentes))
+        registro = (firma, matriz)
+        contar("matrices leidas")
+    registroMatrices[clave] = registro
+    while len(registroMatrices) > max(1, matricesEnMemoria):
+        registroMatrices.pop(next(iter(registroMatrices)))
+    return registro[1]
+
+@instrumentar("calculo.matriz_dc", filas=lambda argumentos, resultado: resultado.shape[0])
+def matriz_dc(rutaResultados, horas=slice(None)):
+    '''
+    - ILUMINANCIAS (Horas x Sensores) DE UNA FUENTE DE COEFICIENTES DE LUZ NATURAL Y CIELO -
+
+    E = Cielo x DC, calculado sólo para las horas indicadas con un producto de matrices (BLAS) sobre las matrices preparadas por
+    registrar_matriz_radiance, que se leen una única vez y se reutilizan en todos los bloques y en todas las fuentes que las comparten
+
+    Parámetros input
+        rutaResultados - Elemento tipo string, ruta de la fuente, ver fuente_dc
+        horas - Elemento tipo slice o numpy array de índices, horas a calcular. Por defecto todas
+
+    Parámetros output
+        matriz - Elemento tipo numpy array (Horas x Sensores)
+    '''
+    rutaDC, rutaCielo = fuente_dc(rutaResultados)
+    matrizDC = registrar_matriz_radiance(rutaDC, "dc")
+    matrizCielo = registrar_matriz_radiance(rutaCielo, "cielo")
+    if matrizCielo.shape[1] != matrizDC.shape[0]:
+        raise ValueError(f"Los parches y componentes de la matriz de cielo no coinciden con los de la matriz de coeficientes: {rutaCielo}, {rutaDC}")
+    return matrizCielo[horas] @ matrizDC
+
+def interpretar_matriz(rutaArchivo, separador):
+    '''
+    - INTERPRETACIÓN DE UN ARCHIVO DE TEXTO COMO MATRIZ NUMÉRICA -
+
+    Parámetros input
+        rutaArchivo - Elemento tipo string
+        separador - Elemento tipo string, separador de columnas de un archivo csv o pts, o "daysim" (.ill: mes, día, hora e iluminancias
+        separadas por espacios), "radiance" (matriz ascii de Radiance con encabezado) o "definicion" (schedule por reglas, ver expandir_schedule)
+
+    Parámetros output
+        matriz - Elemento tipo numpy array (Filas x Columnas); para los archivos results (Horas x Sensores)
+    '''
+    if separador == "daysim":
+        return pd.read_csv(rutaArchivo, sep=r"\s+", header=None, comment="#").to_numpy(dtype=np.float64)[:, 3:]
+    if separador == "radiance":
+        matriz = iluminancia_rgb(leer_componentes_radiance(rutaArchivo))
+        return matriz.T if filasMatrizRadiance == "sensores" else matriz
+    if separador == "definicion":
+        return expandir_schedule(leer_definicion_schedule(rutaArchivo))
+    return pd.read_csv(rutaArchivo, sep=separador, header=None).to_numpy()
+
+def separador_resultados(rutaResultados):
+    '''
+    - SEPARADOR (O FORMATO) CON EL QUE SE LEE UN ARCHIVO results DE TEXTO, VER interpretar_matriz -
+
+    Parámetros output
+        separador - Elemento tipo string, "," para csv, "daysim" o "radiance" para las matrices ascii, o None para las matrices binarias y
+        las fuentes de coeficientes de luz natural y cielo
+    '''
+    formato = formato_resultados(rutaResultados)
+    if formato == "csv":
+        return ","
+    if formato == "dc" or (formato == "radiance" and leer_encabezado_radiance(rutaResultados)["dtype"] is not None):
+        return None
+    return formato
+
+def leer_matriz_resultados(rutaResultados):
+    '''
+    - LECTURA DE LA MATRIZ DE ILUMINANCIAS (Horas x Sensores) DE UN ARCHIVO results, EN CUALQUIERA DE LOS FORMATOS ADMITIDOS -
+
+    Las matrices binarias de Radiance se mapean en memoria directamente; los archivos de texto (csv, .ill de DAYSIM, matrices ascii de
+    Radiance) se interpretan una vez y se guardan en la cache binaria, ver leer_matriz_cacheada. Las fuentes de coeficientes de luz
+    natural y cielo se calculan completas con matriz_dc; los motores de cálculo las leen por bloques, ver lectura_por_bloques
+    '''
+    if fuente_dc(rutaResultados) is not None:
+        return matriz_dc(rutaResultados)
+    separador = separador_resultados(rutaResultados)
+    if separador is None:
+        return matriz_radiance(rutaResultados)
+    return leer_matriz_cacheada(rutaResultados, separador)
+
+def leer_bloques_resultados(rutaResultados, filasPorBloque, horasOcupadas=None):
+    '''
+    - LECTURA POR BLOQUES DE HORAS DE UN ARCHIVO results, VER leer_bloques -
+
+    Las matrices binarias de Radiance se leen del archivo mapeado en memoria, convirtiendo sólo las horas de cada bloque, y las fuentes de
+    coeficientes de luz natural y cielo se calculan bloque por bloque
+
+    Parámetros input
+        rutaResultados - Elemento tipo string, ruta del archivo results o fuente de coeficientes de luz natural y cielo
+        filasPorBloque - Elemento tipo entero, cantidad de horas por bloque
+        horasOcupadas - Elemento tipo numpy array booleano (Horas), horas ocupadas en algún schedule. En las fuentes de coeficientes de luz
+        natural y cielo sólo se calculan esas horas, las demás quedan en 0. Por defecto se calculan todas
+
+    Parámetros output
+        generador de numpy array (Horas del bloque x Sensores)
+    '''
+    separador = separador_resultados(rutaResultados)
+    if separador == ",":
+        yield from leer_bloques(rutaResultados, separador, filasPorBloque)
+    elif fuente_dc(rutaResultados) is not None:
+        # CADA BLOQUE DE HORAS ES UN PRODUCTO DE MATRICES, LA MATRIZ COMPLETA (Horas x Sensores) NO SE FORMA
+        nHoras, nSensores = cantidad_horas_sensores(rutaResultados)
+        for inicio in range(0, nHoras, filasPorBloque):
+            horas = slice(inicio, min(inicio + filasPorBloque, nHoras))
+            if horasOcupadas is None:
+                yield matriz_dc(rutaResultados, horas)
+                continue
+            filasOcupadas = np.flatnonzero(horasOcupadas[horas])
+            bloque = np.zeros((horas.stop - horas.start, nSensores))
+            if len(filasOcupadas) > 0:
+                bloque[filasOcupadas] = matriz_dc(rutaResultados, filasOcupadas + inicio)
+            yield bloque
+    elif separador is None:
+        nHoras = cantidad_horas_sensores(rutaResultados)[0]
+        for inicio in range(0, nHoras, filasPorBloque):
+            yield np.array(matriz_radiance(rutaResultados, slice(inicio, inicio + filasPorBloque)))
+    else:
+        # LOS ARCHIVOS DE TEXTO QUE NO SON csv SE INTERPRETAN COMPLETOS UNA VEZ Y LUEGO SE RECORREN DESDE LA CACHE
+        matriz = leer_matriz_cacheada(rutaResultados, separador)
+        for inicio in range(0, matriz.shape[0], filasPorBloque):
+            yield np.array(matriz[inicio:inicio + filasPorBloque])
+
+def cantidad_horas_sensores(rutaResultados):
+    '''
+    - CANTIDAD DE HORAS Y DE SENSORES DE UN ARCHIVO results, SIN LEER SUS DATOS -
+
+    Parámetros output
+        nHoras - Elemento tipo entero, o None si sólo se conoce leyendo el archivo (csv y .ill)
+        nSensores - Elemento tipo entero
+    '''
+    formato = formato_resultados(rutaResultados)
+    if formato == "dc":
+        rutaDC, rutaCielo = fuente_dc(rutaResultados)
+        return leer_encabezado_radiance(rutaCielo)["nColumnas"], leer_encabezado_radiance(rutaDC)["nFilas"]
+    if formato == "radiance":
+        encabezado = leer_encabezado_radiance(rutaResultados)
+        if filasMatrizRadiance == "sensores":
+            return encabezado["nColumnas"], encabezado["nFilas"]
+        return encabezado["nFilas"], encabezado["nColumnas"]
+    if formato == "daysim":
+        with open(rutaResultados, "r") as f:
+            primeraFila = f.readline()
+        return None, len(primeraFila.split()) - 3
+    return None, cantidad_columnas(rutaResultados, ',')
+
+def patron_archivos():
+    '''
+    - EXPRESIÓN REGULAR DE LOS NOMBRES DE LOS ARCHIVOS DE ENTRADA: <referencia><parentID>_<childID><extensión> -
+
+    La referencia es "results_", "schedule_", "dc_" o "sky_" (resultsFileReference, scheduleFileReference, dcFileReference, skyFileReference).
+    El parentID es el texto hasta el primer "_" y el childID el resto del nombre, que puede incluir otros "_"; sólo las matrices de cielo
+    comunes a todos los parentID ("sky_<skyID>") no tienen childID.
+    '''
+    referencias = "|".join(re.escape(referencia) for referencia in [resultsFileReference, scheduleFileReference, dcFileReference, skyFileReference])
+    return re.compile(rf"(?P<referencia>{referencias})(?P<parentID>[^_]+?)(?:_(?P<childID>.+?))?(?P<extension>\.[^.]+)")
+
+@instrumentar("descubrimiento", filas=lambda argumentos, resultado: resultado["cantidadArchivos"])
+def indexar_carpeta(ruta):
+    '''
+    - ÍNDICE DE LOS ARCHIVOS DE ENTRADA DE UNA CARPETA, CON UNA ÚNICA LECTURA DEL DIRECTORIO (os.scandir) -
+
+    Cada nombre se interpreta una sola vez con patron_archivos. Si un mismo archivo existe con más de una extensión se utiliza la primera
+    de extensionesResultados (results), del csv antes que extensionesDefinicionSchedule (schedule) o de extensionesMatrices (dc y sky).
+
+    Parámetros input
+        ruta - Elemento tipo string, carpeta con separador final
+
+    Parámetros output
+        indice - Elemento tipo diccionario {"resultados", "schedules", "dc", "cielo"}, cada uno {nombre sin referencia ni extensión:
+        {"parentID", "childID", "ruta"}} ordenado por ruta como en listar_archivos, y "cantidadArchivos", las entradas leídas de la carpeta
+    '''
+    tipos = {
+                resultsFileReference: ("resultados", extensionesResultados),
+                scheduleFileReference: ("schedules", [extensionCSV] + extensionesDefinicionSchedule),
+                dcFileReference: ("dc", extensionesMatrices),
+                skyFileReference: ("cielo", extensionesMatrices)
+            }
+    patron = patron_archivos()
+    candidatos = {tipo: {} for tipo, extensiones in tipos.values()}
+    cantidadArchivos = 0
+    if os.path.isdir(ruta):
+        with os.scandir(ruta) as entradas:
+            for entrada in entradas:
+                cantidadArchivos += 1
+                coincidencia = patron.fullmatch(entrada.name)
+                if coincidencia is None:
+                    continue
+                tipo, extensiones = tipos[coincidencia["referencia"]]
+                if coincidencia["extension"] not in extensiones or not entrada.is_file():
+                    continue
+                if coincidencia["childID"] is None and tipo != "cielo":
+                    mensaje(f"ATENCIÓN: el nombre {entrada.name} no tiene la forma {coincidencia['referencia']}<parentID>_<childID>, no se procesa", nivel=0)
+                    continue
+                nombre = entrada.name[len(coincidencia["referencia"]):-len(coincidencia["extension"])]
+                prioridad = extensiones.index(coincidencia["extension"])
+                if nombre not in candidatos[tipo] or prioridad < candidatos[tipo][nombre]["prioridad"]:
+                    candidatos[tipo][nombre] = {"parentID": coincidencia["parentID"], "childID": coincidencia["childID"], "ruta": ruta + entrada.name, "prioridad": prioridad}
+
+    indice = {tipo: dict(sorted(archivos.items(), key=lambda elemento: elemento[1]["ruta"])) for tipo, archivos in candidatos.items()}
+    indice["cantidadArchivos"] = cantidadArchivos
+    mensaje(f"Archivos indexados en {ruta}: " + ", ".join(f"{tipo} {len(archivos)}" for tipo, archivos in candidatos.items()), nivel=2)
+    return indice
+
+def plan_pares(rutaDatos, rutaCoordenadas=None, archivos=None):
+    '''
+    - PLAN DE LOS PARES results/schedule DE UNA CARPETA -
+
+    Se arma con una única lectura de la carpeta (ver indexar_carpeta) y con diccionarios por parentID, sin comparar cada results con cada
+    schedule. Lo utilizan la etapa de cálculo (run_batch) y la de gráficos (ver escenas_graficos).
+
+    Las matrices de coeficientes de luz natural "dc_<parentID>_<childID>" se combinan con cada matriz de cielo "sky_<parentID>_<skyID>" de
+    su parentID y con cada matriz de cielo "sky_<skyID>" común a todos, con los mismos parches de cielo y componentes, formando los results
+    calculados "<parentID>_<childID>-<skyID>" (ver fuente_dc), que se ubican después de los archivos results
+
+    Parámetros input
+        rutaDatos - Elemento tipo string, carpeta de los archivos results y schedule, con separador final
+        rutaCoordenadas - Elemento tipo string, carpeta de los archivos .pts, o None
+        archivos - Elemento tipo conjunto con las rutas de los archivos a considerar, o None para todos los de la carpeta
+
+    Parámetros output
+        plan - Elemento tipo diccionario con:
+            "resultados" - lista de diccionarios {"nombre", "parentID", "childID", "rutaResultados", "coordenadasID", "cieloID", "rutaCoordenadas"},
+            ordenada por ruta como en listar_archivos. coordenadasID es el childID del archivo .pts y cieloID es None para los archivos results
+            "schedules" - diccionario {parentID: lista de diccionarios {"scheduleID", "rutaSchedule"}}
+            "pares" - lista de diccionarios {"resultado" (posición en "resultados"), "posicionSchedule" (posición en "schedules"), "parentID",
+            "resultID", "scheduleID", "rutaResultados", "rutaSchedule", "nombre"}, en el orden de "resultados" y luego de "schedules"
+            "parentIDs" - lista de los parentID de los results, en orden de aparición
+            "sinSchedule", "sinResultados" - listas de los parentID con results y sin schedules, y con schedules y sin results
+    '''
+    indice = indexar_carpeta(rutaDatos)
+    if archivos is not None:
+        for tipo in ["resultados", "schedules", "dc", "cielo"]:
+            indice[tipo] = {nombre: archivo for nombre, archivo in indice[tipo].items() if archivo["ruta"] in archivos}
+
+    resultados = [{"nombre": nombre, "parentID": archivo["parentID"], "childID": archivo["childID"], "rutaResultados": archivo["ruta"], "coordenadasID": archivo["childID"], "cieloID": None} for nombre, archivo in indice["resultados"].items()]
+
+    # CADA ENCABEZADO SE LEE UNA SOLA VEZ, AUNQUE LA MATRIZ FORME VARIAS COMBINACIONES
+    encabezados = {archivo["ruta"]: leer_encabezado_radiance(archivo["ruta"]) for tipo in ["dc", "cielo"] for archivo in indice[tipo].values()}
+    cielosComunes = [archivo for archivo in indice["cielo"].values() if archivo["childID"] is None]
+    cielosPorParent = {}
+    for archivo in indice["cielo"].values():
+        if archivo["childID"] is not None:
+            cielosPorParent.setdefault(archivo["parentID"], []).append(archivo)
+    fuentes = {}
+    for nombreDC, archivoDC in indice["dc"].items():
+        encabezadoDC = encabezados[archivoDC["ruta"]]
+        # EL CIELO PROPIO DEL parentID TIENE PRIORIDAD SOBRE EL COMÚN DEL MISMO skyID
+        cielos = {archivo["parentID"]: archivo for archivo in cielosComunes}
+        cielos.update({archivo["childID"]: archivo for archivo in cielosPorParent.get(archivoDC["parentID"], [])})
+        for cieloID, archivoCielo in cielos.items():
+            # SÓLO SE COMBINAN MATRICES CON LOS MISMOS PARCHES DE CIELO Y COMPONENTES
+            encabezadoCielo = encabezados[archivoCielo["ruta"]]
+            if (encabezadoDC["nColumnas"], encabezadoDC["nComponentes"]) != (encabezadoCielo["nFilas"], encabezadoCielo["nComponentes"]):
+                mensaje(f"Las matrices {archivoDC['ruta']} y {archivoCielo['ruta']} no tienen los mismos parches de cielo y componentes, no se combinan", nivel=2)
+                continue
+            fuentes[nombreDC + "-" + cieloID] = {
+                                                    "nombre": nombreDC + "-" + cieloID,
+                                                    "parentID": archivoDC["parentID"],
+                                                    "childID": archivoDC["childID"] + "-" + cieloID,
+                                                    "rutaResultados": archivoDC["ruta"] + separadorFuenteDC + archivoCielo["ruta"],
+                                                    "coordenadasID": archivoDC["childID"],
+                                                    "cieloID": cieloID
+                                                }
+    nombresResultados = set(indice["resultados"])
+    resultados += [fuentes[nombre] for nombre in sorted(fuentes) if nombre not in nombresResultados]
+
+    for resultado in resultados:
+        resultado["rutaCoordenadas"] = None if rutaCoordenadas is None else rutaCoordenadas + wpFileHeader + resultado["parentID"] + "_" + resultado["coordenadasID"] + extensionPTS
+
+    schedules = {}
+    for archivo in indice["schedules"].values():
+        schedules.setdefault(archivo["parentID"], []).append({"scheduleID": archivo["childID"], "rutaSchedule": archivo["ruta"]})
+
+    pares = []
+    for posicion, resultado in enumerate(resultados):
+        for posicionSchedule, schedule in enumerate(schedules.get(resultado["parentID"], [])):
+            pares.append({
+                            "resultado": posicion,
+                            "posicionSchedule": posicionSchedule,
+                            "parentID": resultado["parentID"],
+                            "resultID": resultado["childID"],
+                            "scheduleID": schedule["scheduleID"],
+                            "rutaResultados": resultado["rutaResultados"],
+                            "rutaSchedule": schedule["rutaSchedule"],
+                            "nombre": resultado["nombre"] + "_" + schedule["scheduleID"]
+                        })
+
+    parentIDs = list(dict.fromkeys(resultado["parentID"] for resultado in resultados))
+    plan = {
+            "resultados": resultados,
+            "schedules": schedules,
+            "pares": pares,
+            "parentIDs": parentIDs,
+            "sinSchedule": [parentID for parentID in parentIDs if parentID not in schedules],
+            "sinResultados": [parentID for parentID in schedules if parentID not in set(parentIDs)]
+        }
+    return plan
+
+def listar_resultados(ruta):
+    '''
+    - ARCHIVOS results DE UNA CARPETA, EN CUALQUIERA DE LOS FORMATOS ADMITIDOS (extensionesResultados), Y FUENTES DE COEFICIENTES DE
+    LUZ NATURAL Y CIELO, VER plan_pares -
+
+    Parámetros output
+        listaNombres - Elemento tipo lista con los nombres sin "results_" ni extensión, en el orden de plan_pares
+        rutas - Elemento tipo diccionario {nombre: ruta del archivo, o de la fuente de coeficientes de luz natural y cielo}
+    '''
+    resultados = plan_pares(ruta)["resultados"]
+    return [resultado["nombre"] for resultado in resultados], {resultado["nombre"]: resultado["rutaResultados"] for resultado in resultados}
+
+def filas_por_bloque(presupuestoMemoriaMB, dmcNsensors, nSchedules):
+    '''
+    - CANTIDAD DE HORAS POR BLOQUE SEGÚN EL PRESUPUESTO DE MEMORIA -
+
+    Por cada hora del bloque se reservan aproximadamente 32 bytes por sensor: la fila leída (float64), la copia de la interpretación del texto,
+    las máscaras de umbral y su conversión a float32 para el producto con las condiciones de ocupación de los nSchedules.
+
+    Parámetros output
+        filas - Elemento tipo entero, al menos 1
+    '''
+    bytesPorFila = dmcNsensors * 32 + nSchedules * 8
+    return max(1, int(presupuestoMemoriaMB * 1024 * 1024) // bytesPorFila)
+
+def aviso_pasos(rutaResultados, nPasosResultados, rutaSchedule, entradaSchedule):
+    '''
+    - ADVERTENCIA: EL ARCHIVO results Y EL schedule TIENEN DISTINTA CANTIDAD DE PASOS DE TIEMPO -
+
+    Se analizan sólo los pasos comunes (los primeros); por ejemplo, un results de 5 minutos con un schedule horario se evaluaría sólo en su
+    primer mes
+    '''
+    mensaje(f"ATENCIÓN: {rutaResultados} tiene {nPasosResultados} pasos de tiempo y {rutaSchedule} {entradaSchedule['nHoras']} (paso de {entradaSchedule['pasoMinutos']} min); se analizan sólo los primeros {min(nPasosResultados, entradaSchedule['nHoras'])}", nivel=0)
+    return 1
+
+def iniciar_contadores(nSchedules, dmcNsensors, parametros):
+    '''
+    - CONTADORES POR SENSOR PARA EL CÁLCULO INCREMENTAL DE LAS MÉTRICAS -
+
+    Parámetros output
+        contadores - Elemento tipo diccionario con los conteos (Schedules x Sensores) de DA, sDA, UDI, sUDI y de cada umbral de la escala CDI,
+        más las horas reales y filas analizadas de cada schedule
+    '''
+    contadores = {
+                    "da": np.zeros((nSchedules, dmcNsensors)),
+                    "sda": np.zeros((nSchedules, dmcNsensors)),
+                    "udi": np.zeros((nSchedules, dmcNsensors)),
+                    "sudi": np.zeros((nSchedules, dmcNsensors)),
+                    "cdi": np.zeros((max(len(parametros["cdiEscala"]) - 1, 0), nSchedules, dmcNsensors)),
+                    "dmcRealHours": np.zeros(nSchedules),
+                    "dmcRows": np.zeros(nSchedules, dtype=np.int64)
+                }
+    return contadores
+
+def conteo_condiciones(condiciones, mascara):
+    '''
+    - CONTEO POR SENSOR DE LOS PASOS DE UN BLOQUE QUE CUMPLEN UNA MÁSCARA DE UMBRAL, PARA CADA SCHEDULE -
+
+    conteo (K x Sensores) = condiciones (K x Pasos) @ máscara (Pasos x Sensores). Con un único schedule que ocupa todos los pasos del bloque
+    (bloque compactado a las horas ocupadas) la máscara se suma por columna, sin convertirla a float32.
+    '''
+    if condiciones.shape[0] == 1 and condiciones.all():
+        return mascara.sum(axis=0, dtype=np.int32)[np.newaxis, :]
+    return condiciones @ mascara.astype(np.float32)
+
+def acumular_bloque(contadores, bloqueIluminancia, bloqueCondiciones, parametros):
+    '''
+    - ACTUALIZACIÓN DE LOS CONTADORES CON UN BLOQUE DE HORAS -
+
+    Parámetros input
+        contadores - Elemento tipo diccionario, obtenido con iniciar_contadores
+        bloqueIluminancia - Elemento tipo numpy array (Horas del bloque x Sensores)
+        bloqueCondiciones - Elemento tipo numpy array (Schedules x Horas del bloque), valores 0 ó 1
+        parametros - Elemento tipo diccionario con los umbrales, ver parametros_metricas
+    '''
+    bloque = np.asarray(bloqueIluminancia)
+    condiciones = np.asarray(bloqueCondiciones, dtype=np.float32)
+
+    contadores["da"] += conteo_condiciones(condiciones, bloque >= parametros["daIlumValue"])
+    contadores["sda"] += conteo_condiciones(condiciones, bloque >= parametros["sdaIlumValue"])
+    contadores["udi"] += conteo_condiciones(condiciones, (bloque >= parametros["udiIlumMin"]) & (bloque <= parametros["udiIlumMax"]))
+    contadores["sudi"] += conteo_condiciones(condiciones, (bloque >= parametros["sudiIlumMin"]) & (bloque <= parametros["sudiIlumMax"]))
+    for i, umbral in enumerate(parametros["cdiEscala"][1:]):
+        contadores["cdi"][i] += conteo_condiciones(condiciones, bloque >= umbral)
+
+    return 1
+
+def finalizar_contadores(contadores, parametros):
+    '''
+    - CÁLCULO DE LAS MÉTRICAS A PARTIR DE LOS CONTADORES ACUMULADOS -
+
+    Parámetros output
+        listaMetricas - Elemento tipo lista con un diccionario por schedule, idéntico al que devuelve calcular_metricas_par
+    '''
+    listaMetricas = []
+    for k in range(len(contadores["dmcRows"])):
+        dmcRealHours = contadores["dmcRealHours"][k]
+        metricas = agregar_metricas(contadores["da"][k], contadores["sda"][k], contadores["udi"][k], contadores["sudi"][k], dmcRealHours, parametros["sdaPorcentajeHoras"], parametros["sudiPorcentajeHoras"], int(contadores["dmcRows"][k]))
+        metricas.update(cdi_desde_conteos(contadores["cdi"][:, k], dmcRealHours, parametros["cdiPorcentajeSensores"], parametros["cdiEscala"]))
+        listaMetricas.append(metricas)
+
+    return listaMetricas
+
+@instrumentar("calculo.motor_metricas_streaming", filas=lambda argumentos, resultado: max([m["dmcRows"] for m in resultado[0]], default=0))
+def motor_metricas_streaming_perfiles(rutaResultados, listaRutasSchedule, listaParametros, presupuestoMemoriaMB):
+    '''
+    - CÁLCULO DE MÉTRICAS POR BLOQUES DE HORAS, PARA ARCHIVOS results MAYORES A LA MEMORIA DISPONIBLE -
+
+    El archivo results se lee en bloques de horas (los schedules se toman del registro, ver registrar_schedule); con cada bloque se actualizan los contadores por sensor y al finalizar
+    se obtienen DA, sDA, UDI, sUDI, CDI y sCDI. Los resultados son idénticos a los del cálculo con la matriz completa en memoria.
+    Cada perfil de umbrales tiene sus propios contadores, que se actualizan con el mismo bloque: el archivo se lee una sola vez.
+
+    Parámetros input
+        rutaResultados - Elemento tipo string, ruta del archivo results
+        listaRutasSchedule - Elemento tipo lista con las rutas de los K schedules a evaluar
+        listaParametros - Elemento tipo lista con los P diccionarios de umbrales, ver parametros_metricas
+        presupuestoMemoriaMB - Elemento tipo float, memoria aproximada a utilizar por bloque [MB]
+
+    Parámetros output
+        listaMetricasPerfiles - Elemento tipo lista con P listas de K diccionarios, ver calcular_metricas_par
+    '''
+    dmcNsensors = cantidad_horas_sensores(rutaResultados)[1]
+    nSchedules = len(listaRutasSchedule)
+    filas = filas_por_bloque(presupuestoMemoriaMB, dmcNsensors, nSchedules * len(listaParametros))
+    mensaje(f"Lectura por bloques de {filas} pasos de tiempo ({presupuestoMemoriaMB} MB)")
+
+    # LOS SCHEDULES SON PEQUEÑOS (Horas x 5): SUS CONDICIONES SE TOMAN COMPLETAS DEL REGISTRO Y SE RECORTAN POR BLOQUE
+    entradasSchedule = [registrar_schedule(ruta) for ruta in listaRutasSchedule]
+
+    # CON COEFICIENTES DE LUZ NATURAL SÓLO SE CALCULAN LAS HORAS OCUPADAS EN ALGÚN SCHEDULE
+    horasOcupadas = None
+    if fuente_dc(rutaResultados) is not None:
+        horasOcupadas = np.zeros(cantidad_horas_sensores(rutaResultados)[0], dtype=bool)
+        for entradaSchedule in entradasSchedule:
+            condicion = entradaSchedule["condicion"][:len(horasOcupadas)]
+            horasOcupadas[:len(condicion)] |= condicion
+
+    bloques = leer_bloques_resultados(rutaResultados, filas, horasOcupadas)
+    listaMetricasPerfiles, nPasos = metricas_por_bloques(bloques, entradasSchedule, listaParametros, dmcNsensors)
+
+    for rutaSchedule, entradaSchedule in zip(listaRutasSchedule, entradasSchedule):
+        if entradaSchedule["nHoras"] != nPasos:
+            aviso_pasos(rutaResultados, nPasos, rutaSchedule, entradaSchedule)
+
+    return listaMetricasPerfiles
+
+def metricas_por_bloques(bloques, entradasSchedule, listaParametros, dmcNsensors):
+    '''
+    - CÁLCULO DE MÉTRICAS A PARTIR DE UNA SECUENCIA DE BLOQUES DE PASOS DE TIEMPO -
+
+    Es el núcleo de motor_metricas_streaming_perfiles, independiente del origen de los bloques (archivo de texto, matriz binaria mapeada en
+    memoria, producto de coeficientes de luz natural y cielo, o datos generados, ver benchmarks/escalabilidad.py). La memoria no depende de
+    la cantidad de pasos: se mantiene un bloque y los contadores (Perfiles x Schedules x Sensores), y el tiempo crece de forma lineal con
+    pasos x sensores.
+
+    Parámetros input
+        bloques - Elemento tipo iterable de numpy array (Pasos del bloque x Sensores), en orden
+        entradasSchedule - Elemento tipo lista con las K entradas del registro, ver registrar_schedule
+        listaParametros - Elemento tipo lista con los P diccionarios de umbrales, ver parametros_metricas
+        dmcNsensors - Elemento tipo entero, cantidad de sensores
+
+    Parámetros output
+        listaMetricasPerfiles - Elemento tipo lista con P listas de K diccionarios, ver calcular_metricas_par
+        nPasos - Elemento tipo entero, cantidad de pasos recorridos
+    '''
+    nSchedules = len(entradasSchedule)
+    listaContadores = [iniciar_contadores(nSchedules, dmcNsensors, parametros) for parametros in listaParametros]
+
+    inicio = 0
+    for bloqueIluminancia in bloques:
+        nHoras = bloqueIluminancia.shape[0]
+        bloqueCondiciones = np.zeros((nSchedules, nHoras))
+        filasSchedule = np.zeros(nSchedules, dtype=np.int64)
+        for k, entradaSchedule in enumerate(entradasSchedule):
+            condicion = entradaSchedule["condicion"][inicio:inicio + nHoras]
+            bloqueCondiciones[k, :len(condicion)] = condicion
+            filasSchedule[k] = len(condicion)
+        inicio += nHoras
+
+        # LAS HORAS NO OCUPADAS EN NINGÚN SCHEDULE SÓLO CUENTAN COMO FILAS ANALIZADAS
+        ocupadas = bloqueCondiciones.any(axis=0)
+        for contadores in listaContadores:
+            contadores["dmcRows"] += filasSchedule
+        if not ocupadas.any():
+            continue
+        if not ocupadas.all():
+            bloqueIluminancia = bloqueIluminancia[ocupadas]
+            bloqueCondiciones = bloqueCondiciones[:, ocupadas]
+        for contadores, parametros in zip(listaContadores, listaParametros):
+            acumular_bloque(contadores, bloqueIluminancia, bloqueCondiciones, parametros)
+
+    # LAS HORAS REALES CONSIDERAN EL SCHEDULE COMPLETO, AUNQUE SEA MÁS LARGO QUE EL ARCHIVO results
+    listaMetricasPerfiles = []
+    for contadores, parametros in zip(listaContadores, listaParametros):
+        for k, entradaSchedule in enumerate(entradasSchedule):
+            contadores["dmcRealHours"][k] = entradaSchedule["dmcRealHours"]
+        listaMetricasPerfiles.append(finalizar_contadores(contadores, parametros))
+
+    return listaMetricasPerfiles, inicio
+
+def motor_metricas_streaming(rutaResultados, listaRutasSchedule, parametros, presupuestoMemoriaMB):
+    '''
+    - CÁLCULO DE MÉTRICAS POR BLOQUES DE HORAS CON UN ÚNICO CONJUNTO DE UMBRALES, VER motor_metricas_streaming_perfiles -
+
+    Parámetros output
+        listaMetricas - Elemento tipo lista con K diccionarios, ver calcular_metricas_par
+    '''
+    return motor_metricas_streaming_perfiles(rutaResultados, listaRutasSchedule, [parametros], presupuestoMemoriaMB)[0]
+
+def calcular_metricas_perfiles(rutaResultados, rutasSchedule, listaParametros, rutasIndice=None):
+    '''
+    - CÁLCULO DE LAS MÉTRICAS DE UN ARCHIVO results CONTRA UNO O VARIOS SCHEDULES, PARA UNO O VARIOS PERFILES DE UMBRALES -
+
+    Selecciona el motor de cálculo de acuerdo a la configuración (modoStreaming, usarCacheMascaras, evaluacionPorLotes) y al tipo de results
+    (ver lectura_por_bloques). Es la unidad de
+    trabajo que se reparte entre procesos con ejecutar_tareas. El archivo results y los schedules se leen una sola vez para todos los
+    perfiles; sólo el cálculo de las métricas se repite con los umbrales de cada uno.
+
+    Parámetros input
+        rutaResultados - Elemento tipo string, ruta del archivo results
+        rutasSchedule - Elemento tipo lista con las rutas de los K schedules a evaluar
+        listaParametros - Elemento tipo lista con los P diccionarios de umbrales, ver parametros_metricas
+        rutasIndice - Elemento tipo lista con K rutas .npz para guardar el índice de iluminancias ocupadas, o None
+
+    Parámetros output
+        listaMetricasPerfiles - Elemento tipo lista con P listas de K diccionarios, ver calcular_metricas_par
+        listaRows - Elemento tipo lista con K enteros, cantidad de filas analizadas
+        listaRealHours - Elemento tipo lista con K valores, cantidad de horas reales
+    '''
+    if lectura_por_bloques(rutaResultados):
+        # LECTURA (O CÁLCULO, CON COEFICIENTES DE LUZ NATURAL) POR BLOQUES DE HORAS, SIN FORMAR LA MATRIZ COMPLETA
+        listaMetricasPerfiles = motor_metricas_streaming_perfiles(rutaResultados, rutasSchedule, listaParametros, presupuestoMemoriaMB)
+        listaRows = [m["dmcRows"] for m in listaMetricasPerfiles[0]]
+        listaRealHours = [m["dmcRealHours"] for m in listaMetricasPerfiles[0]]
+        return listaMetricasPerfiles, listaRows, listaRealHours
+
+    listaMascaras = [cargar_mascaras_bits(rutaResultados, parametros) if usarCacheMascaras else None for parametros in listaParametros]
+
+    # SI LAS MÁSCARAS DE BITS DE TODOS LOS PERFILES ESTÁN VIGENTES NO ES NECESARIO LEER EL ARCHIVO results
+    if any(mascaras is None for mascaras in listaMascaras) or rutasIndice is not None:
+        matrizResultados = leer_matriz_resultados(rutaResultados)
+        dmcCantFilasResultados = matrizResultados.shape[0]
+    else:
+        mensaje(f"Máscaras de bits vigentes para {rutaResultados}, no se vuelve a leer el archivo")
+        dmcCantFilasResultados = listaMascaras[0]["nHoras"]
+
+    if usarCacheMascaras:
+        for p, parametros in enumerate(listaParametros):
+            if listaMascaras[p] is None:
+                listaMascaras[p] = construir_mascaras_bits(matrizResultados, parametros)
+                guardar_mascaras_bits(listaMascaras[p], rutaResultados)
+
+    # CONDICIONES DE TODOS LOS SCHEDULES, TOMADAS DEL REGISTRO (CADA SCHEDULE SE INTERPRETA UNA SOLA VEZ)
+    listaCondiciones = []
+    listaRealHours = []
+    listaRows = []
+    for rutaSchedule in rutasSchedule:
+        entradaSchedule = registrar_schedule(rutaSchedule)
+        dmcCantFilasSchedule = entradaSchedule["nHoras"]
+
+        if dmcCantFilasResultados == dmcCantFilasSchedule:
+            dmcRows = dmcCantFilasResultados
+        elif dmcCantFilasResultados >= dmcCantFilasSchedule:
+            dmcRows = dmcCantFilasSchedule
+        else:
+            dmcRows = dmcCantFilasResultados
+
+        if dmcCantFilasResultados != dmcCantFilasSchedule:
+            aviso_pasos(rutaResultados, dmcCantFilasResultados, rutaSchedule, entradaSchedule)
+
+        listaCondiciones.append(entradaSchedule["condicion"])
+        listaRealHours.append(entradaSchedule["dmcRealHours"])
+        listaRows.append(dmcRows)
+
+    # CÁLCULO DE LAS MÉTRICAS DE TODOS LOS SCHEDULES Y PERFILES, EN LOTE O PAR POR PAR
+    if usarCacheMascaras:
+        # LAS MÁSCARAS CUBREN TODAS LAS HORAS PARA QUE SIGAN VIGENTES SI CAMBIAN LOS SCHEDULES
+        listaMetricasPerfiles = [metricas_desde_mascaras(mascaras, listaCondiciones, listaRealHours, parametros) for parametros, mascaras in zip(listaParametros, listaMascaras)]
+    elif evaluacionPorLotes:
+        # LA MATRIZ SE COMPACTA UNA SOLA VEZ A LAS HORAS OCUPADAS EN ALGÚN SCHEDULE, PARA TODOS LOS PERFILES
+        bloqueOcupado, condicionesOcupadas, filasAnalizadas = compactar_ocupadas(matrizResultados, listaCondiciones)
+        listaMetricasPerfiles = [motor_metricas_lote(bloqueOcupado, condicionesOcupadas, listaRealHours, parametros, listaRows=filasAnalizadas) for parametros in listaParametros]
+    else:
+        # CADA PAR results/schedule SE COMPACTA UNA SOLA VEZ A SUS HORAS OCUPADAS, PARA TODOS LOS PERFILES
+        listaMetricasPerfiles = [[] for parametros in listaParametros]
+        for k, vectorCondicion in enumerate(listaCondiciones):
+            bloqueOcupado, _, filasAnalizadas = compactar_ocupadas(matrizResultados, [vectorCondicion])
+            for p, parametros in enumerate(listaParametros):
+                listaMetricasPerfiles[p].append(calcular_metricas_par(bloqueOcupado, None, listaRealHours[k], parametros, dmcRows=filasAnalizadas[0]))
+
+    # EL ÍNDICE DE ILUMINANCIAS OCUPADAS NO DEPENDE DE LOS UMBRALES, ES EL MISMO PARA TODOS LOS PERFILES
+    if rutasIndice is not None:
+        for k in range(len(rutasIndice)):
+            guardar_indice_ocupado(construir_indice_ocupado(matrizResultados, listaCondiciones[k]), rutasIndice[k])
+
+    return listaMetricasPerfiles, listaRows, listaRealHours
+
+def calcular_metricas_resultados(rutaResultados, rutasSchedule, parametros, rutasIndice=None):
+    '''
+    - CÁLCULO DE LAS MÉTRICAS DE UN ARCHIVO results CON UN ÚNICO CONJUNTO DE UMBRALES, VER calcular_metricas_perfiles -
+
+    Parámetros output
+        listaMetricas - Elemento tipo lista con K diccionarios, ver calcular_metricas_par
+        listaRows - Elemento tipo lista con K enteros, cantidad de filas analizadas
+        listaRealHours - Elemento tipo lista con K valores, cantidad de horas reales
+    '''
+    listaMetricasPerfiles, listaRows, listaRealHours = calcular_metricas_perfiles(rutaResultados, rutasSchedule, [parametros], rutasIndice)
+    return listaMetricasPerfiles[0], listaRows, listaRealHours
+
+def preparar_cache_resultados(rutaResultados, listaParametros):
+    '''
+    - GENERACIÓN DE LA CACHE DE UN ARCHIVO results ANTES DE REPARTIR SUS SCHEDULES ENTRE PROCESOS -
+
+    El archivo de texto se interpreta una única vez; luego cada proceso abre el .npy con np.load(mmap_mode='r'), de modo que todos
+    comparten las mismas páginas de memoria del sistema operativo en lugar de recibir una copia de la matriz.
+    Con usarCacheMascaras se generan también las máscaras de bits de cada perfil de umbrales de listaParametros. Los results que se calculan
+    por bloques de horas no tienen cache.
+    '''
+    if lectura_por_bloques(rutaResultados):
+        return 1
+    if usarCacheMascaras:
+        for parametros in listaParametros:
+            if cargar_mascaras_bits(rutaResultados, parametros) is None:
+                guardar_mascaras_bits(construir_mascaras_bits(leer_matriz_resultados(rutaResultados), parametros), rutaResultados)
+    elif usarCacheCSV:
+        leer_matriz_resultados(rutaResultados)
+    return 1
+
+def dividir_tareas(listaTareas, procesos):
+    '''
+    - REPARTO DE LOS PARES results/schedule EN TAREAS -
+
+    Cada tarea corresponde a un archivo results con sus schedules. Si hay menos archivos results que procesos, los schedules de cada
+    archivo se dividen en grupos consecutivos, para ocupar todos los procesos. El orden de las tareas conserva el orden de los pares.
+
+    Parámetros input
+        listaTareas - Elemento tipo lista de diccionarios {"posicion", "rutaResultados", "rutasSchedule", "rutasIndice"}, opcionalmente "perfiles"
+        procesos - Elemento tipo entero, cantidad de procesos
+
+    Parámetros output
+        tareas - Elemento tipo lista de diccionarios con la misma estructura
+    '''
+    if modoStreaming or procesos <= len(listaTareas):
+        # EN MODO STREAMING CADA TAREA VUELVE A LEER EL ARCHIVO results, NO SE DIVIDEN SUS SCHEDULES
+        return listaTareas
+
+    gruposPorArchivo = int(np.ceil(procesos / max(len(listaTareas), 1)))
+    tareas = []
+    for tarea in listaTareas:
+        if fuente_dc(tarea["rutaResultados"]) is not None:
+            # CADA GRUPO VOLVERÍA A CALCULAR EL PRODUCTO DE MATRICES, LOS SCHEDULES DE UNA FUENTE DE COEFICIENTES NO SE DIVIDEN
+            tareas.append(tarea)
+            continue
+        nSchedules = len(tarea["rutasSchedule"])
+        tamanio = max(int(np.ceil(nSchedules / gruposPorArchivo)), 1)
+        for inicio in range(0, nSchedules, tamanio):
+            tareas.append(dict(tarea,
+                                rutasSchedule=tarea["rutasSchedule"][inicio:inicio + tamanio],
+                                rutasIndice=None if tarea["rutasIndice"] is None else tarea["rutasIndice"][inicio:inicio + tamanio]))
+    return tareas
+
+def parametros_tarea(tarea, listaParametros):
+    '''
+    - UMBRALES DE LOS PERFILES QUE SE CALCULAN EN UNA TAREA -
+
+    La clave "perfiles" de la tarea indica las posiciones de listaParametros a calcular; si no está, se calculan todos los perfiles
+    '''
+    return [listaParametros[p] for p in tarea.get("perfiles", range(len(listaParametros)))]
+
+def procesar_tarea(tarea, listaParametros):
+    '''
+    - EJECUCIÓN DE UNA TAREA EN UN PROCESO DEL POOL -
+    '''
+    return calcular_metricas_perfiles(tarea["rutaResultados"], tarea["rutasSchedule"], parametros_tarea(tarea, listaParametros), tarea["rutasIndice"])
+
+def iterar_tareas(listaTareas, listaParametros, procesos):
+    '''
+    - CÁLCULO DE LAS MÉTRICAS DE TODOS LOS PARES results/schedule, EN UNO O VARIOS PROCESOS -
+
+    Las tareas se reparten en un ProcessPoolExecutor. A los procesos sólo se envían rutas y parámetros: las matrices se leen de la cache
+    binaria con mmap, y sólo se devuelven los vectores por sensor. Los resultados se entregan en el orden de listaTareas, a medida que
+    están disponibles, por lo que los archivos de salida no dependen de la cantidad de procesos ni del orden en que terminan, y cada
+    resultado se puede guardar antes de que finalicen las tareas siguientes.
+
+    Parámetros input
+        listaTareas - Elemento tipo lista de diccionarios {"posicion", "rutaResultados", "rutasSchedule", "rutasIndice"}, una por archivo results.
+        La clave opcional "perfiles" indica las posiciones de listaParametros a calcular en la tarea, ver parametros_tarea
+        listaParametros - Elemento tipo lista con los diccionarios de umbrales de cada perfil, ver parametros_metricas
+        procesos - Elemento tipo entero, cantidad de procesos. 1 ejecuta todo en el proceso principal
+
+    Parámetros output
+        generador - una tupla (listaMetricasPerfiles, listaRows, listaRealHours) por elemento de listaTareas, ver calcular_metricas_perfiles
+    '''
+    if procesos <= 1 or len(listaTareas) == 0:
+        for tarea in listaTareas:
+            yield procesar_tarea(tarea, listaParametros)
+        return
+
+    tareas = dividir_tareas([dict(tarea, posicion=i) for i, tarea in enumerate(listaTareas)], procesos)
+    with ProcessPoolExecutor(max_workers=min(procesos, len(tareas)), initializer=configurar_instrumentacion, initargs=parametros_instrumentacion()) as executor:
+        # LOS ARCHIVOS results COMPARTIDOS POR VARIAS TAREAS SE INTERPRETAN UNA SOLA VEZ, ANTES DE REPARTIRLOS
+        if len(tareas) > len(listaTareas):
+            rutasCompartidas = [tarea["rutaResultados"] for tarea in listaTareas]
+            parametrosCompartidos = [parametros_tarea(tarea, listaParametros) for tarea in listaTareas]
+            n = len(rutasCompartidas)
+            for _, etapas, contadores in executor.map(ejecutar_instrumentado, [preparar_cache_resultados] * n, rutasCompartidas, parametrosCompartidos):
+                acumular_instrumentacion(etapas, contadores)
+
+        # LAS TAREAS DE UN MISMO ARCHIVO results SON CONSECUTIVAS, SE REÚNEN ANTES DE ENTREGARLAS
+        posicionActual = 0
+        acumulado = None
+        n = len(tareas)
+        for tarea, (resultado, etapas, contadores) in zip(tareas, executor.map(ejecutar_instrumentado, [procesar_tarea] * n, tareas, [listaParametros] * n)):
+            acumular_instrumentacion(etapas, contadores)
+            if tarea["posicion"] != posicionActual:
+                yield acumulado
+                posicionActual = tarea["posicion"]
+                acumulado = None
+            if acumulado is None:
+                acumulado = ([[] for _ in resultado[0]], [], [])
+            for lista, valores in zip(acumulado[0], resultado[0]):
+                lista.extend(valores)
+            acumulado[1].extend(resultado[1])
+            acumulado[2].extend(resultado[2])
+        yield acumulado
+
+def ejecutar_tareas(listaTareas, listaParametros, procesos):
+    '''
+    - CÁLCULO DE LAS MÉTRICAS DE TODOS LOS PARES, VER iterar_tareas -
+
+    Parámetros output
+        resultados - Elemento tipo lista con una tupla (listaMetricasPerfiles, listaRows, listaRealHours) por elemento de listaTareas
+    '''
+    return list(iterar_tareas(listaTareas, listaParametros, procesos))
+
+def valor_json(valor):
+    '''
+    - CONVERSIÓN DE ESCALARES DE NUMPY A TIPOS DE PYTHON, PARA GUARDARLOS EN FORMATO JSON -
+    '''
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+def huella_archivo(rutaArchivo, huellaAnterior=None):
+    '''
+    - HUELLA DE UN ARCHIVO DE ENTRADA: FIRMA Y HASH DEL CONTENIDO -
+
+    Si el tamaño y la fecha de modificación coinciden con los de huellaAnterior, se reutiliza su hash sin volver a leer el archivo
+
+    Parámetros output
+        huella - Elemento tipo diccionario {"ruta", "tamanio", "mtime", "hash"}
+    '''
+    firma = firma_archivo(rutaArchivo)
+    if huellaAnterior is not None and huellaAnterior.get("tamanio") == firma["tamanio"] and huellaAnterior.get("mtime") == firma["mtime"]:
+        return dict(huellaAnterior, ruta=firma["ruta"])
+    huella = dict(firma)
+    huella["hash"] = hash_contenido(rutaArchivo)
+    return huella
+
+def cargar_manifiesto(filesPathProcesados):
+    '''
+    - LECTURA DEL MANIFIESTO DE UNA CARPETA DE SALIDA -
+
+    El manifiesto (archivoManifiesto) tiene una línea JSON por par results/schedule calculado, con las huellas de los archivos de entrada,
+    los umbrales utilizados, los archivos de salida y la fila del archivo unificado. Si un par aparece más de una vez vale la última línea;
+    una línea incompleta (ejecución interrumpida) se descarta.
+
+    Parámetros output
+        manifiesto - Elemento tipo diccionario {clave del par: entrada}
+    '''
+    manifiesto = {}
+    rutaManifiesto = filesPathProcesados + archivoManifiesto
+    if not os.path.isfile(rutaManifiesto):
+        return manifiesto
+
+    with open(rutaManifiesto, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                entrada = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            if entrada.get("version") == versionManifiesto:
+                manifiesto[entrada["clave"]] = entrada
+    return manifiesto
+
+def registrar_par_manifiesto(filesPathProcesados, entrada):
+    '''
+    - REGISTRO DE UN PAR CALCULADO EN EL MANIFIESTO -
+
+    Se agrega una línea y se fuerza su escritura en disco, de modo que si la ejecución se interrumpe, al reiniciarla sólo se calculan
+    los pares que faltan
+    '''
+    os.makedirs(filesPathProcesados, exist_ok=True)
+    with open(filesPathProcesados + archivoManifiesto, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entrada, sort_keys=True) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return 1
+
+def compactar_manifiesto(filesPathProcesados, manifiesto):
+    '''
+    - REESCRITURA DEL MANIFIESTO CON UNA LÍNEA POR PAR VIGENTE -
+
+    Como registrar_manifiesto, crea la carpeta de salida: sin pares que calcular nadie la genera antes
+    '''
+    os.makedirs(filesPathProcesados, exist_ok=True)
+    rutaManifiesto = filesPathProcesados + archivoManifiesto
+    rutaTemporal = rutaManifiesto + f".{os.getpid()}.tmp"
+    with open(rutaTemporal, "w", encoding="utf-8") as f:
+        for clave in manifiesto:
+            f.write(json.dumps(manifiesto[clave], sort_keys=True) + "\n")
+    os.replace(rutaTemporal, rutaManifiesto)
+    return 1
+
+def par_vigente(entrada, huellaResultados, huellaSchedule, parametros, salidas):
+    '''
+    - VERIFICACIÓN DE UN PAR DEL MANIFIESTO -
+
+    Parámetros input
+        entrada - Elemento tipo diccionario, entrada del manifiesto o None
+        huellaResultados, huellaSchedule - Elemento tipo diccionario, obtenidos con huella_archivo
+        parametros - Elemento tipo diccionario con los umbrales, ver parametros_metricas
+        salidas - Elemento tipo lista con las rutas de los archivos de salida que debe tener el par
+
+    Parámetros output
+        vigente - Elemento tipo booleano, True si las entradas y los umbrales no cambiaron y las salidas existen
+    '''
+    if entrada is None:
+        return False
+    if entrada["resultados"]["hash"] != huellaResultados["hash"] or entrada["schedule"]["hash"] != huellaSchedule["hash"]:
+        return False
+    if entrada["config"] != json.loads(json.dumps(parametros)):
+        return False
+    return all(os.path.isfile(ruta) for ruta in salidas)
+
+def tabla_sensores(daIlumHoursCount, daOcurranceRate, udiIlumHoursCount, udiOcurranceRate, cdiList, sdaSensorCount, sdaOccurrancePercentSensor, sUDIsensorCount, sUDIsensorOccurrance, parametros):
+    '''
+    - TABLA DE MÉTRICAS POR SENSOR DE UN PAR results/schedule -
+
+    Es el contenido de los archivos "procesados-...", cualquiera sea su formato (ver formatoSalida)
+
+    Parámetros output
+        dfArchivo - Elemento tipo Pandas DataFrame, una fila por sensor
+    '''
+    dfArchivo = pd.DataFrame()
+   
+    dfArchivo['DA Horas Contabilizadas'] = daIlumHoursCount
+    dfArchivo['DA Frecuencia de Ocurrencia'] = daOcurranceRate
+    dfArchivo['UDI Horas Contabilizadas'] = udiIlumHoursCount
+    dfArchivo['UDI Frecuencia de Ocurrencia'] = udiOcurranceRate
+    dfArchivo['CDI'] = cdiList
+    dfArchivo['SDA Contabilizacion de sensores'] = sdaSensorCount
+    dfArchivo[f'SDA Frecuencia de Ocurrencia mayor al {(parametros["sdaPorcentajeHoras"]*100)} %'] = sdaOccurrancePercentSensor
+    dfArchivo['sUDI Sensores Contabilizados'] = sUDIsensorCount
+    dfArchivo[f'sUDI Frecuencia de ocurrencia mayor al {(parametros["sudiPorcentajeHoras"]*100)} %'] = sUDIsensorOccurrance
+    return dfArchivo
+
+@instrumentar("escritura.csv", filas=lambda argumentos, resultado: len(argumentos[4]))
+def creacion_archivos(filePath, nombre, pathResultados, pathSchedule ,daIlumHoursCount, daOcurranceRate, daAverageOcurranceRate, udiIlumHoursCount, udiOcurranceRate, udiAverageOcurranceRate, udiHours, sUDIpercentual,  sUDIsensorCount, sUDIsensorOccurrance, sdaSensorCount, sdaOccurrancePercentSensor, sdaAnualOccurranceRate, sdaHoras, cdiList, sCDI, CDI, dmcRows, dmcNsensors, sUDIhs, parametros=None):
+    '''
+    - GENERACIÓN DE ARCHIVOS CON LOS DATOS PROCESADOS
+        Se generan los archivos "procesados-..." con los datos calculados, en el directorio indicado.
+        Los umbrales que se informan en el encabezado se toman de parametros (por defecto parametros_metricas())
+        
+    '''
+    if parametros is None:
+        parametros = parametros_metricas()
+    dfArchivo = tabla_sensores(daIlumHoursCount, daOcurranceRate, udiIlumHoursCount, udiOcurranceRate, cdiList, sdaSensorCount, sdaOccurrancePercentSensor, sUDIsensorCount, sUDIsensorOccurrance, parametros)
+    
+    fileName = procesadosFileReference+nombre+'.csv'
+    #fileNameTodo = 'otroResumen-'+nombre+'.csv'
 
     if os.path.isdir(filePath):
         #print("La carpeta existe")
@@ -606,39 +3082,43 @@ def creacion_archivos(filePath, nombre, pathResultados, pathSchedule ,daIlumHour
         path = filePath
         #print(f"Se creo la carpeta results la ruta es {path}")
 
-    with open(path+fileName, 'a') as f:
+    # SE ESCRIBE EN UN ARCHIVO TEMPORAL QUE REEMPLAZA AL ANTERIOR, EN LUGAR DE AGREGAR AL FINAL DEL ARCHIVO EXISTENTE
+    rutaTemporal = path + fileName + f".{os.getpid()}.tmp"
+    with open(rutaTemporal, 'w') as f:
         f.write("ARCHIVOS FUENTE:\n")
         f.write(pathResultados)
         f.write("\n")
         f.write(pathSchedule)
         f.write("\n")    
         f.write("\n")
-        f.write(f"DA iluminancia limite [lx]: {daIlumValue}\n")
-        f.write(f"sDA [%]: {sdaPorcentajeHoras}\n")
-        f.write(f"UDI iluminancia maxima [lx]: {udiIlumMax}\n")
-        f.write(f"UDI iluminancia minima [lx]: {udiIlumMin}\n")
-        f.write(f"sUDI [%]: {sudiPorcentajeHoras}\n")
+        f.write(f"DA iluminancia limite [lx]: {parametros['daIlumValue']}\n")
+        f.write(f"sDA [%]: {parametros['sdaPorcentajeHoras']}\n")
+        f.write(f"UDI iluminancia maxima [lx]: {parametros['udiIlumMax']}\n")
+        f.write(f"UDI iluminancia minima [lx]: {parametros['udiIlumMin']}\n")
+        f.write(f"sUDI [%]: {parametros['sudiPorcentajeHoras']}\n")
         f.write("\n")
         f.write("METRICAS DINÁMICAS\n")
         f.write("\n")
-        f.write(f"DA - Horas de cumplimiento de [{daIlumValue} lx]: {daAverageOcurranceRate:.2f}\n")
+        f.write(f"DA - Horas de cumplimiento de [{parametros['daIlumValue']} lx]: {daAverageOcurranceRate:.2f}\n")
         f.write(f"sDA: {sdaAnualOccurranceRate:.2f}\n") 
-        f.write(f"sDA - Horas con cumplimiento del {(sdaPorcentajeHoras*100)} %: {int(sdaHoras)}\n") #falta incluir las horas de sDA
+        f.write(f"sDA - Horas con cumplimiento del {(parametros['sdaPorcentajeHoras']*100)} %: {int(sdaHoras)}\n") #falta incluir las horas de sDA
         f.write("\n")
         f.write(f"UDI: {udiAverageOcurranceRate:.2f}\n")
-        f.write(f"UDI - Horas de cumplimiento de [{udiIlumMin} - {udiIlumMax} lx]: {udiHours}\n")
+        f.write(f"UDI - Horas de cumplimiento de [{parametros['udiIlumMin']} - {parametros['udiIlumMax']} lx]: {udiHours}\n")
         f.write(f"sUDI: {sUDIpercentual:.2f}\n")  
-        f.write(f"sUDI - Horas con cumplimiento del {(sudiPorcentajeHoras*100)} %: {int(sUDIhs)}\n")
+        f.write(f"sUDI - Horas con cumplimiento del {(parametros['sudiPorcentajeHoras']*100)} %: {int(sUDIhs)}\n")
         f.write(f"CDI: {CDI}\n")
         for k in sCDI:
             f.write(f"sCDI - {k}: {sCDI[k]:.2f} \n")     
         f.write("\n")
         
-    dfArchivo.to_csv(path+fileName, mode='a')
+    dfArchivo.to_csv(rutaTemporal, mode='a')
+    os.replace(rutaTemporal, path+fileName)
     
     return 1
 
-def crear_archivo_unificado(filesPath, indice, dfUnificado):
+@instrumentar("escritura.unificado", filas=lambda argumentos, resultado: len(argumentos[2]))
+def crear_archivo_unificado(filesPath, indice, dfUnificado, formato="csv", metadatos=None):
     '''
     - GENERACIÓN DE ARCHIVOS CON LOS DATOS UNIFICADOS
         Se genera el archivo "unificado" con los datos calculados, en el directorio indicado.
@@ -647,6 +3127,8 @@ def crear_archivo_unificado(filesPath, indice, dfUnificado):
         filesPath - Elemento tipo String, indica la ruta a la carpeto donde se guardará el archivo
         indice - Elemento tipo diccionario, contiene las rutas de los archivos procesados
         dfUnificado - Elemento tipo Panda dataframe, contiene la información a guardar en el archivo
+        formato - Elemento tipo string, "csv", "parquet", "feather" o "npz", ver guardar_tabla
+        metadatos - Elemento tipo diccionario, se guarda en los formatos que no son csv, junto con el parentID
         
     Parámetros Output
         archivo unificado generado en el filePath indicado
@@ -661,12 +3143,19 @@ def crear_archivo_unificado(filesPath, indice, dfUnificado):
         path = filesPath
         #print(f"Se creo la carpeta results la ruta es {path}")
 
+    # LAS FILAS DE CADA parentID SE SEPARAN CON UN ÚNICO RECORRIDO DEL DATAFRAME
+    gruposParent = {parentID: dfGrupo for parentID, dfGrupo in dfUnificado.groupby('parentID', sort=False)}
     for elemento in indice:
-        dfAux = dfUnificado.query('parentID == @elemento')  
-        print(dfAux)     
+        dfAux = gruposParent.get(elemento, dfUnificado.iloc[0:0])
+        mensaje(dfAux, nivel=2)     
         fileNameUnificado = 'unificado_results_'+elemento+'.csv'
         dfAux.drop(columns = 'parentID')
-        dfAux.to_csv(path+fileNameUnificado, index = False ,mode='a')
+        if formato != "csv":
+            guardar_tabla(dfAux, path + 'unificado_results_' + elemento + extensionesSalida[formato], formato, dict(metadatos or {}, tabla="unificado", parentID=elemento))
+            continue
+        rutaTemporal = path + fileNameUnificado + f".{os.getpid()}.tmp"
+        dfAux.to_csv(rutaTemporal, index = False)
+        os.replace(rutaTemporal, path+fileNameUnificado)
     return 1
 
 def get_parentID_childID(listaNombreArchivosProcesados, listaNombreArchivosCoordenadas):
@@ -739,8 +3228,10 @@ def get_dataframe_fileNames(fileList):
     parametersList = []
     
     # Separamos las partes según el simbolo, obteniendo los diferentes descriptores de la lista de archivos a procesar
+    # EL resultID PUEDE INCLUIR "_": EL parentID ES EL PRIMER TRAMO Y EL scheduleID EL ÚLTIMO
     for r in fileList:
-        parametersList.append(r.split(underScore)) 
+        parentID, resto = r.split(underScore, 1)
+        parametersList.append([parentID] + resto.rsplit(underScore, 1))
 
     df = pd.DataFrame(parametersList, columns=['parentID', 'resultID', 'scheduleID'])
 
@@ -790,401 +3281,1245 @@ def generar_carpeta_imagenes(filePath,nombreCarpetaImagen):
     return 1
 
 
-''' - INICIO PROGRAMA PRINCIPAL - '''
-print("#########   CALCULATION OF DYNAMIC METRICS    ######### \n")
-startTime = datetime.now()
-extensionCSV = ".csv"
-listarArchivos = {"resultados":[], "schedules":[]}
+def rutas_por_defecto():
+    '''
+    - CARPETAS CONFIGURADAS AL INICIO DEL PROGRAMA -
+    '''
+    return {"datos": filesPathData, "coordenadas": filesPathCoordenadas, "procesados": filesPathProcesados, "imagenes": filePathsImagen}
 
-listarArchivos["resultados"] = listar_archivos(filesPathData, "results_", extensionCSV)
-listarArchivos["schedules"] = listar_archivos(filesPathData, "schedule_", extensionCSV)
+def ruta_carpeta(ruta):
+    '''
+    - RUTA DE UNA CARPETA COMO STRING TERMINADO EN SEPARADOR -
 
-resultsDict, schedulesDict, schedulesIndex = split_filenames(listarArchivos)
+    Las carpetas se concatenan con los nombres de los archivos, por lo que deben terminar en el separador del sistema operativo
 
-print(f"El resultsDict contiene \n {resultsDict} \n")
+    Parámetros input
+        ruta - Elemento tipo string o pathlib.Path
 
-resultsRecount = count_ocurrencies(resultsDict, "parentID")
-schedulesRecount = count_ocurrencies(schedulesDict, "parentID")
+    Parámetros output
+        ruta - Elemento tipo string
+    '''
+    ruta = os.path.expanduser(os.fspath(ruta))
+    if ruta.endswith(("/", os.sep)):
+        return ruta
+    return ruta + os.sep
 
-longitudRecuentoR = len(resultsRecount)
-longitudRecuentoS = len(schedulesRecount)
+def perfiles_umbrales(perfiles, parametros, paths):
+    '''
+    - PERFILES DE UMBRALES A EVALUAR EN UNA EJECUCIÓN -
 
-# REVISAMOS INTEGRIDAD DE LAS CANTIDADES Y TIPOS DE APELLIDOS DE LOS ARCHIVOS results Y schedule
-if longitudRecuentoR != longitudRecuentoS:
-    flagIntegrityCheck = 1
-else:
-    flagIntegrityCheck = 0
-    keysR = list(resultsRecount.keys())
-    keysS = list(schedulesRecount.keys())
+    Cada perfil modifica los umbrales base con sus propios valores (ver configurar_parametros) y guarda sus salidas en una subcarpeta
+    con su nombre, dentro de las carpetas de procesados y de imágenes.
 
-    for i in range(0,longitudRecuentoR):
-        if keysR[i] != keysS[i]:
-            flagIntegrityCheck = 2
-            break
+    Parámetros input
+        perfiles - Elemento tipo lista de diccionarios, por ejemplo [{"nombre": "LEED", "daIlumValue": 300}], o lista vacía
+        parametros - Elemento tipo diccionario, umbrales base, ver parametros_metricas
+        paths - Elemento tipo diccionario con las carpetas, ver run_batch
+
+    Parámetros output
+        listaPerfiles - Elemento tipo lista de diccionarios {"nombre", "parametros", "procesados", "imagenes"}. Sin perfiles, un único
+        perfil con nombre None, los umbrales base y las carpetas de paths
+    '''
+    if not perfiles:
+        return [{"nombre": None, "parametros": parametros, "procesados": paths["procesados"], "imagenes": paths["imagenes"]}]
+
+    listaPerfiles = []
+    for perfil in perfiles:
+        nombre = str(perfil.get("nombre", ""))
+        if nombre in ("", ".", "..") or any(caracter in nombre for caracter in '/\\:'):
+            raise ValueError(f"Nombre de perfil no válido: {nombre!r}")
+        if nombre in [p["nombre"] for p in listaPerfiles]:
+            raise ValueError(f"Perfil repetido: {nombre}")
+        listaPerfiles.append({
+                                "nombre": nombre,
+                                "parametros": configurar_parametros({k: v for k, v in perfil.items() if k != "nombre"}, parametros),
+                                "procesados": os.path.join(paths["procesados"], nombre, ""),
+                                "imagenes": os.path.join(paths["imagenes"], nombre, "")
+                            })
+    return listaPerfiles
+
+def importar_tomllib():
+    '''
+    - IMPORTACIÓN DIFERIDA DEL LECTOR DE ARCHIVOS TOML -
+
+    Se utiliza tomllib (Python 3.11 o posterior) o, en versiones anteriores, el paquete tomli
+
+    Parámetros output
+        tomllib - Elemento tipo módulo, o None si no está disponible
+    '''
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            return None
+    return tomllib
+
+def leer_toml_json(rutaArchivo):
+    '''
+    - LECTURA DE UN ARCHIVO TOML O JSON (CONFIGURACIÓN DE UNA EJECUCIÓN, DEFINICIÓN DE UN SCHEDULE) -
+
+    Parámetros output
+        contenido - Elemento tipo diccionario (o el valor JSON leído)
+    '''
+    rutaArchivo = pathlib.Path(rutaArchivo)
+    extension = rutaArchivo.suffix.lower()
+    if extension == ".toml":
+        tomllib = importar_tomllib()
+        if tomllib is None:
+            raise ImportError("Los archivos TOML requieren Python 3.11 o el paquete tomli (pip install tomli); también se puede utilizar JSON")
+        with open(rutaArchivo, "rb") as f:
+            return tomllib.load(f)
+    if extension == ".json":
+        with open(rutaArchivo, "r", encoding="utf-8") as f:
+            return json.load(f)
+    raise ValueError(f"Formato no soportado: {rutaArchivo.suffix} (utilice .toml o .json)")
+
+def cargar_configuracion(rutaConfiguracion):
+    '''
+    - LECTURA DEL ARCHIVO DE CONFIGURACIÓN DE UNA EJECUCIÓN (TOML O JSON) -
+
+    Todas las secciones son opcionales; los valores omitidos toman los configurados al inicio del programa:
+        rutas - {"datos", "coordenadas", "procesados", "imagenes"}, relativas a la carpeta del archivo de configuración
+        umbrales - umbrales a modificar, ver parametros_metricas
+        perfiles - lista de perfiles de umbrales {"nombre", umbrales...}, ver perfiles_umbrales
+        ejecucion - {"workers", "plots", "incremental", "formatoSalida", "detalle", "eventos", "vigilar", "intervaloVigilancia"}
+        graficos - opciones de las imágenes, ver opciones_graficos
+
+    Parámetros input
+        rutaConfiguracion - Elemento tipo string o pathlib.Path, archivo .toml o .json
+
+    Parámetros output
+        configuracion - Elemento tipo diccionario con las secciones leídas; las rutas como strings terminados en separador
+    '''
+    rutaConfiguracion = pathlib.Path(rutaConfiguracion)
+    configuracion = leer_toml_json(rutaConfiguracion)
+
+    clavesSecciones = {
+                        "rutas": ["datos", "coordenadas", "procesados", "imagenes"],
+                        "umbrales": list(parametros_metricas()),
+                        "ejecucion": ["workers", "plots", "incremental", "formatoSalida", "detalle", "eventos", "vigilar", "intervaloVigilancia"],
+                        "graficos": list(opciones_graficos())
+                    }
+    for seccion, valores in configuracion.items():
+        if seccion == "perfiles":
+            if not isinstance(valores, list):
+                raise ValueError("La sección perfiles debe ser una lista de perfiles")
+            continue
+        if seccion not in clavesSecciones:
+            raise KeyError(f"Sección desconocida en {rutaConfiguracion}: {seccion}")
+        for clave in valores:
+            if clave not in clavesSecciones[seccion]:
+                raise KeyError(f"Parámetro desconocido en {rutaConfiguracion}: {seccion}.{clave}")
+
+    # LAS RUTAS RELATIVAS SE TOMAN DESDE LA CARPETA DEL ARCHIVO DE CONFIGURACIÓN, CON EL SEPARADOR DEL SISTEMA OPERATIVO
+    carpetaConfiguracion = rutaConfiguracion.parent
+    configuracion["rutas"] = {clave: ruta_carpeta(carpetaConfiguracion / pathlib.Path(os.path.expanduser(ruta))) for clave, ruta in configuracion.get("rutas", {}).items()}
+    if "carpetaImagen" in configuracion.get("graficos", {}):
+        configuracion["graficos"]["carpetaImagen"] = ruta_carpeta(pathlib.Path(configuracion["graficos"]["carpetaImagen"]))
+    return configuracion
+
+def valor_configurado(valorLinea, seccion, clave, valorDefecto):
+    '''
+    - VALOR DE UNA OPCIÓN DE EJECUCIÓN -
+
+    La línea de comandos tiene prioridad sobre el archivo de configuración, y éste sobre los valores configurados al inicio del programa
+
+    Parámetros input
+        valorLinea - valor indicado en la línea de comandos, o None
+        seccion - Elemento tipo diccionario, sección del archivo de configuración (ver cargar_configuracion)
+        clave - Elemento tipo string
+        valorDefecto - valor configurado al inicio del programa
+    '''
+    if valorLinea is not None:
+        return valorLinea
+    return seccion.get(clave, valorDefecto)
+
+def umbrales_linea_comandos(asignaciones):
+    '''
+    - UMBRALES INDICADOS EN LA LÍNEA DE COMANDOS CON --umbral CLAVE=VALOR -
+
+    Los valores se interpretan como JSON (números, listas); si no son JSON válido se toman como texto
+
+    Parámetros output
+        umbrales - Elemento tipo diccionario
+    '''
+    umbrales = {}
+    for asignacion in asignaciones or []:
+        if "=" not in asignacion:
+            raise ValueError(f"Umbral no válido: {asignacion} (utilice CLAVE=VALOR)")
+        clave, valor = asignacion.split("=", 1)
+        try:
+            umbrales[clave.strip()] = json.loads(valor)
+        except json.JSONDecodeError:
+            umbrales[clave.strip()] = valor
+    return umbrales
+
+def compute_metrics(illuminance, schedule, config=None):
+    '''
+    - API: MÉTRICAS DINÁMICAS DE UNA MATRIZ DE ILUMINANCIAS EN MEMORIA -
+
+    Permite calcular DA, sDA, UDI, sUDI, CDI y sCDI desde otro programa, sin leer ni escribir archivos.
+
+    Parámetros input
+        illuminance - Elemento tipo numpy array o Pandas DataFrame (Horas x Sensores), con los valores de iluminancia [lx]
+        schedule - Elemento tipo numpy array o Pandas DataFrame. Puede ser la matriz del archivo schedule (Horas x 5, columna 3 ocupación y
+        columna 4 período de análisis), directamente el vector de condición (Horas), con valores 0 ó 1, o un diccionario con la definición
+        por reglas (ver expandir_schedule), que se expande una sola vez por proceso
+        config - Elemento tipo diccionario con los umbrales a modificar, ver parametros_metricas. Por defecto los configurados al inicio
+
+    Parámetros output
+        metricas - Elemento tipo diccionario, ver calcular_metricas_par, con los conteos en pasos de tiempo. Incluye además "parametros", los
+        umbrales utilizados, y "pasoMinutos", el paso de tiempo del schedule (ver paso_schedule y horas_de_pasos)
+    '''
+    parametros = configurar_parametros(config)
+    matriz = np.asarray(illuminance, dtype=float)
+    if matriz.ndim == 1:
+        matriz = matriz[:, np.newaxis]
+
+    if isinstance(schedule, dict):
+        entradaSchedule = registrar_schedule(schedule)
+        vectorCondicion, dmcRealHours, pasoSchedule = entradaSchedule["condicion"], entradaSchedule["dmcRealHours"], entradaSchedule["pasoMinutos"]
+    else:
+        horario = np.asarray(schedule, dtype=float)
+        if horario.ndim == 2:
+            dfCondiciones = pd.DataFrame({'ocupacion': horario[:, 3], 'periodoAnalisis': horario[:, 4]})
+            dmcCondicion, dmcRealHours = dmc_condicion_and_realHours(dfCondiciones, min(matriz.shape[0], horario.shape[0]))
+            vectorCondicion = dmcCondicion['condicion'].to_numpy()
+            pasoSchedule = paso_schedule(horario)
         else:
-            flagIntegrityCheck = 0
-#   ###########################################################################
-
-#   Generamos mensajes de error si hubieran
-if flagIntegrityCheck != 0:
-    print("HA OCURRIDO UN ERROR")
-    if flagIntegrityCheck == 1:
-        print("ATENCIÓN: NO SE CUMPLE LA CONDICIÓN DE IGUALDAD EN LOS IDENTIFICADORES USADOS PARA RESULTADOS Y SCHEDULES")
-        print("Favor de revisar los identidicadores usados para los rchivos de resultados y los schedules sean no sean diferentes.")
-        exit()
-    elif flagIntegrityCheck == 2:
-        print("ATENCION: REVISE LOS NOMBRES ASIGANDOS PARA LOS PARES RESULTADOS Y SCHEDULES")
-        print("Los nombres para identificar los results con los schedules no coinciden, favor revisar.")
-        exit()
-    elif flagIntegrityCheck > 2 or flagIntegrityCheck < 0:
-        print("ERROR INDETERMINADO !!!")
-        print("Revise integridad de los datos")
-        exit()
+            vectorCondicion = (horario == 1).astype(float)
+            dmcRealHours = vectorCondicion.sum()
+            pasoSchedule = pasoMinutos or 60
+
+    metricas = calcular_metricas_par(matriz, vectorCondicion, dmcRealHours, parametros)
+    metricas["parametros"] = parametros
+    metricas["pasoMinutos"] = pasoSchedule
+
+    return metricas
+
+def run_batch(paths=None, config=None, workers=1, plots=True, opcionesGraficos=None, incremental=None, formato=None, perfiles=None, archivos=None):
+    '''
+    - API: PROCESAMIENTO COMPLETO DE UNA CARPETA DE ARCHIVOS results/schedule -
+
+    Es el mismo procesamiento que se ejecuta desde la línea de comandos: se generan los archivos "procesados-...", el archivo unificado y,
+    si plots es True, las imágenes.
+
+    Parámetros input
+        paths - Elemento tipo diccionario con las carpetas {"datos", "coordenadas", "procesados", "imagenes"}, strings o pathlib.Path. Las claves
+        omitidas toman los valores configurados al inicio del programa (filesPathData, filesPathCoordenadas, filesPathProcesados, filePathsImagen)
+        config - Elemento tipo diccionario con los umbrales a modificar, ver parametros_metricas
+        workers - Elemento tipo entero, cantidad de procesos, para el cálculo (ver ejecutar_tareas) y para las imágenes (ver generar_graficos)
+        plots - Elemento tipo booleano, generar o no las imágenes
+        opcionesGraficos - Elemento tipo diccionario, formato, resolución y modo miniaturas de las imágenes, ver opciones_graficos
+        incremental - Elemento tipo booleano, calcular sólo los pares nuevos o modificados según el manifiesto. Por defecto ejecucionIncremental
+        formato - Elemento tipo string, formato de las tablas de salida "csv", "parquet", "feather" o "npz". Por defecto formatoSalida
+        perfiles - Elemento tipo lista de diccionarios {"nombre", umbrales a modificar sobre config}, ver perfiles_umbrales. Por defecto
+        perfilesUmbrales. Todos los perfiles se calculan con una única lectura de cada archivo results; las salidas de cada perfil se guardan
+        en una subcarpeta con su nombre y el archivo unificado incluye la columna "perfil"
+        archivos - Elemento tipo conjunto con las rutas de los archivos de la carpeta de datos a considerar, ver plan_pares. Por defecto
+        todos; lo utiliza vigilar_carpeta para procesar sólo los archivos completos
+
+    Parámetros output
+        dfUnificados - Elemento tipo Pandas DataFrame, el contenido del archivo unificado
+    '''
+    rutas = rutas_por_defecto()
+    rutas.update({clave: ruta_carpeta(ruta) for clave, ruta in (paths or {}).items()})
+    filesPathData = rutas["datos"]
+    filesPathProcesados = rutas["procesados"]
+    parametrosBase = configurar_parametros(config)
+    listaPerfiles = perfiles_umbrales(perfilesUmbrales if perfiles is None else perfiles, parametrosBase, rutas)
+    conPerfiles = listaPerfiles[0]["nombre"] is not None
+    if incremental is None:
+        incremental = ejecucionIncremental
+    formato = formato_salida_efectivo(formatoSalida if formato is None else formato)
+
+    mensaje("#########   CALCULATION OF DYNAMIC METRICS    ######### \n")
+    registrar_evento("inicio", carpetaDatos=filesPathData, carpetaSalida=filesPathProcesados, workers=workers, incremental=incremental, formato=formato)
+    # UNA ÚNICA LECTURA DE LA CARPETA DE DATOS. EL PLAN DE PARES LO UTILIZAN EL CÁLCULO Y LOS GRÁFICOS
+    plan = plan_pares(filesPathData, rutas["coordenadas"], archivos)
+    resultsDict = plan["resultados"]
+
+    mensaje(f"El resultsDict contiene \n {resultsDict} \n", nivel=2)
+
+    # REVISAMOS INTEGRIDAD: CADA parentID DE LOS ARCHIVOS results DEBE TENER schedules, Y VICEVERSA
+    if len(plan["sinSchedule"]) == 0 and len(plan["sinResultados"]) == 0:
+        flagIntegrityCheck = 0
+    elif len(plan["parentIDs"]) != len(plan["schedules"]):
+        flagIntegrityCheck = 1
     else:
-        print("")
-else:
-    print("")
-#   ###########################################################################
-
-print(f"Listado general de archivos a procesar: {listarArchivos}\n")
-
-#   UNA VEZ IDENTIFICADO QUE ESTÁ TODO BIEN, SE PROCEDE A DETERMINAR SI TENEMOS MUCHOS results CON 1 schedule, VICEVERSA Ó 1 VS 1
-
-parentID = []
-scheduleID = []
-archivoFuente = []
-horasSimuladas = [] 
-horasDeUso = []
-
-da_ilum_limite = []            
-sDA_ilum_limite = []
-sDA_porcentaje_horas = []
-UDI_ilum_min = []
-UDI_ilum_max = []
-sUDI_ilum_min = []
-sUDI_ilum_max = []
-sUDI_porcentaje_horas = []
-sCDI_porcentaje_sensores = []
-
-da_value = []
-udi_value = []
-cdi_value = []
-sUDI_value = []
-sDA_value = []
-cdi_value = []
-sCDI_0lx = []
-sCDI_50lx = []
-sCDI_100lx = []
-sCDI_200lx = []
-sCDI_300lx = []
-sCDI_500lx = []
-sCDI_750lx = []
-sCDI_1000lx = []
-sCDI_2000lx = []
-
-for element in resultsDict:
-    dfResultados = pd.read_csv(filesPathData+"results_"+element["parentID"]+"_"+element["childID"]+extensionCSV, sep=',', header=None)   
-
-    dmcNsensors = len(dfResultados.axes[1])
-    dmcCantFilasResultados = len(dfResultados.axes[0])
-
-    for elemento in range(0, len(schedulesIndex[element["parentID"]])):
-        print("\n\nArchivo procesado: ")
-        print(filesPathData+"results_"+element["parentID"]+"_"+element["childID"]+extensionCSV)
-        print(filesPathData+"schedule_"+element["parentID"]+"_"+schedulesIndex[element["parentID"]][elemento]+extensionCSV)
-        print("ID: ", element["parentID"])
-        print("")
-        dfSchedule = pd.read_csv(filesPathData+"schedule_"+element["parentID"]+"_"+schedulesIndex[element["parentID"]][elemento]+extensionCSV, sep=',', header=None)
-        dmcCantFilasSchedule = len(dfSchedule.axes[0])
+        flagIntegrityCheck = 2
+    #   ###########################################################################
+
+    #   Generamos mensajes de error si hubieran
+    if flagIntegrityCheck != 0:
+        mensaje("HA OCURRIDO UN ERROR", nivel=0)
+        if flagIntegrityCheck == 1:
+            mensaje("ATENCIÓN: NO SE CUMPLE LA CONDICIÓN DE IGUALDAD EN LOS IDENTIFICADORES USADOS PARA RESULTADOS Y SCHEDULES", nivel=0)
+            mensaje("Favor de revisar los identidicadores usados para los rchivos de resultados y los schedules sean no sean diferentes.", nivel=0)
+            raise ValueError("Los archivos results y schedule no forman pares válidos")
+        elif flagIntegrityCheck == 2:
+            mensaje("ATENCION: REVISE LOS NOMBRES ASIGANDOS PARA LOS PARES RESULTADOS Y SCHEDULES", nivel=0)
+            mensaje("Los nombres para identificar los results con los schedules no coinciden, favor revisar.", nivel=0)
+            raise ValueError("Los archivos results y schedule no forman pares válidos")
+        elif flagIntegrityCheck > 2 or flagIntegrityCheck < 0:
+            mensaje("ERROR INDETERMINADO !!!", nivel=0)
+            mensaje("Revise integridad de los datos", nivel=0)
+            raise ValueError("Los archivos results y schedule no forman pares válidos")
+        else:
+            mensaje("")
+    else:
+        mensaje("")
+    #   ###########################################################################
+
+    mensaje(f"Pares a procesar: {[par['nombre'] for par in plan['pares']]}\n", nivel=2)
+
+    #   UNA VEZ IDENTIFICADO QUE ESTÁ TODO BIEN, SE PROCEDE A DETERMINAR SI TENEMOS MUCHOS results CON 1 schedule, VICEVERSA Ó 1 VS 1
+
+    filasUnificado = []
+    resultadosPares = [[] for perfil in listaPerfiles]
+    escenasModificadas = [set() for perfil in listaPerfiles]
+
+    # PARES VIGENTES SEGÚN EL MANIFIESTO DE LA EJECUCIÓN ANTERIOR, SÓLO SE CALCULAN LOS NUEVOS O MODIFICADOS
+    # CON PERFILES, CADA PAR results/schedule SE REGISTRA UNA VEZ POR PERFIL, CON LA CLAVE "perfil/par"
+    manifiesto = cargar_manifiesto(filesPathProcesados) if incremental else {}
+    huellasResultados = {}
+    huellasSchedule = {}
+    pares = []
+    paresPorPosicion = {}
+    for parPlan in plan["pares"]:
+        rutaResultados = parPlan["rutaResultados"]
+        rutaSchedule = parPlan["rutaSchedule"]
+        for indicePerfil, perfil in enumerate(listaPerfiles):
+            clave = parPlan["nombre"] if perfil["nombre"] is None else perfil["nombre"]+"/"+parPlan["nombre"]
+            salidas = [perfil["procesados"]+procesadosFileReference+parPlan["nombre"]+extensionesSalida[formato], perfil["procesados"]+procesadosFileReference+parPlan["nombre"]+extensionResultados]
+            if guardarIndiceOcupado and not lectura_por_bloques(rutaResultados):
+                salidas.append(filesPathProcesados+"indice-"+parPlan["nombre"]+".npz")
+
+            entrada = manifiesto.get(clave)
+            if rutaResultados not in huellasResultados:
+                huellasResultados[rutaResultados] = huella_archivo(rutaResultados, entrada["resultados"] if entrada else None)
+            if rutaSchedule not in huellasSchedule:
+                huellasSchedule[rutaSchedule] = huella_archivo(rutaSchedule, entrada["schedule"] if entrada else None)
+
+            pares.append({
+                            "posicion": parPlan["resultado"],
+                            "elemento": parPlan["posicionSchedule"],
+                            "perfil": indicePerfil,
+                            "clave": clave,
+                            "nombre": parPlan["nombre"],
+                            "scheduleID": parPlan["scheduleID"],
+                            "rutaSchedule": rutaSchedule,
+                            "salidas": salidas,
+                            "huellaSchedule": huellasSchedule[rutaSchedule],
+                            "vigente": par_vigente(entrada, huellasResultados[rutaResultados], huellasSchedule[rutaSchedule], perfil["parametros"], salidas)
+                        })
+            paresPorPosicion.setdefault(parPlan["resultado"], []).append(pares[-1])
+
+    # CADA TAREA CALCULA LOS SCHEDULES Y PERFILES CON PARES PENDIENTES DE UN ARCHIVO results, CON UNA SOLA LECTURA DEL ARCHIVO
+    listaTareas = []
+    for posicion, element in enumerate(resultsDict):
+        pendientes = [par for par in paresPorPosicion.get(posicion, []) if not par["vigente"]]
+        if len(pendientes) == 0:
+            continue
+        paresPendientes = list({par["elemento"]: par for par in pendientes}.values())
+        listaTareas.append({
+                            "posicion": posicion,
+                            "rutaResultados": element["rutaResultados"],
+                            "rutasSchedule": [par["rutaSchedule"] for par in paresPendientes],
+                            "rutasIndice": [filesPathProcesados+"indice-"+par["nombre"]+".npz" for par in paresPendientes] if guardarIndiceOcupado and not lectura_por_bloques(element["rutaResultados"]) else None,
+                            "elementos": [par["elemento"] for par in paresPendientes],
+                            "perfiles": sorted(set(par["perfil"] for par in pendientes))
+                        })
+    tareasPorPosicion = {tarea["posicion"]: tarea for tarea in listaTareas}
+    mensaje(f"Pares a calcular: {sum(not par['vigente'] for par in pares)} de {len(pares)}\n")
+
+    # LOS RESULTADOS SE ENTREGAN EN EL ORDEN DE resultsDict, CUALQUIERA SEA LA CANTIDAD DE PROCESOS
+    resultadosTareas = iterar_tareas(listaTareas, [perfil["parametros"] for perfil in listaPerfiles], workers)
+
+    for posicion, element in enumerate(resultsDict):
+        if posicion in tareasPorPosicion:
+            tarea = tareasPorPosicion[posicion]
+            listaMetricasPerfiles, listaRows, listaRealHours = next(resultadosTareas)
+
+        for datosPar in paresPorPosicion.get(posicion, []):
+            elemento = datosPar["elemento"]
+            idSchedule = datosPar["scheduleID"]
+            perfil = listaPerfiles[datosPar["perfil"]]
+            parametros = perfil["parametros"]
+            if datosPar["vigente"]:
+                mensaje(f"\nSin cambios desde la ejecución anterior: {datosPar['clave']}")
+                contar("pares reutilizados")
+                filasUnificado.append(manifiesto[datosPar["clave"]]["fila"])
+                if plots:
+                    resultadosPares[datosPar["perfil"]].append(cargar_resultado_par(datosPar["salidas"][1]))
+                continue
+
+            mensaje("\n\nArchivo procesado: ")
+            mensaje(element["rutaResultados"])
+            mensaje(datosPar["rutaSchedule"])
+            mensaje("ID: ", element["parentID"])
+            if conPerfiles:
+                mensaje("Perfil: ", perfil["nombre"])
+            mensaje("")
+
+            posicionSchedule = tarea["elementos"].index(elemento)
+            metricas = listaMetricasPerfiles[tarea["perfiles"].index(datosPar["perfil"])][posicionSchedule]
+            dmcNsensors = metricas["dmcNsensors"]
+            dmcRows = listaRows[posicionSchedule]
+            dmcRealHours = listaRealHours[posicionSchedule]
+
+            # LOS MOTORES CUENTAN PASOS DE TIEMPO, LAS SALIDAS SE INFORMAN EN HORAS
+            pasoSchedule = registrar_schedule(datosPar["rutaSchedule"])["pasoMinutos"]
+            horasSimuladas = horas_de_pasos(dmcRows, pasoSchedule)
+            horasUso = horas_de_pasos(int(dmcRealHours), pasoSchedule)
+            mensaje(f"Horas simuladas: {horasSimuladas}" + (f" ({dmcRows} pasos de {pasoSchedule} min)" if pasoSchedule != 60 else ""), nivel=2)
+            mensaje(f"Horas de Uso: {horasUso} \n", nivel=2)
+            mensaje(f"DA - Iluminancia límite [lx]: {parametros['daIlumValue']}", nivel=2)
+            mensaje(f"sDA - Iluminancia límite [lx]: {parametros['sdaIlumValue']}, Porcentaje de tiempo considerado: {(sdaPorcentajeSensores*100)} % [default 50 %]", nivel=2)
+
+            daIlumHoursCount, daOcurranceRate, daAverageRate = horas_de_pasos(metricas["daIlumHoursCount"], pasoSchedule), metricas["daOcurranceRate"], metricas["daAverageOcurranceRate"]
+            sdaIlumSensorCount, sdaOccurrancePercentSensor, sdaAnualRate, sdaHoras = horas_de_pasos(metricas["sdaIlumSensorCount"], pasoSchedule), metricas["sdaOccurrancePercentSensor"], metricas["sdaAnualOccurranceRate"], metricas["sdaOcurranceAllSensors"]
+            mensaje(f"sDA - Horas de análisis: {horasUso}, Horas consideradas: {horas_de_pasos(metricas['sdaQttyHoras'], pasoSchedule)}", nivel=2)
+            mensaje(f"sDA - Sensores con cumplimiento del {(parametros['sdaPorcentajeHoras']*100)}%: {sdaHoras}\n", nivel=2)
+
+            mensaje(f"UDI - Limite inferior [lx]: {parametros['udiIlumMin']}, Limite superior [lx]: {parametros['udiIlumMax']}", nivel=2)
+            udiIlumHoursCount, udiOcurranceRate, udiAverageRate, udiHours = horas_de_pasos(metricas["udiIlumHoursCount"], pasoSchedule), metricas["udiOcurranceRate"], metricas["udiAverageOcurranceRate"], horas_de_pasos(metricas["udiHours"], pasoSchedule)
+            sUDIpercentual, sUDIhs, sUDIsensorCount, sUDIsensorOccurrance = metricas["sUDI"], metricas["sUDIhoras"], horas_de_pasos(metricas["sudiIlumSensorCount"], pasoSchedule), metricas["sudiOccurrancePercentSensor"]
+            mensaje(f"sUDI - Limite inferior [lx]: {parametros['sudiIlumMin']}, Limite superior [lx]: {parametros['sudiIlumMax']}", nivel=2)
+            mensaje(f"sUDI - Horas simuladas: {horasUso}, Horas considedradas: {horas_de_pasos(metricas['sudiQttyHoras'], pasoSchedule)}", nivel=2)
+
+            cdiList, sCDI, cdi = metricas["cdiValues"], metricas["sCDI"], metricas["cdi"]
+            mensaje(f"\nCDI - Porcentaje de sensores considerados: {(100 * parametros['cdiPorcentajeSensores']):.2f} %\n", nivel=2)
+            mensaje(f"valores de sCDI: {metricas['sCDIconteo']}", nivel=2)
+
+            mensaje("\nMETRICAS DINÁMICAS DE ILUMINACIÓN NATURAL\n")
+            mensaje(f"DA: {daAverageRate:.2f}")
+            mensaje(f"sDA: {sdaAnualRate:.2f}\n")
+            mensaje(f"UDI: {udiAverageRate:.2f}")        
+            mensaje(f"sUDI: {sUDIpercentual:.2f}\n")
+            mensaje(f"CDI: {cdi}")
+            for k in sCDI:
+                mensaje(f"sCDI-{k}: {sCDI[k]:.2f}")
+
+            fila = {
+                        "parentID" : element["parentID"],
+                        "schedule" : idSchedule,
+                        "ARCHIVOS FUENTES": str(filesPathData+"results_"+element["parentID"]+"_"+element["childID"]+" - "+filesPathData+"schedules_"+idSchedule),
+                        "Horas simuladas": horasSimuladas,
+                        "Horas de uso": horasUso,
+                        "DA ilum limite": parametros["daIlumValue"],
+                        "sDA ilum limite": parametros["sdaIlumValue"],
+                        "sDA porcentaje horas": parametros["sdaPorcentajeHoras"],
+                        "UDI ilum min": parametros["udiIlumMin"],
+                        "UDI ilum max": parametros["udiIlumMax"],
+                        "sUDI ilum min": parametros["sudiIlumMin"],
+                        "sUDI ilum max": parametros["sudiIlumMax"],
+                        "sUDI porcentaje horas": parametros["sudiPorcentajeHoras"],
+                        "sCDI porcentaje sensores": parametros["cdiPorcentajeSensores"],
+                        "DA": daAverageRate,
+                        "sDA": sdaAnualRate,
+                        "UDI": udiAverageRate,
+                        "sUDI": sUDIpercentual,
+                        "CDI": cdi
+                    }
+            for k in sCDI:
+                fila[f"sCDI-{k}"] = sCDI[k]
+            if conPerfiles:
+                fila = dict({"perfil": perfil["nombre"]}, **fila)
+            fila = {k: valor_json(v) for k, v in fila.items()}
+
+            # TABLA POR SENSOR, CON LOS UMBRALES, LAS RUTAS DE LOS ARCHIVOS FUENTE Y LA FILA DEL UNIFICADO COMO METADATOS
+            metadatos = {
+                            "tabla": "sensores",
+                            "parentID": element["parentID"],
+                            "resultID": element["childID"],
+                            "scheduleID": idSchedule,
+                            "archivosFuente": {"resultados": element["rutaResultados"], "schedule": datosPar["rutaSchedule"]},
+                            "parametros": parametros,
+                            "resumen": fila
+                        }
+            if element["cieloID"] is not None:
+                metadatos.update(coordenadasID=element["coordenadasID"], cieloID=element["cieloID"])
+            if conPerfiles:
+                metadatos["perfil"] = perfil["nombre"]
+            dfTabla = tabla_sensores(daIlumHoursCount, daOcurranceRate, udiIlumHoursCount, udiOcurranceRate, cdiList, sdaIlumSensorCount, sdaOccurrancePercentSensor, sUDIsensorCount, sUDIsensorOccurrance, parametros)
+            os.makedirs(perfil["procesados"], exist_ok=True)
+            if formato == "csv":
+                a = creacion_archivos(perfil["procesados"], element["parentID"]+"_"+element["childID"]+"_"+idSchedule, filesPathData+"results_"+element["parentID"]+"_"+element["childID"], filesPathData+"schedules_"+idSchedule,daIlumHoursCount, daOcurranceRate, daAverageRate, udiIlumHoursCount, udiOcurranceRate, udiAverageRate, udiHours, sUDIpercentual, sUDIsensorCount, sUDIsensorOccurrance, sdaIlumSensorCount, sdaOccurrancePercentSensor, sdaAnualRate, sdaHoras, cdiList, sCDI, cdi, dmcRows, dmcNsensors, sUDIhs, parametros)
+            elif formato != "npz":
+                guardar_tabla(dfTabla, datosPar["salidas"][0], formato, metadatos)
+
+            # RESULTADO POR SENSOR PARA LOS GRÁFICOS, EN MEMORIA Y EN FORMATO .npz PARA --solo-graficos
+            par = resultado_par(dfTabla, metadatos)
+            guardar_resultado_par(par, datosPar["salidas"][1])
+            resultadosPares[datosPar["perfil"]].append(par)
+
+            filasUnificado.append(fila)
+            escenasModificadas[datosPar["perfil"]].add(nombre_escena(par))
+
+            # LAS SALIDAS DEL PAR YA ESTÁN COMPLETAS, SE REGISTRA EN EL MANIFIESTO
+            manifiesto[datosPar["clave"]] = {
+                                            "version": versionManifiesto,
+                                            "clave": datosPar["clave"],
+                                            "resultados": huellasResultados[element["rutaResultados"]],
+                                            "schedule": datosPar["huellaSchedule"],
+                                            "config": json.loads(json.dumps(parametros)),
+                                            "salidas": datosPar["salidas"],
+                                            "fila": fila
+                                        }
+            registrar_par_manifiesto(filesPathProcesados, manifiesto[datosPar["clave"]])
+            contar("pares calculados")
+            registrar_evento("par", clave=datosPar["clave"], sensores=dmcNsensors, filas=dmcRows)
+
+    # EL ARCHIVO UNIFICADO SE RECONSTRUYE CON LAS FILAS DE TODOS LOS PARES, CALCULADOS O REUTILIZADOS. CON PERFILES, LAS FILAS SE
+    # ORDENAN POR PERFIL Y LA COLUMNA "perfil" IDENTIFICA LOS UMBRALES DE CADA UNA
+    columnasUnificado = ["perfil"] if conPerfiles else []
+    columnasUnificado += ["parentID", "schedule", "ARCHIVOS FUENTES", "Horas simuladas", "Horas de uso", "DA ilum limite", "sDA ilum limite", "sDA porcentaje horas", "UDI ilum min", "UDI ilum max", "sUDI ilum min", "sUDI ilum max", "sUDI porcentaje horas", "sCDI porcentaje sensores", "DA", "sDA", "UDI", "sUDI", "CDI"]
+    columnasUnificado += list(dict.fromkeys(f"sCDI-{etiqueta_cdi(valor)}" for perfil in listaPerfiles for valor in perfil["parametros"]["cdiEscala"]))
+    if conPerfiles:
+        nombresPerfiles = [perfil["nombre"] for perfil in listaPerfiles]
+        filasUnificado.sort(key=lambda fila: nombresPerfiles.index(fila["perfil"]))
+    dfUnificados = pd.DataFrame(filasUnificado, columns=columnasUnificado)
+
+    compactar_manifiesto(filesPathProcesados, {par["clave"]: manifiesto[par["clave"]] for par in pares if par["clave"] in manifiesto})
+
+    indiceParent = plan["parentIDs"]
+    metadatosUnificado = {"parametros": parametrosBase, "carpetaDatos": filesPathData}
+    if conPerfiles:
+        metadatosUnificado["perfiles"] = {perfil["nombre"]: perfil["parametros"] for perfil in listaPerfiles}
+    crear_archivo_unificado(filesPathProcesados, indiceParent, dfUnificados, formato, metadatosUnificado)
+
+    if plots:
+        # LAS ESCENAS SIN PARES RECALCULADOS SÓLO SE GRAFICAN SI FALTAN SUS IMÁGENES. CADA PERFIL TIENE SU CARPETA DE IMÁGENES
+        for indicePerfil, perfil in enumerate(listaPerfiles):
+            escenasVigentes = set(nombre_escena(par) for par in resultadosPares[indicePerfil]) - escenasModificadas[indicePerfil]
+            os.makedirs(perfil["imagenes"], exist_ok=True)
+            generar_graficos(dict(rutas, imagenes=perfil["imagenes"]), resultadosPares[indicePerfil], workers, opcionesGraficos, escenasVigentes, plan)
+
+    registrar_evento("fin", pares=len(pares), paresCalculados=sum(not par["vigente"] for par in pares))
+    return dfUnificados
+
+def archivo_completo(rutaArchivo, filasEsperadas=None, tamanioBloque=1 << 20):
+    '''
+    - VERIFICACIÓN DE QUE UN ARCHIVO DE ENTRADA ESTÁ COMPLETO -
 
-        if dmcCantFilasResultados == dmcCantFilasSchedule:
-            dmcRows = dmcCantFilasResultados
-        elif dmcCantFilasResultados >= dmcCantFilasSchedule:
-            dmcRows = dmcCantFilasSchedule
+    Las matrices binarias de Radiance deben tener exactamente el tamaño indicado por su encabezado (NROWS x NCOLS x NCOMP valores) y las
+    matrices ascii la cantidad de filas indicada en NROWS. Los archivos de texto deben terminar en un salto de línea y, si se indica
+    filasEsperadas, tener esa cantidad de filas. Las definiciones de schedule por reglas deben poder interpretarse.
+
+    Parámetros input
+        rutaArchivo - Elemento tipo string, ruta del archivo results, schedule o matriz de Radiance
+        filasEsperadas - Elemento tipo entero, cantidad de filas de los archivos de texto sin encabezado, o None para no verificarla
+
+    Parámetros output
+        completo - Elemento tipo booleano
+    '''
+    if separador_schedule(rutaArchivo) == "definicion":
+        try:
+            leer_definicion_schedule(rutaArchivo)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    lineasEncabezado = 0
+    try:
+        with open(rutaArchivo, "rb") as f:
+            inicio = f.read(10)
+        if inicio == b"#?RADIANCE":
+            encabezado = leer_encabezado_radiance(rutaArchivo)
+            if encabezado["dtype"] is not None:
+                bytesFila = encabezado["nColumnas"] * encabezado["nComponentes"] * encabezado["dtype"].itemsize
+                return os.path.getsize(rutaArchivo) == encabezado["inicioDatos"] + encabezado["nFilas"] * bytesFila
+            lineasEncabezado = encabezado["lineasEncabezado"]
+            filasEsperadas = encabezado["nFilas"]
+
+        lineas = 0
+        ultimo = b""
+        with open(rutaArchivo, "rb") as f:
+            for bloque in iter(lambda: f.read(tamanioBloque), b""):
+                lineas += bloque.count(b"\n")
+                ultimo = bloque[-1:]
+    except (OSError, ValueError):
+        # ENCABEZADO INCOMPLETO O ARCHIVO ELIMINADO DURANTE LA LECTURA
+        return False
+    if ultimo != b"\n":
+        return False
+    return filasEsperadas is None or lineas - lineasEncabezado == filasEsperadas
+
+def archivos_listos(indice, verificados, ahora):
+    '''
+    - ARCHIVOS DE ENTRADA LISTOS PARA PROCESAR EN MODO VIGILANCIA -
+
+    Un archivo está listo cuando no se modificó durante esperaEstabilidad segundos y está completo (ver archivo_completo). La verificación
+    se hace una sola vez por firma (tamaño y fecha de modificación); si el archivo vuelve a cambiar, se verifica nuevamente.
+
+    Parámetros input
+        indice - Elemento tipo diccionario, ver indexar_carpeta
+        verificados - Elemento tipo diccionario {ruta: (firma, completo)}, se actualiza con los archivos verificados
+        ahora - Elemento tipo float, tiempo actual (time.time())
+
+    Parámetros output
+        listos - Elemento tipo diccionario {ruta: firma}
+    '''
+    listos = {}
+    for tipo in ["resultados", "schedules", "dc", "cielo"]:
+        for archivo in indice[tipo].values():
+            try:
+                estado = os.stat(archivo["ruta"])
+            except FileNotFoundError:
+                continue
+            if ahora - estado.st_mtime < esperaEstabilidad:
+                continue
+            firma = (estado.st_size, estado.st_mtime_ns)
+            if verificados.get(archivo["ruta"], (None, False))[0] != firma:
+                verificados[archivo["ruta"]] = (firma, archivo_completo(archivo["ruta"], filasEsperadas if tipo in ["resultados", "schedules"] else None))
+            if verificados[archivo["ruta"]][1]:
+                listos[archivo["ruta"]] = firma
+    return listos
+
+def vigilar_carpeta(paths=None, config=None, workers=1, plots=True, opcionesGraficos=None, formato=None, perfiles=None, intervalo=None, ciclos=None):
+    '''
+    - API: MODO VIGILANCIA, PROCESAMIENTO DE LOS ARCHIVOS results A MEDIDA QUE SE COMPLETAN -
+
+    Cada intervalo segundos se lee la carpeta de datos y se identifican los archivos listos (ver archivos_listos). Los results listos cuyo
+    parentID tiene schedules listos se agregan a una cola de trabajo, de la que se admiten hasta colaVigilancia por ciclo; si quedan
+    pendientes, el ciclo siguiente comienza sin esperar. Cuando cambian los archivos admitidos se ejecuta run_batch en modo incremental
+    sólo con ellos: se calculan los pares nuevos o modificados en workers procesos y el archivo unificado se actualiza con todos los pares
+    terminados. Un results que se vuelve a escribir sale del cálculo hasta completarse nuevamente.
+
+    Parámetros input
+        paths, config, workers, plots, opcionesGraficos, formato, perfiles - ver run_batch
+        intervalo - Elemento tipo float, segundos entre lecturas de la carpeta. Por defecto intervaloVigilancia
+        ciclos - Elemento tipo entero, cantidad de lecturas de la carpeta; None continúa hasta Ctrl+C
+
+    Parámetros output
+        dfUnificados - Elemento tipo Pandas DataFrame, el archivo unificado de la última actualización, o None si no hubo ninguna
+    '''
+    rutas = rutas_por_defecto()
+    rutas.update({clave: ruta_carpeta(ruta) for clave, ruta in (paths or {}).items()})
+    intervalo = intervaloVigilancia if intervalo is None else intervalo
+
+    verificados = {}
+    cola = deque()
+    admitidos = {}
+    archivosProcesados = None
+    dfUnificados = None
+    ciclo = 0
+    mensaje(f"#########   MODO VIGILANCIA: {rutas['datos']} CADA {intervalo} s (Ctrl+C PARA FINALIZAR)    ######### \n")
+    try:
+        while ciclos is None or ciclo < ciclos:
+            ciclo += 1
+            listos = archivos_listos(indexar_carpeta(rutas["datos"]), verificados, time.time())
+            plan = plan_pares(rutas["datos"], rutas["coordenadas"], set(listos))
+
+            # RESULTS CON TODOS SUS ARCHIVOS LISTOS Y CON SCHEDULES LISTOS DE SU parentID
+            resultadosListos = {resultado["nombre"]: resultado for resultado in plan["resultados"] if resultado["parentID"] in plan["schedules"]}
+            admitidos = {nombre: resultado for nombre, resultado in admitidos.items() if nombre in resultadosListos}
+            enCola = set(cola)
+            for nombre in resultadosListos:
+                if nombre not in admitidos and nombre not in enCola:
+                    cola.append(nombre)
+            nuevos = 0
+            while cola and nuevos < colaVigilancia:
+                nombre = cola.popleft()
+                if nombre in resultadosListos and nombre not in admitidos:
+                    admitidos[nombre] = resultadosListos[nombre]
+                    nuevos += 1
+
+            # ARCHIVOS DEL CÁLCULO: LOS DE CADA results ADMITIDO Y LOS SCHEDULES DE SUS parentID, CON SU FIRMA
+            archivos = set()
+            for resultado in admitidos.values():
+                archivos.update(fuente_dc(resultado["rutaResultados"]) or (resultado["rutaResultados"],))
+                archivos.update(schedule["rutaSchedule"] for schedule in plan["schedules"][resultado["parentID"]])
+            firmas = {ruta: listos[ruta] for ruta in archivos}
+            mensaje(f"Ciclo {ciclo}: {len(listos)} archivos listos, {len(admitidos)} results admitidos, {len(cola)} en cola", nivel=2)
+
+            if admitidos and firmas != archivosProcesados:
+                mensaje(f"\nActualización con {len(admitidos)} results ({nuevos} nuevos en este ciclo, {len(cola)} en cola)\n")
+                try:
+                    dfUnificados = run_batch(rutas, config, workers=workers, plots=plots, opcionesGraficos=opcionesGraficos, incremental=True, formato=formato, perfiles=perfiles, archivos=archivos)
+                    archivosProcesados = firmas
+                except (OSError, ValueError) as error:
+                    # EL CICLO SIGUIENTE VUELVE A INTENTARLO, POR EJEMPLO SI UN ARCHIVO SE MODIFICÓ DURANTE LA LECTURA
+                    mensaje(f"ERROR EN LA ACTUALIZACIÓN: {error}", nivel=0)
+                registrar_evento("vigilancia", ciclo=ciclo, admitidos=len(admitidos), cola=len(cola))
+
+            if not cola and (ciclos is None or ciclo < ciclos):
+                time.sleep(intervalo)
+    except KeyboardInterrupt:
+        mensaje("\nModo vigilancia finalizado")
+    return dfUnificados
+
+def importar_pyarrow():
+    '''
+    - IMPORTACIÓN DIFERIDA DE PYARROW, NECESARIO PARA LOS FORMATOS PARQUET Y FEATHER -
+
+    Parámetros output
+        pyarrow - Elemento tipo módulo, o None si no está instalado
+    '''
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+    except ImportError:
+        return None
+    return pyarrow
+
+def formato_salida_efectivo(formato):
+    '''
+    - FORMATO DE LAS TABLAS DE SALIDA QUE SE PUEDE UTILIZAR -
+
+    Si se pide parquet o feather y pyarrow no está instalado, las tablas se guardan en formato npz
+    '''
+    if formato not in extensionesSalida:
+        raise ValueError(f"Formato de salida no soportado: {formato}")
+    if formato in ("parquet", "feather") and importar_pyarrow() is None:
+        mensaje(f"ATENCIÓN: pyarrow no está instalado, las tablas se guardan en formato npz en lugar de {formato}", nivel=0)
+        return "npz"
+    return formato
+
+@instrumentar("escritura.tabla")
+def guardar_tabla(dfTabla, rutaArchivo, formato, metadatos):
+    '''
+    - ALMACENAMIENTO DE UNA TABLA DE SALIDA EN FORMATO COLUMNAR (parquet, feather o npz) -
+
+    Los umbrales, las rutas de los archivos fuente y los identificadores se guardan como metadatos del archivo (clave "pac_md" del esquema
+    en parquet y feather, arreglo "metadatos" en npz), en lugar de las líneas de encabezado de los archivos csv
+
+    Parámetros input
+        dfTabla - Elemento tipo Pandas DataFrame
+        rutaArchivo - Elemento tipo string, ruta con la extensión del formato (ver extensionesSalida)
+        formato - Elemento tipo string, "parquet", "feather" o "npz"
+        metadatos - Elemento tipo diccionario, debe poder guardarse en formato JSON
+    '''
+    contenidoMetadatos = json.dumps(dict(metadatos, version=versionResultados), sort_keys=True, default=valor_json)
+    rutaTemporal = rutaArchivo + f".{os.getpid()}.tmp"
+
+    if formato == "npz":
+        columnas = {}
+        for i, columna in enumerate(dfTabla.columns):
+            valores = dfTabla[columna].to_numpy()
+            columnas[f"columna_{i}"] = valores.astype(str) if valores.dtype == object else valores
+        with open(rutaTemporal, "wb") as f:
+            np.savez(f, version=versionResultados, columnas=np.array(list(dfTabla.columns), dtype=str), metadatos=np.array(contenidoMetadatos), **columnas)
+    else:
+        pyarrow = importar_pyarrow()
+        tabla = pyarrow.Table.from_pandas(dfTabla, preserve_index=False)
+        tabla = tabla.replace_schema_metadata(dict(tabla.schema.metadata or {}, pac_md=contenidoMetadatos))
+        if formato == "parquet":
+            pyarrow.parquet.write_table(tabla, rutaTemporal)
         else:
-            dmcRows = dmcCantFilasResultados
-        
-        print(f"Horas simuladas: {dmcRows}")
+            pyarrow.feather.write_feather(tabla, rutaTemporal)
+    os.replace(rutaTemporal, rutaArchivo)
+    return 1
 
-        # Extraemos los valores de ocupacion y periodo de analisis
-        dfCondiciones = dfSchedule.loc[:,[3,4]] # columna 3 representa la condicion de ocupacion, columna 4 representa la condicion de periodo de analisis
-        dfCondiciones.columns = ['ocupacion', 'periodoAnalisis']
-                
-        ###     DEBEMOS LLAMAR A LAS 3 FUNCIONES Y TRAERNOS LOS VALORES QUE NECESITAMOS GUARDAR EN EL ARCHIVO POR CADA UNA DE LOS ARCHIVOS PROCESADOS
-        
-        dmcCondicion, dmcRealHours = dmc_condicion_and_realHours(dfCondiciones, dmcRows)
-        print(f"Horas de Uso: {dmcRealHours} \n")
-        print(f"DA - Iluminancia límite [lx]: {daIlumValue}")
-        print(f"sDA - Iluminancia límite [lx]: {sdaIlumValue}, Porcentaje de tiempo considerado: {(sdaPorcentajeSensores*100)} % [default 50 %]")
+def leer_tabla(rutaArchivo):
+    '''
+    - LECTURA DE UNA TABLA GENERADA CON guardar_tabla -
 
-        daIlumHoursCount, daOcurranceRate, daAverageRate = daylight_autonomy(daIlumValue, dmcNsensors, dmcCondicion, dmcRows, dmcRealHours, dfResultados)
-        sdaIlumSensorCount, sdaOccurrancePercentSensor, sdaAnualRate, sdaHoras = spatial_daylight_autonomy(sdaIlumValue, dmcNsensors, dmcRealHours, dmcCondicion, dfResultados)
+    El formato se identifica por la extensión del archivo
 
-        print(f"UDI - Limite inferior [lx]: {udiIlumMin}, Limite superior [lx]: {udiIlumMax}")
-        udiIlumHoursCount, udiOcurranceRate, udiAverageRate, udiHours, sUDIpercentual, sUDIhs, sUDIsensorCount, sUDIsensorOccurrance = useful_daylight_index(udiIlumMin, udiIlumMax, dmcNsensors, dmcRealHours, dmcRows, dfResultados)
-        
-        cdiList, sCDI, cdi = get_cdi_index(dmcNsensors, dmcRows, dmcRealHours, dmcCondicion, dfResultados)
-
-        print("\nMETRICAS DINÁMICAS DE ILUMINACIÓN NATURAL\n")
-        print(f"DA: {daAverageRate:.2f}")
-        print(f"sDA: {sdaAnualRate:.2f}\n")
-        print(f"UDI: {udiAverageRate:.2f}")        
-        print(f"sUDI: {sUDIpercentual:.2f}\n")
-        print(f"CDI: {cdi}")
-        for k in sCDI:
-            print(f"sCDI-{k}: {sCDI[k]:.2f}")
+    Parámetros output
+        dfTabla - Elemento tipo Pandas DataFrame
+        metadatos - Elemento tipo diccionario
+    '''
+    if rutaArchivo.endswith(extensionesSalida["npz"]):
+        with np.load(rutaArchivo) as datos:
+            if "columnas" not in datos or int(datos["version"]) != versionResultados:
+                raise ValueError(f"Versión de resultados no soportada en {rutaArchivo}")
+            dfTabla = pd.DataFrame({str(columna): datos[f"columna_{i}"] for i, columna in enumerate(datos["columnas"])})
+            metadatos = json.loads(str(datos["metadatos"]))
+        return dfTabla, metadatos
+
+    pyarrow = importar_pyarrow()
+    if pyarrow is None:
+        raise ImportError(f"Se necesita pyarrow para leer {rutaArchivo}")
+    if rutaArchivo.endswith(extensionesSalida["parquet"]):
+        tabla = pyarrow.parquet.read_table(rutaArchivo)
+    else:
+        tabla = pyarrow.feather.read_table(rutaArchivo)
+    metadatos = json.loads((tabla.schema.metadata or {}).get(b"pac_md", b"{}"))
+    if metadatos.get("version") != versionResultados:
+        raise ValueError(f"Versión de resultados no soportada en {rutaArchivo}")
+    return tabla.to_pandas(), metadatos
 
-        a = creacion_archivos(filesPathProcesados, element["parentID"]+"_"+element["childID"]+"_"+schedulesIndex[element["parentID"]][elemento], filesPathData+"results_"+element["parentID"]+"_"+element["childID"], filesPathData+"schedules_"+schedulesIndex[element["parentID"]][elemento],daIlumHoursCount, daOcurranceRate, daAverageRate, udiIlumHoursCount, udiOcurranceRate, udiAverageRate, udiHours, sUDIpercentual, sUDIsensorCount, sUDIsensorOccurrance, sdaIlumSensorCount, sdaOccurrancePercentSensor, sdaAnualRate, sdaHoras, cdiList, sCDI, cdi, dmcRows, dmcNsensors)
-        
-        parentID.append(element["parentID"])
-        scheduleID.append(schedulesIndex[element["parentID"]][elemento])
-        archivoFuente.append(str(filesPathData+"results_"+element["parentID"]+"_"+element["childID"]+" - "+filesPathData+"schedules_"+schedulesIndex[element["parentID"]][elemento]))
-        horasSimuladas.append(dmcRows)
-        horasDeUso.append(int(dmcRealHours))
-
-        da_ilum_limite.append(daIlumValue)             
-        sDA_ilum_limite.append(sdaIlumValue)
-        sDA_porcentaje_horas.append(sdaPorcentajeHoras)
-        UDI_ilum_min.append(udiIlumMin)
-        UDI_ilum_max.append(udiIlumMax)
-        sUDI_ilum_min.append(sudiIlumMin)
-        sUDI_ilum_max.append(sudiIlumMax)
-        sUDI_porcentaje_horas.append(sudiPorcentajeHoras)
-        sCDI_porcentaje_sensores.append(cdiPorcentajeSensores)
-
-        da_value.append(daAverageRate)
-        udi_value.append(udiAverageRate)
-        sUDI_value.append(sUDIpercentual)
-        sDA_value.append(sdaAnualRate)
-        cdi_value.append(cdi)
-        sCDI_0lx.append(sCDI['0lx'])
-        sCDI_50lx.append(sCDI['50lx'])
-        sCDI_100lx.append(sCDI['100lx'])
-        sCDI_200lx.append(sCDI['200lx'])
-        sCDI_300lx.append(sCDI['300lx'])
-        sCDI_500lx.append(sCDI['500lx'])
-        sCDI_750lx.append(sCDI['750lx'])
-        sCDI_1000lx.append(sCDI['1000lx'])
-        sCDI_2000lx.append(sCDI['2000lx'])
-
-resultados = {
-                "parentID" : parentID, 
-                "schedule" : scheduleID,
-                "ARCHIVOS FUENTES": archivoFuente, 
-                "Horas simuladas": horasSimuladas, 
-                "Horas de uso": horasDeUso, 
-                "DA ilum limite": da_ilum_limite,                
-                "sDA ilum limite": sDA_ilum_limite,
-                "sDA porcentaje horas": sDA_porcentaje_horas,
-                "UDI ilum min": UDI_ilum_min,
-                "UDI ilum max": UDI_ilum_max,
-                "sUDI ilum min": sUDI_ilum_min,
-                "sUDI ilum max": sUDI_ilum_max,
-                "sUDI porcentaje horas": sUDI_porcentaje_horas,
-                "sCDI porcentaje sensores": sCDI_porcentaje_sensores,
-                "DA": da_value,
-                "sDA": sDA_value,
-                "UDI": udi_value,
-                "sUDI": sUDI_value,
-                "CDI": cdi_value,
-                "sCDI-0lx": sCDI_0lx,
-                "sCDI-50lx": sCDI_50lx,
-                "sCDI-100lx": sCDI_100lx,
-                "sCDI-200lx": sCDI_200lx,
-                "sCDI-300lx": sCDI_300lx,
-                "sCDI-500lx": sCDI_500lx,
-                "sCDI-750lx": sCDI_750lx,
-                "sCDI-1000lx": sCDI_1000lx,
-                "sCDI-2000lx": sCDI_2000lx                
+def cargar_carpeta_salida(filesPathProcesados, tabla="sensores"):
+    '''
+    - LECTURA DE TODAS LAS TABLAS DE UNA CARPETA DE SALIDA EN UN ÚNICO DATAFRAME -
+
+    Se leen los archivos parquet, feather o npz (en ese orden de preferencia cuando un mismo par tiene más de uno) y se agregan como
+    columnas los identificadores guardados en los metadatos. Los archivos csv no se leen. Con perfiles de umbrales las tablas por sensor
+    se guardan en una subcarpeta por perfil: se leen también las subcarpetas, con la columna perfil (el nombre de la subcarpeta si no está
+    en los metadatos), igual que en el archivo unificado.
+
+    Parámetros input
+        filesPathProcesados - Elemento tipo string, carpeta de salida
+        tabla - Elemento tipo string, "sensores" (archivos "procesados-...") o "unificado" (archivos "unificado_results_...")
+
+    Parámetros output
+        dfCarpeta - Elemento tipo Pandas DataFrame. Para "sensores" incluye las columnas parentID, resultID, scheduleID y sensor, y perfil
+        si la carpeta es la de un perfil de umbrales o contiene las subcarpetas de los perfiles (ver perfiles_umbrales)
+    '''
+    if tabla not in ("sensores", "unificado"):
+        raise ValueError(f"Tabla no soportada: {tabla}")
+
+    filesPathProcesados = ruta_carpeta(filesPathProcesados)
+    partes = tablas_carpeta_salida(filesPathProcesados, tabla)
+    if tabla == "sensores":
+        # SUBCARPETAS DE LOS PERFILES DE UMBRALES, UN NIVEL
+        for nombre in sorted(os.listdir(filesPathProcesados)):
+            rutaSubcarpeta = os.path.join(filesPathProcesados, nombre, "")
+            if os.path.isdir(rutaSubcarpeta) and not nombre.startswith("."):
+                partes += tablas_carpeta_salida(rutaSubcarpeta, tabla, perfil=nombre)
+
+    if len(partes) == 0:
+        return pd.DataFrame()
+    return pd.concat(partes, axis=0, ignore_index=True)
+
+def tablas_carpeta_salida(filesPathProcesados, tabla, perfil=None):
+    '''
+    - TABLAS DE UNA CARPETA DE SALIDA, SIN RECORRER SUBCARPETAS, VER cargar_carpeta_salida -
+
+    Parámetros input
+        perfil - Elemento tipo string, nombre del perfil de la subcarpeta, se utiliza si no está en los metadatos de la tabla
+
+    Parámetros output
+        partes - Elemento tipo lista de Pandas DataFrame
+    '''
+    referencia = procesadosFileReference if tabla == "sensores" else "unificado_results_"
+
+    archivos = {}
+    for formato in ["parquet", "feather", "npz"]:
+        for nombre in listar_archivos(filesPathProcesados, referencia, extensionesSalida[formato]):
+            archivos.setdefault(nombre, filesPathProcesados + referencia + nombre + extensionesSalida[formato])
+
+    partes = []
+    for nombre in sorted(archivos):
+        dfTabla, metadatos = leer_tabla(archivos[nombre])
+        if tabla == "sensores":
+            identificadores = pd.DataFrame({
+                                            "parentID": metadatos["parentID"],
+                                            "resultID": metadatos["resultID"],
+                                            "scheduleID": metadatos["scheduleID"],
+                                            "sensor": np.arange(len(dfTabla))
+                                        }, index=dfTabla.index)
+            if "perfil" in metadatos or perfil is not None:
+                identificadores.insert(0, "perfil", metadatos.get("perfil", perfil))
+            dfTabla = pd.concat([identificadores, dfTabla], axis=1)
+        partes.append(dfTabla)
+    return partes
+
+def titulos_graficos(parametros):
+    '''
+    - TÍTULOS DE LAS MÉTRICAS POR SENSOR -
+
+    Son los mismos nombres de columna de los archivos "procesados-..." y se utilizan como título de cada imagen
+    '''
+    return [
+            'DA Frecuencia de Ocurrencia',
+            'UDI Frecuencia de Ocurrencia',
+            'CDI',
+            f'SDA Frecuencia de Ocurrencia mayor al {(parametros["sdaPorcentajeHoras"]*100)} %',
+            f'sUDI Frecuencia de ocurrencia mayor al {(parametros["sudiPorcentajeHoras"]*100)} %'
+        ]
+
+def resultado_par(dfTabla, metadatos):
+    '''
+    - RESULTADO POR SENSOR DE UN PAR results/schedule -
+
+    Es lo que la etapa de cálculo entrega a la etapa de gráficos, sin volver a leer los archivos "procesados-..."
+
+    Parámetros input
+        dfTabla - Elemento tipo Pandas DataFrame, ver tabla_sensores
+        metadatos - Elemento tipo diccionario {"parentID", "resultID", "scheduleID", "parametros", ...}, con "coordenadasID" y "cieloID" para
+        las fuentes de coeficientes de luz natural y cielo
+
+    Parámetros output
+        par - Elemento tipo diccionario {"parentID", "resultID", "scheduleID", "coordenadasID", "cieloID", "da", "udi", "cdi", "sda", "sudi",
+        "titulos", "parametros", "tabla", "metadatos"}, con un numpy array (Sensores) por métrica. coordenadasID es el resultID de los
+        sensores (archivo .pts) y cieloID es None para los archivos results
+    '''
+    titulos = titulos_graficos(metadatos["parametros"])
+    par = {
+            "parentID": metadatos["parentID"],
+            "resultID": metadatos["resultID"],
+            "scheduleID": metadatos["scheduleID"],
+            "coordenadasID": metadatos.get("coordenadasID", metadatos["resultID"]),
+            "cieloID": metadatos.get("cieloID"),
+            "da": dfTabla[titulos[0]].to_numpy(dtype=float),
+            "udi": dfTabla[titulos[1]].to_numpy(dtype=float),
+            "cdi": dfTabla[titulos[2]].to_numpy(dtype=float),
+            "sda": dfTabla[titulos[3]].to_numpy(dtype=float),
+            "sudi": dfTabla[titulos[4]].to_numpy(dtype=float),
+            "titulos": titulos,
+            "parametros": metadatos["parametros"],
+            "tabla": dfTabla,
+            "metadatos": metadatos
+        }
+    return par
+
+def guardar_resultado_par(par, rutaArchivo):
+    '''
+    - ALMACENAMIENTO DEL RESULTADO POR SENSOR DE UN PAR (.npz) -
+
+    Es la tabla completa del par en formato npz (ver guardar_tabla), utilizada para generar las imágenes a partir de salidas existentes
+    (--solo-graficos) y como formato de salida cuando no está instalado pyarrow
+    '''
+    return guardar_tabla(par["tabla"], rutaArchivo, "npz", par["metadatos"])
+
+def cargar_resultado_par(rutaArchivo):
+    '''
+    - LECTURA DE UN RESULTADO POR SENSOR GENERADO CON guardar_resultado_par -
+    '''
+    return resultado_par(*leer_tabla(rutaArchivo))
+
+def cargar_resultados_pares(filesPathProcesados):
+    '''
+    - LECTURA DE LOS RESULTADOS POR SENSOR DE UNA CARPETA DE SALIDA -
+
+    Parámetros output
+        pares - Elemento tipo lista de diccionarios, ver resultado_par, ordenada por nombre de archivo
+    '''
+    listaResultados = listar_archivos(filesPathProcesados, procesadosFileReference, extensionResultados)
+    return [cargar_resultado_par(filesPathProcesados + procesadosFileReference + nombre + extensionResultados) for nombre in listaResultados]
+
+def opciones_graficos():
+    '''
+    - OPCIONES DE LAS IMÁGENES CONFIGURADAS AL INICIO DEL PROGRAMA -
+
+    Parámetros output
+        opciones - Elemento tipo diccionario, {"formato": "png", "dpi": 800, "miniaturas": False, "dpiMiniaturas": 72, ...}
+    '''
+    opciones = {
+                "formato": formatoImagen,
+                "dpi": dpiImagen,
+                "miniaturas": modoMiniaturas,
+                "dpiMiniaturas": dpiMiniaturas,
+                "carpetaImagen": nombreCarpetaImagen,
+                "valorAlpha": valorAlpha,
+                "markerSize": markerSize
             }
+    return opciones
+
+def importar_pyplot():
+    '''
+    - IMPORTACIÓN DIFERIDA DE LOS MÓDULOS DE GRÁFICOS -
+
+    Se importan sólo al generar imágenes, con el backend no interactivo Agg, también dentro de cada proceso de ejecutar_graficos
+    '''
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return matplotlib, plt
+
+def nombre_escena(par):
+    '''
+    - NOMBRE DE LA ESCENA DE UN PAR: parentID_scheduleID, MÁS _skyID PARA LAS FUENTES DE COEFICIENTES DE LUZ NATURAL Y CIELO -
+    '''
+    if par.get("cieloID") is None:
+        return par["parentID"] + '_' + par["scheduleID"]
+    return par["parentID"] + '_' + par["scheduleID"] + '_' + par["cieloID"]
+
+def escenas_graficos(pares, plan=None):
+    '''
+    - IDENTIFICACIÓN DE LAS ESCENAS A GRAFICAR -
+
+    Cada escena corresponde a un par parentID/scheduleID y reúne los resultados de todos sus results (por ejemplo, las distintas
+    zonas de una planta). Los resultados calculados con cada matriz de cielo forman escenas separadas, ver nombre_escena. Las escenas
+    se arman con un único recorrido de los pares, en el orden de aparición de los scheduleID y, dentro de cada uno, de los parentID.
+
+    Parámetros input
+        pares - Elemento tipo lista de diccionarios, ver resultado_par
+        plan - Elemento tipo diccionario, ver plan_pares. Indica la ruta del archivo .pts de cada results; sin plan (por ejemplo con
+        --solo-graficos) la ruta se arma con la carpeta de coordenadas, ver datos_escena
+
+    Parámetros output
+        escenas - Elemento tipo lista de diccionarios {"nombre", "parentID", "scheduleID", "pares", "rutasCoordenadas"}
+    '''
+    rutasPlan = {} if plan is None else {(resultado["parentID"], resultado["childID"]): resultado["rutaCoordenadas"] for resultado in plan["resultados"]}
+    ordenSchedules = {scheduleID: orden for orden, scheduleID in enumerate(dict.fromkeys(par["scheduleID"] for par in pares))}
+    ordenParents = {parentID: orden for orden, parentID in enumerate(dict.fromkeys(par["parentID"] for par in pares))}
+
+    escenas = {}
+    for par in sorted(pares, key=lambda par: (ordenSchedules[par["scheduleID"]], ordenParents[par["parentID"]])):
+        nombre = nombre_escena(par)
+        if nombre not in escenas:
+            escenas[nombre] = {
+                                "nombre": nombre,
+                                "parentID": par["parentID"],
+                                "scheduleID": par["scheduleID"],
+                                "pares": [],
+                                "rutasCoordenadas": []
+                            }
+        escenas[nombre]["pares"].append(par)
+        escenas[nombre]["rutasCoordenadas"].append(rutasPlan.get((par["parentID"], par["resultID"])))
+    return list(escenas.values())
+
+def datos_escena(escena, paths):
+    '''
+    - DATOS DE UNA ESCENA: COORDENADAS DE LOS SENSORES Y MÉTRICAS POR SENSOR -
 
-dfUnificados = pd.DataFrame(resultados)
+    Los datos de cada escena se construyen desde cero con una única concatenación, sin acumular los de las escenas anteriores. Las
+    coordenadas se leen de la ruta indicada por el plan de pares o, si no la hay, de la carpeta paths["coordenadas"].
 
-indiceParent = schedulesIndex.keys()
-crear_archivo_unificado(filesPathProcesados, indiceParent, dfUnificados)
+    Parámetros output
+        dfEscena - Elemento tipo Pandas DataFrame, columnas [x, y, z, DA, UDI, CDI, sDA, sUDI]
+    '''
+    partes = []
+    for par, rutaCoordenadas in zip(escena["pares"], escena.get("rutasCoordenadas") or [None] * len(escena["pares"])):
+        if rutaCoordenadas is None:
+            rutaCoordenadas = paths["coordenadas"] + wpFileHeader + par["parentID"] + '_' + par["coordenadasID"] + extensionPTS
+        dfArchivoCoordenadas = pd.DataFrame(leer_matriz_cacheada(rutaCoordenadas, '\t'))
+        dfCoordenadas = dfArchivoCoordenadas.iloc[:, [0,1,2]].copy()
 
-#   GENERACION DE GRÁFICOS
-print("#########   IMAGES GENERATION    ######### \n")
+        dfProcesado = pd.DataFrame(dict(zip(par["titulos"], [par["da"], par["udi"], par["cdi"], par["sda"], par["sudi"]])))
+        partes.append(pd.concat([dfCoordenadas, dfProcesado], axis=1))
 
-listaArchivosProcesados = listar_archivos(filesPathProcesados, procesadosFileReference, extensionCSV)
-listaArchivosCoordenadas = listar_archivos(filesPathCoordenadas, wpFileHeader, extensionPTS)
+    return pd.concat(partes, axis=0)
 
-dfFileNames = get_dataframe_fileNames(listaArchivosProcesados)
+def graficar_metrica(plt, xValues, yValues, valores, titulo, nombreEscena, rutaImagen, dpi, opciones, cmap, vmin=None, vmax=None, ticks=None, etiquetas=None, anchoBorde=0.75):
+    '''
+    - GENERACIÓN Y GRABACIÓN DE LA IMAGEN DE UNA MÉTRICA -
 
-parentList = dfFileNames['parentID'].unique().tolist()
-scheduleList = dfFileNames['scheduleID'].unique().tolist()
-rList = dfFileNames['resultID'].unique().tolist()
+    La figura se cierra después de grabarla, para que la memoria no aumente con la cantidad de escenas
+    '''
+    fig, grafico = plt.subplots()
+    grafico.set_facecolor('silver')
+    grafico.set_alpha(opciones["valorAlpha"])
+    grafico.set_title(titulo)
+    grafico.title.set_size(10)
+    imagen = grafico.scatter(x = xValues,
+                            y = yValues,
+                            c = valores,
+                            cmap = cmap,
+                            vmin = vmin,
+                            vmax = vmax,
+                            s = opciones["markerSize"],
+                            alpha = 0.75,
+                            edgecolors = 'black',
+                            linewidths = anchoBorde,
+                            marker = 'o')
+    if ticks is not None:
+        cbar = fig.colorbar(imagen, ticks=ticks)
+        cbar.set_ticklabels(etiquetas)
+    else:
+        fig.colorbar(imagen) # escalas finas, se dejan las marcas automáticas
+    fig.suptitle(f"Grafica de {nombreEscena}")
+    fig.tight_layout()
 
-coordenadasEstructura = {"x": 0, "y": 0, "z": 0}
-generar_carpeta_imagenes(filePathsImagen, nombreCarpetaImagen)
-dfGraficos = pd.DataFrame()
+    # CORRECCIÓN DE ESCALA - VISTA EN PLANTA
+    grafico.axis('equal')
 
-for schElement in scheduleList:
-    scheduleMask = dfFileNames["scheduleID"] == schElement
-    dfScheduleFilter = dfFileNames[scheduleMask]    
+    fig.savefig(rutaImagen, bbox_inches='tight', dpi=dpi)
+    plt.close(fig)
+    return rutaImagen
 
-    for pElement in parentList:
-        parentMask = dfFileNames["parentID"] == pElement
-        dfParentFilter = dfFileNames[parentMask]
+def rutas_imagenes_escena(escena, paths, opciones):
+    '''
+    - RUTAS DE LAS IMÁGENES DE UNA ESCENA -
 
-        for rElement in range(len(dfParentFilter)):
-            fileNameCoord = str(dfParentFilter.iloc[rElement]['parentID'] + '_' + dfParentFilter.iloc[rElement]['resultID'])
-            fileNameProcesado = str(dfParentFilter.iloc[rElement]['parentID'] + '_' + dfParentFilter.iloc[rElement]['resultID']+ '_' + dfParentFilter.iloc[rElement]['scheduleID'])
+    En modo miniaturas se graban sólo imágenes png de baja resolución, en la subcarpeta "miniaturas"
 
-            dfArchivoCoordenadas = pd.read_csv(filesPathCoordenadas + wpFileHeader + fileNameCoord + extensionPTS, sep='\t', header=None) 
-            dfCoordenadas = dfArchivoCoordenadas.iloc[:, [0,1,2]].copy()
-            
-            dfProcesadoAux = convertir_a_dataframes(filesPathProcesados, procesadosFileReference, fileNameProcesado, extensionCSV)
-            dfProcesado = dfProcesadoAux[[dfProcesadoAux.columns[1], dfProcesadoAux.columns[3], dfProcesadoAux.columns[4], dfProcesadoAux.columns[6], dfProcesadoAux.columns[8]]].copy()
-            dfGrafAux = pd.concat([dfCoordenadas, dfProcesado], axis=1)
-        
-            dfGraficos = pd.concat([dfGraficos, dfGrafAux], axis=0)       
-
-        ####    GRAFICA DE RESULTADOS    ####
-
-        dfGraficos.sort_values(dfGraficos.columns[0])
-        fileNameImage = str(dfParentFilter.iloc[rElement]['parentID'] + '_' + dfParentFilter.iloc[rElement]['scheduleID'])
-
-        xValues = np.array(dfGraficos[dfGraficos.columns[0]])
-        yValues = np.array(dfGraficos[dfGraficos.columns[1]])
-
-        daValues = np.array(dfGraficos[dfGraficos.columns[3]])
-        udiValues = np.array(dfGraficos[dfGraficos.columns[4]])
-        cdiValues = np.array(dfGraficos[dfGraficos.columns[5]])
-        sDAvalues = np.array(dfGraficos[dfGraficos.columns[6]])
-        sUDIvalues = np.array(dfGraficos[dfGraficos.columns[7]])
-
-        figDA, graficoDA = plt.subplots()
-        figUDI, graficoUDI = plt.subplots()
-        figCDI, graficoCDI = plt.subplots()
-        figSDA, graficoSDA = plt.subplots()
-        figSUDI, graficoSUDI = plt.subplots()
-
-        # DA
-        graficoDA.set_facecolor('silver')
-        graficoDA.set_alpha(valorAlpha)
-        graficoDA.set_title(dfGraficos.columns[3])
-        graficoDA.title.set_size(10)
-        imagenDA = graficoDA.scatter(x = xValues, 
-                                    y = yValues, 
-                                    c = daValues, 
-                                    cmap = 'CMRmap',
-                                    vmin = 0,
-                                    vmax = 100,
-                                    s = markerSize, 
-                                    alpha = 0.75, 
-                                    edgecolors = 'black', 
-                                    linewidths = 0.5, 
-                                    marker = 'o')       
-        cbarDA = figDA.colorbar(imagenDA, ticks=[0, 25, 50, 75, 100])
-        cbarDA.set_ticklabels(['0%', '25%', '50%', '75%', '100%'])
-        figDA.suptitle(f"Grafica de {fileNameImage}")   
-        graficoDA.axis('equal')   
-        figDA.tight_layout()
-
-        # UDI
-        graficoUDI.set_facecolor('silver')
-        graficoUDI.set_alpha(valorAlpha)
-        graficoUDI.set_title(dfGraficos.columns[4])
-        graficoUDI.title.set_size(10)
-        imagenUDI = graficoUDI.scatter(x = xValues, 
-                                    y = yValues, 
-                                    c = udiValues, 
-                                    cmap = 'CMRmap',
-                                    vmin = 0,
-                                    vmax = 100,
-                                    s = markerSize, 
-                                    alpha = 0.75, 
-                                    edgecolors = 'black', 
-                                    linewidths = 0.75, 
-                                    marker = 'o')       
-
-        cbarUDI = figUDI.colorbar(imagenUDI, ticks=[0, 25, 50, 75, 100])
-        cbarUDI.set_ticklabels(['0%', '25%', '50%', '75%', '100%'])
-        figUDI.suptitle(f"Grafica de {fileNameImage}")      
-        figUDI.tight_layout()
-
-        # CDI
-        graficoCDI.set_facecolor('silver')
-        graficoCDI.set_alpha(valorAlpha)
-        graficoCDI.set_title(dfGraficos.columns[5])
-        graficoCDI.title.set_size(10)
-        imagenCDI = graficoCDI.scatter(x = xValues, 
-                                    y = yValues, 
-                                    c = cdiValues, 
-                                    cmap = 'CMRmap',
-                                    vmin = 0,
-                                    vmax = 2000,
-                                    s = markerSize, 
-                                    alpha = 0.75, 
-                                    edgecolors = 'black', 
-                                    linewidths = 0.75, 
-                                    marker = 'o')       
-
-        cbarCDI = figCDI.colorbar(imagenCDI, ticks=[0, 50, 100, 200, 300, 500, 750, 1000, 2000])
-        cbarCDI.set_ticklabels(['0lx', '50lx', '100lx', '200lx', '300lx', '500lx', '750lx', '1000lx', '2000lx'])
-        figCDI.suptitle(f"Grafica de {fileNameImage}")      
-        figCDI.tight_layout()
-
-        # sDA frecuencia de ocurrencia > al porcentaje de horas indicadas
-        graficoSDA.set_facecolor('silver')
-        graficoSDA.set_alpha(valorAlpha)
-        graficoSDA.set_title(dfGraficos.columns[6])
-        graficoSDA.title.set_size(10)
-        imagenSDA = graficoSDA.scatter(x = xValues, 
-                                    y = yValues, 
-                                    c = sDAvalues, 
-                                    cmap = matplotlib.colors.ListedColormap(['white', 'lightblue']),
-                                    s = markerSize, 
-                                    alpha = 0.75, 
-                                    edgecolors = 'black', 
-                                    linewidths = 0.75, 
-                                    marker = 'o')       
-        cbarSDA = figSDA.colorbar(imagenSDA, ticks = [0, 1])
-        cbarSDA.set_ticklabels(['0', '1'])
-        figSDA.suptitle(f"Grafica de {fileNameImage}")      
-        figSDA.tight_layout()
-
-        # sUDI frecuencia de ocurrencia > al porcentaje de horas indicadas
-        graficoSUDI.set_facecolor('silver')
-        graficoSUDI.set_alpha(valorAlpha)
-        graficoSUDI.set_title(dfGraficos.columns[7])
-        graficoSUDI.title.set_size(10)
-        imagenSUDI = graficoSUDI.scatter(x = xValues, 
-                                        y = yValues, 
-                                        c = sUDIvalues, 
-                                        cmap = matplotlib.colors.ListedColormap(['white', 'lightblue']),
-                                        s = markerSize, 
-                                        alpha = 0.75, 
-                                        edgecolors = 'black', 
-                                        linewidths = 0.75, 
-                                        marker = 'o')       
-        cbarSUDI = figSUDI.colorbar(imagenSUDI, ticks = [0, 1])
-        cbarSUDI.set_ticklabels(['0', '1'])
-        figSUDI.suptitle(f"Grafica de {fileNameImage}")      
-        figSUDI.tight_layout()
-
-        # CORRECCIÓN DE ESCALA - VISTA EN PLANTA 
-        graficoDA.axis('equal')
-        graficoUDI.axis('equal')
-        graficoCDI.axis('equal')
-        graficoSDA.axis('equal')
-        graficoSUDI.axis('equal')
-        #####
-
-        #plt.show() 
-
-        # GRABAR IMAGENES GENERADAS EN DIRECTORIO INDICADO
-        print(f"################################################\n")
-        print(f"Generamos las imagenes del schedule: {schElement}\n")
-
-        figFileName = filePathsImagen+nombreCarpetaImagen+fileNameImage
-
-        figDA.savefig(figFileName + "_DA", bbox_inches='tight', dpi= 800)
-        figUDI.savefig(figFileName + "_UDI", bbox_inches='tight', dpi= 800)
-        figCDI.savefig(figFileName + "_CDI", bbox_inches='tight', dpi= 800)
-        figSDA.savefig(figFileName + "_sDA", bbox_inches='tight', dpi= 800)
-        figSUDI.savefig(figFileName + "_sUDI", bbox_inches='tight', dpi= 800)
-
-endTime = datetime.now() - startTime
-print("Tiempo de ejecución: "+ str(endTime))
+    Parámetros output
+        rutasImagenes - Elemento tipo diccionario {"DA", "UDI", "CDI", "sDA", "sUDI"} con la ruta de cada imagen
+    '''
+    carpetaImagen = paths["imagenes"] + opciones["carpetaImagen"]
+    formato = opciones["formato"]
+    if opciones["miniaturas"]:
+        carpetaImagen = os.path.join(carpetaImagen, "miniaturas", "")
+        formato = "png"
+    figFileName = carpetaImagen + escena["nombre"]
+    return {metrica: f"{figFileName}_{metrica}.{formato}" for metrica in ["DA", "UDI", "CDI", "sDA", "sUDI"]}
+
+@instrumentar("graficos", filas=lambda argumentos, resultado: sum(len(par["da"]) for par in argumentos[0]["pares"]))
+def renderizar_escena(escena, paths, opciones):
+    '''
+    - GENERACIÓN DE LAS IMÁGENES DE DA, UDI, CDI, sDA Y sUDI DE UNA ESCENA -
+
+    Parámetros input
+        escena - Elemento tipo diccionario, ver escenas_graficos
+        paths - Elemento tipo diccionario con las carpetas, ver run_batch
+        opciones - Elemento tipo diccionario, ver opciones_graficos
+
+    Parámetros output
+        listaImagenes - Elemento tipo lista con las rutas de las imágenes generadas
+    '''
+    matplotlib, plt = importar_pyplot()
+    cdiEscala = escena["pares"][0]["parametros"]["cdiEscala"]
+    dfGraficos = datos_escena(escena, paths)
+
+    xValues = np.array(dfGraficos[dfGraficos.columns[0]])
+    yValues = np.array(dfGraficos[dfGraficos.columns[1]])
+    columnas = dfGraficos.columns
+
+    rutasImagenes = rutas_imagenes_escena(escena, paths, opciones)
+    os.makedirs(os.path.dirname(rutasImagenes["DA"]), exist_ok=True)
+    dpi = opciones["dpiMiniaturas"] if opciones["miniaturas"] else opciones["dpi"]
+
+    mensaje(f"################################################\n")
+    mensaje(f"Generamos las imagenes del schedule: {escena['scheduleID']}\n")
+
+    porcentajes = {"ticks": [0, 25, 50, 75, 100], "etiquetas": ['0%', '25%', '50%', '75%', '100%']}
+    binario = {"ticks": [0, 1], "etiquetas": ['0', '1']}
+    cmapBinario = matplotlib.colors.ListedColormap(['white', 'lightblue'])
+    if len(cdiEscala) <= 12:
+        escalaCDI = {"ticks": cdiEscala, "etiquetas": [etiqueta_cdi(valor) for valor in cdiEscala]}
+    else:
+        escalaCDI = {"ticks": None, "etiquetas": None}
+
+    listaImagenes = [
+        graficar_metrica(plt, xValues, yValues, np.array(dfGraficos[columnas[3]]), columnas[3], escena["nombre"], rutasImagenes["DA"], dpi, opciones, 'CMRmap', 0, 100, anchoBorde=0.5, **porcentajes),
+        graficar_metrica(plt, xValues, yValues, np.array(dfGraficos[columnas[4]]), columnas[4], escena["nombre"], rutasImagenes["UDI"], dpi, opciones, 'CMRmap', 0, 100, **porcentajes),
+        graficar_metrica(plt, xValues, yValues, np.array(dfGraficos[columnas[5]]), columnas[5], escena["nombre"], rutasImagenes["CDI"], dpi, opciones, 'CMRmap', 0, cdiEscala[-1], **escalaCDI),
+        graficar_metrica(plt, xValues, yValues, np.array(dfGraficos[columnas[6]]), columnas[6], escena["nombre"], rutasImagenes["sDA"], dpi, opciones, cmapBinario, **binario),
+        graficar_metrica(plt, xValues, yValues, np.array(dfGraficos[columnas[7]]), columnas[7], escena["nombre"], rutasImagenes["sUDI"], dpi, opciones, cmapBinario, **binario)
+    ]
+    return listaImagenes
+
+def generar_graficos(paths, pares, procesos=1, opciones=None, escenasVigentes=None, plan=None):
+    '''
+    - GENERACIÓN DE LAS IMÁGENES A PARTIR DE LOS RESULTADOS POR SENSOR -
+
+    Las escenas son independientes entre sí, por lo que se reparten en un ProcessPoolExecutor. Cada proceso importa matplotlib por su cuenta
+    y cierra cada figura después de grabarla.
+
+    Parámetros input
+        paths - Elemento tipo diccionario con las carpetas {"coordenadas", "imagenes"}, ver run_batch
+        pares - Elemento tipo lista de diccionarios, ver resultado_par. Los entrega run_batch o se leen con cargar_resultados_pares
+        procesos - Elemento tipo entero, cantidad de procesos
+        opciones - Elemento tipo diccionario, ver opciones_graficos. Por defecto opciones_graficos()
+        escenasVigentes - Elemento tipo conjunto con los nombres de las escenas que no cambiaron; se omiten si ya existen sus imágenes
+        plan - Elemento tipo diccionario, el plan de pares del cálculo, ver plan_pares y escenas_graficos
+
+    Parámetros output
+        listaImagenes - Elemento tipo lista con las rutas de las imágenes generadas, en el orden de las escenas
+    '''
+    if opciones is None:
+        opciones = opciones_graficos()
+
+    #   GENERACION DE GRÁFICOS
+    mensaje("#########   IMAGES GENERATION    ######### \n")
+
+    escenas = escenas_graficos(pares, plan)
+    generar_carpeta_imagenes(paths["imagenes"], opciones["carpetaImagen"])
+
+    escenasVigentes = escenasVigentes or set()
+    imagenesVigentes = []
+    escenasPendientes = []
+    for escena in escenas:
+        imagenesEscena = list(rutas_imagenes_escena(escena, paths, opciones).values())
+        if escena["nombre"] in escenasVigentes and all(os.path.isfile(ruta) for ruta in imagenesEscena):
+            mensaje(f"Imágenes vigentes para la escena {escena['nombre']}")
+            imagenesVigentes += imagenesEscena
+        else:
+            escenasPendientes.append(escena)
+    escenas = escenasPendientes
+
+    if procesos <= 1 or len(escenas) <= 1:
+        imagenesEscenas = [renderizar_escena(escena, paths, opciones) for escena in escenas]
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(escenas)), initializer=configurar_instrumentacion, initargs=parametros_instrumentacion()) as executor:
+            n = len(escenas)
+            imagenesEscenas = []
+            for imagenes, etapas, contadores in executor.map(ejecutar_instrumentado, [renderizar_escena] * n, escenas, [paths] * n, [opciones] * n):
+                acumular_instrumentacion(etapas, contadores)
+                imagenesEscenas.append(imagenes)
+
+    contar("imagenes generadas", sum(len(imagenes) for imagenes in imagenesEscenas))
+    return imagenesVigentes + [imagen for imagenes in imagenesEscenas for imagen in imagenes]
+
+''' - INICIO PROGRAMA PRINCIPAL - '''
+def main():
+    '''
+    - EJECUCIÓN DESDE LA LÍNEA DE COMANDOS -
+    '''
+    parser = argparse.ArgumentParser(description="PAC-MD - post-procesamiento de métricas dinámicas de iluminación natural")
+    parser.add_argument("--config", metavar="RUTA", help="archivo de configuración .toml o .json con rutas, umbrales, perfiles de umbrales, ejecución y gráficos; las opciones de la línea de comandos tienen prioridad")
+    parser.add_argument("--datos", metavar="CARPETA", help="carpeta de los archivos results y schedule")
+    parser.add_argument("--coordenadas", metavar="CARPETA", help="carpeta de los archivos .pts")
+    parser.add_argument("--procesados", metavar="CARPETA", help="carpeta de salida de las tablas, el archivo unificado y el manifiesto")
+    parser.add_argument("--imagenes", metavar="CARPETA", help="carpeta de salida de las imágenes")
+    parser.add_argument("--umbral", action="append", metavar="CLAVE=VALOR", help="modifica un umbral, por ejemplo --umbral daIlumValue=300 (se aplica también sobre cada perfil); se puede repetir")
+    parser.add_argument("--perfiles", nargs="+", metavar="NOMBRE", help="evalúa sólo los perfiles de umbrales indicados, de los definidos en el archivo de configuración")
+    parser.add_argument("--cache", choices=["construir", "verificar", "purgar"], help="genera, verifica o elimina la cache binaria de los archivos de entrada y finaliza")
+    parser.add_argument("--workers", type=int, metavar="N", help=f"cantidad de procesos para calcular los pares results/schedule en paralelo (por defecto {procesosParalelos})")
+    parser.add_argument("--no-plots", action="store_true", help="calcula las métricas y genera los archivos de salida, sin generar imágenes (no se carga matplotlib)")
+    parser.add_argument("--formato-imagen", choices=["png", "svg", "pdf"], help=f"formato de las imágenes (por defecto {formatoImagen})")
+    parser.add_argument("--dpi", type=int, help=f"resolución de las imágenes [dpi] (por defecto {dpiImagen})")
+    parser.add_argument("--formato-salida", choices=list(extensionesSalida), help=f"formato de las tablas por sensor y del archivo unificado, parquet y feather requieren pyarrow (por defecto {formatoSalida})")
+    parser.add_argument("--recalcular", action="store_true", help="calcula todos los pares, aunque el manifiesto indique que no cambiaron")
+    parser.add_argument("--vigilar", action="store_true", help="modo vigilancia: procesa los archivos results a medida que se completan y actualiza el archivo unificado, hasta Ctrl+C")
+    parser.add_argument("--intervalo", type=float, metavar="S", help=f"segundos entre lecturas de la carpeta de datos en modo vigilancia (por defecto {intervaloVigilancia})")
+    parser.add_argument("--solo-graficos", action="store_true", help="genera las imágenes a partir de los resultados existentes (procesados-*.npz), sin volver a calcular las métricas")
+    parser.add_argument("--miniaturas", action="store_const", const=True, help="genera sólo imágenes png de baja resolución para una revisión rápida")
+    parser.add_argument("--detalle", type=int, choices=[0, 1, 2], help=f"mensajes en la consola: 0 advertencias y errores, 1 progreso, 2 detalle (por defecto {nivelDetalle})")
+    parser.add_argument("--eventos", metavar="RUTA", help="archivo JSON-lines con un evento por etapa, par calculado y el resumen final")
+    parser.add_argument("--perfil", choices=["cprofile", "tracemalloc"], help="perfila el proceso principal y guarda el resultado en la carpeta de salida")
+    argumentos = parser.parse_args()
+
+    # OPCIONES: LÍNEA DE COMANDOS, ARCHIVO DE CONFIGURACIÓN O VALORES CONFIGURADOS AL INICIO DEL PROGRAMA, EN ESE ORDEN
+    configuracion = cargar_configuracion(argumentos.config) if argumentos.config else {}
+    ejecucion = configuracion.get("ejecucion", {})
+    configurar_instrumentacion(valor_configurado(argumentos.detalle, ejecucion, "detalle", nivelDetalle), valor_configurado(argumentos.eventos, ejecucion, "eventos", archivoEventos), reiniciar=True)
+
+    rutas = rutas_por_defecto()
+    rutas.update(configuracion.get("rutas", {}))
+    for clave in rutas:
+        if getattr(argumentos, clave) is not None:
+            rutas[clave] = ruta_carpeta(getattr(argumentos, clave))
+
+    umbralesLinea = umbrales_linea_comandos(argumentos.umbral)
+    umbrales = dict(configuracion.get("umbrales", {}), **umbralesLinea)
+    perfiles = [dict(perfil, **umbralesLinea) for perfil in configuracion.get("perfiles", perfilesUmbrales)]
+    if argumentos.perfiles:
+        desconocidos = set(argumentos.perfiles) - set(perfil.get("nombre") for perfil in perfiles)
+        if desconocidos:
+            parser.error(f"perfiles no definidos: {', '.join(sorted(desconocidos))}")
+        perfiles = [perfil for perfil in perfiles if perfil.get("nombre") in argumentos.perfiles]
+
+    workers = valor_configurado(argumentos.workers, ejecucion, "workers", procesosParalelos)
+    plots = valor_configurado(False if argumentos.no_plots else None, ejecucion, "plots", True)
+    incremental = valor_configurado(False if argumentos.recalcular else None, ejecucion, "incremental", ejecucionIncremental)
+    formato = valor_configurado(argumentos.formato_salida, ejecucion, "formatoSalida", formatoSalida)
+    vigilar = valor_configurado(True if argumentos.vigilar else None, ejecucion, "vigilar", False)
+    intervalo = valor_configurado(argumentos.intervalo, ejecucion, "intervaloVigilancia", intervaloVigilancia)
+
+    if argumentos.cache == "construir":
+        construir_cache(archivos_cacheables(rutas["datos"], rutas["coordenadas"]))
+        exit()
+    elif argumentos.cache == "verificar":
+        estadosCache = verificar_cache(archivos_cacheables(rutas["datos"], rutas["coordenadas"]))
+        estadosCache.update(verificar_mascaras(listar_resultados(ruta_carpeta(rutas["datos"]))[1].values()))
+        exit(0 if all(e == "vigente" for e in estadosCache.values()) else 1)
+    elif argumentos.cache == "purgar":
+        purgar_cache([rutas["datos"], rutas["coordenadas"]])
+        exit()
+
+    startTime = datetime.now()
+    perfil = iniciar_perfil(argumentos.perfil)
+    opcionesGraficos = opciones_graficos()
+    opcionesGraficos.update(configuracion.get("graficos", {}))
+    for clave, valor in [("formato", argumentos.formato_imagen), ("dpi", argumentos.dpi), ("miniaturas", argumentos.miniaturas)]:
+        if valor is not None:
+            opcionesGraficos[clave] = valor
+
+    if argumentos.solo_graficos:
+        for perfilUmbrales in perfiles_umbrales(perfiles, configurar_parametros(umbrales), rutas):
+            generar_graficos(dict(rutas, imagenes=perfilUmbrales["imagenes"]), cargar_resultados_pares(perfilUmbrales["procesados"]), workers, opcionesGraficos)
+    elif vigilar:
+        vigilar_carpeta(rutas, umbrales, workers=workers, plots=plots, opcionesGraficos=opcionesGraficos, formato=formato, perfiles=perfiles, intervalo=intervalo)
+    else:
+        run_batch(rutas, umbrales, workers=workers, plots=plots, opcionesGraficos=opcionesGraficos, incremental=incremental, formato=formato, perfiles=perfiles)
+
+    finalizar_perfil(argumentos.perfil, perfil, rutas["procesados"])
+    imprimir_resumen(resumen_instrumentacion())
+
+    endTime = datetime.now() - startTime
+    mensaje("Tiempo de ejecución: "+ str(endTime))
+
+    return 1
+
+if __name__ == "__main__":
+    main()